@@ -1,49 +1,147 @@
 from __future__ import annotations
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any, Callable
+from itertools import chain
+from typing import Optional, Dict, Any, Callable, Iterable, List, Tuple
 import json
+import logging
+import os
+import threading
 
-import httpx
+from sqlalchemy import and_, delete, event, func, insert, literal, or_, select, update
 from sqlalchemy.orm import Session
 
 from .models import (
+	AutomationBatch,
+	AutomationBatchItem,
 	AutomationRule,
+	SchedulerLease,
 	WebhookLog,
-	TriggerType,
+	WebhookDeliveryStatus,
 	ActionType,
 	Lead,
 	LeadStatus,
 	ActivityLog,
 	ActivityType,
 	Deal,
+	DealStage,
+	TimeWaitDue,
+	TimeWaitFiring,
+	generate_uuid_str,
 )
+from .outbox import get_worker_pool
+from .webhooks import get_deliverer, get_log_writer
+from .rule_index import get_rule_index
+from .instrumentation import METRICS, Counter, track_action
+
+logger = logging.getLogger(__name__)
+
+TIME_WAIT_CHUNK_SIZE = int(os.getenv("TIME_WAIT_CHUNK_SIZE", "500"))
+# Window for batching rules that only set batch_max_size, and the most events delivered in one batch
+AUTOMATION_BATCH_WINDOW_SECONDS = float(os.getenv("AUTOMATION_BATCH_WINDOW_SECONDS", "60"))
+AUTOMATION_BATCH_MAX_ITEMS = int(os.getenv("AUTOMATION_BATCH_MAX_ITEMS", "1000"))
+BULK_ACTION_TYPES = {ActionType.create_activity, ActionType.update_status, ActionType.create_deal}
+
+ACTION_FAILURES = Counter("automation_action_failures_total", "Automation actions rolled back to their savepoint after an error.")
+METRICS.append(ACTION_FAILURES)
 
 
 def dispatch_event(db: Session, event: str, entity: str, payload: Dict[str, Any]) -> None:
-	"""Dispatch an internal event to evaluate and execute matching automation rules."""
-	rules = db.query(AutomationRule).filter(AutomationRule.active == True).all()
-	for rule in rules:
-		if not _rule_matches_event(rule, event, entity, payload):
-			continue
-		_execute_action(db, rule, payload)
-
-
-def _rule_matches_event(rule: AutomationRule, event: str, entity: str, payload: Dict[str, Any]) -> bool:
-	if rule.trigger_type == TriggerType.on_create:
-		config = rule.trigger_payload or {}
-		return event == "create" and config.get("entity") == entity
-	if rule.trigger_type == TriggerType.on_stage_change:
-		config = rule.trigger_payload or {}
-		# For leads, consider status change
-		if entity == "lead" and event == "status_change":
-			expected_status = config.get("status")
-			return expected_status is None or payload.get("status") == expected_status
-		return False
-	# time_wait rules are handled by scheduler, not here
-	return False
+	"""Dispatch an internal event as part of the caller's transaction; the caller commits.
+
+	With workers running the event is an outbox row, committed atomically with the
+	write that caused it. Inline (AUTOMATION_WORKERS=0) it is kept until the caller
+	has committed and calls `run_inline_events`, so rules never run with the write lock held.
+	"""
+	dispatch_events(db, [(event, entity, payload)])
+
+
+def dispatch_events(db: Session, events: List[Tuple[str, str, Dict[str, Any]]]) -> None:
+	"""Dispatch several (event, entity, payload) events as part of the caller's transaction."""
+	pool = get_worker_pool()
+	if pool is None:
+		db.info.setdefault("inline_events", []).extend(events)
+		return
+	pool.enqueue_many(db, events)
+
+
+def take_inline_events(db: Session) -> List[Tuple[str, str, Dict[str, Any]]]:
+	"""The events committed by `db` that are waiting to run inline (none when workers run)."""
+	return db.info.pop("inline_events", [])
+
+
+def run_inline_events(db: Session, events: Optional[List[Tuple[str, str, Dict[str, Any]]]] = None) -> None:
+	"""After the dispatching transaction committed, run its inline events as one unit of work and commit."""
+	if events is None:
+		events = take_inline_events(db)
+	if not events:
+		return
+	for event, entity, payload in events:
+		process_event(db, event, entity, payload)
+	db.commit()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_inline_events(session: Session) -> None:
+	session.info.pop("inline_events", None)
+
+
+def process_event(db: Session, event: str, entity: str, payload: Dict[str, Any]) -> None:
+	"""Execute the automation rules matching an event as one unit of work; the caller commits.
+
+	Each action runs in its own savepoint, so a failing action only undoes its own writes.
+	Batching rules only collect the event; the scheduler delivers their batches.
+	"""
+	for rule in _webhooks_first(get_rule_index(db).match(event, entity, payload)):
+		if rule.batched:
+			_collect(db, rule, event, entity, payload)
+		else:
+			_execute_action(db, rule, payload)
+
+
+def _collect(db: Session, rule: Any, event: str, entity: str, payload: Dict[str, Any]) -> None:
+	"""Add an event to the rule's pending batch, making the batch due now once it holds `batch_max_size` events."""
+	now = datetime.utcnow()
+	# The insert takes the write lock first, so the batch row is read and updated atomically
+	db.execute(insert(AutomationBatchItem).values(rule_id=rule.id, event=event, entity=entity, payload=payload, created_at=now))
+	size = db.execute(select(AutomationBatch.size).where(AutomationBatch.rule_id == rule.id)).scalar()
+	full = bool(rule.batch_max_size) and (size or 0) + 1 >= rule.batch_max_size
+	if size is None:
+		window = rule.batch_window_seconds or AUTOMATION_BATCH_WINDOW_SECONDS
+		db.execute(insert(AutomationBatch).values(rule_id=rule.id, size=1, due_at=now if full else now + timedelta(seconds=window)))
+	else:
+		values: Dict[str, Any] = {"size": size + 1}
+		if full:
+			values["due_at"] = now
+		db.execute(update(AutomationBatch).where(AutomationBatch.rule_id == rule.id).values(**values))
+	if size is None or full:
+		# The batch is due sooner than the scheduler may have planned to wake up
+		db.info["wake_scheduler"] = True
+
+
+def _webhooks_first(items: Iterable[Any], rule_of: Callable[[Any], Any] = lambda item: item) -> List[Any]:
+	"""Order webhook actions before the others, so they run before the unit of work takes the write lock."""
+	return sorted(items, key=lambda item: rule_of(item).action_type != ActionType.webhook)
+
 
+def _execute_action(db: Session, rule: AutomationRule, payload: Dict[str, Any]) -> bool:
+	"""Run one action in a savepoint; return False if it failed and was rolled back. The caller commits."""
+	return run_action(db, rule, payload) is None
 
-def _execute_action(db: Session, rule: AutomationRule, payload: Dict[str, Any]) -> None:
+
+def run_action(db: Session, rule: AutomationRule, payload: Dict[str, Any]) -> Optional[str]:
+	"""Like `_execute_action`, but return the failure message (None on success) for callers that report it."""
+	try:
+		with db.begin_nested(), track_action(rule.action_type.value):
+			_dispatch_action(db, rule, payload)
+	except Exception as exc:
+		ACTION_FAILURES.inc()
+		logger.exception("Automation rule %s (%s) failed", rule.id, rule.action_type.value)
+		return f"{type(exc).__name__}: {exc}"
+	return None
+
+
+def _dispatch_action(db: Session, rule: AutomationRule, payload: Dict[str, Any]) -> None:
 	if rule.action_type == ActionType.webhook:
 		_do_webhook(db, rule, payload)
 	elif rule.action_type == ActionType.create_activity:
@@ -65,24 +163,40 @@ def _do_webhook(db: Session, rule: AutomationRule, payload: Dict[str, Any]) -> N
 	method = (conf.get("method") or "POST").upper()
 	if not url:
 		return
-	try:
-		with httpx.Client(timeout=5.0) as client:
-			resp = client.request(method, url, json=payload)
-			_log_webhook(db, rule, request=payload, status_code=resp.status_code, response_body=resp.text)
-	except Exception as exc:
-		_log_webhook(db, rule, request=payload, status_code=0, response_body=str(exc))
+	result = get_deliverer().deliver(method, url, payload)
+	writer = get_log_writer()
+	if writer is None:
+		_log_webhook(db, rule, request=payload, status_code=result.status_code, response_body=result.body, delivery_status=result.delivery_status, attempts=result.attempts)
+		return
+	writer.add(
+		automation_rule_id=rule.id,
+		request_payload=payload,
+		response_status=result.status_code,
+		response_body=result.body,
+		delivery_status=result.delivery_status,
+		attempts=result.attempts,
+	)
 
 
-def _log_webhook(db: Session, rule: AutomationRule, request: Optional[Dict[str, Any]], status_code: Optional[int], response_body: Optional[str]) -> None:
+def _log_webhook(
+	db: Session,
+	rule: AutomationRule,
+	request: Optional[Dict[str, Any]],
+	status_code: Optional[int],
+	response_body: Optional[str],
+	delivery_status: WebhookDeliveryStatus = WebhookDeliveryStatus.delivered,
+	attempts: int = 1,
+) -> None:
 	log = WebhookLog(
 		automation_rule_id=rule.id,
 		request_payload=request,
 		response_status=status_code,
 		response_body=response_body,
+		delivery_status=delivery_status,
+		attempts=attempts,
 		created_at=datetime.utcnow(),
 	)
 	db.add(log)
-	db.commit()
 
 
 def _create_activity(db: Session, rule: AutomationRule, payload: Dict[str, Any]) -> None:
@@ -104,7 +218,6 @@ def _create_activity(db: Session, rule: AutomationRule, payload: Dict[str, Any])
 	lead = db.query(Lead).get(lead_id)
 	if lead:
 		lead.last_touch_at = datetime.utcnow()
-	db.commit()
 
 
 def _update_status(db: Session, rule: AutomationRule, payload: Dict[str, Any]) -> None:
@@ -121,7 +234,6 @@ def _update_status(db: Session, rule: AutomationRule, payload: Dict[str, Any]) -
 	except Exception:
 		return
 	lead.updated_at = datetime.utcnow()
-	db.commit()
 
 
 def _create_deal(db: Session, rule: AutomationRule, payload: Dict[str, Any]) -> None:
@@ -139,49 +251,358 @@ def _create_deal(db: Session, rule: AutomationRule, payload: Dict[str, Any]) ->
 		currency=currency,
 	)
 	db.add(deal)
-	db.commit()
 
 
 # Scheduler support for time_wait rules
 from apscheduler.schedulers.background import BackgroundScheduler
 
+from .leader import LeaderLease
+
+# "embedded" runs the scheduler in every API process (one leader fires rules at a time); "off" leaves it to `python -m app.scheduler`
+SCHEDULER_MODE = os.getenv("SCHEDULER_MODE", "embedded")
+# Longest sleep between looks at the due queue; bounds how late entries written by other processes are noticed
+TIME_WAIT_MAX_SLEEP_SECONDS = float(os.getenv("TIME_WAIT_MAX_SLEEP_SECONDS", "60"))
+# Delay before a lead whose action failed is retried
+TIME_WAIT_RETRY_SECONDS = float(os.getenv("TIME_WAIT_RETRY_SECONDS", "60"))
+TIME_WAIT_BATCH_SIZE = int(os.getenv("TIME_WAIT_BATCH_SIZE", "5000"))
+
 _scheduler: Optional[BackgroundScheduler] = None
+_lease: Optional[LeaderLease] = None
+_runner: Optional[threading.Thread] = None
+_wakeup = threading.Event()
+_stopping = threading.Event()
 
 
 def start_scheduler(open_session: Callable[[], Session]) -> None:
-	global _scheduler
+	"""Start the scheduler for time_wait rules and rule batches; it only runs them while this process holds the `time_wait_scan` lease."""
+	global _scheduler, _lease, _runner
 	if _scheduler:
 		return
+	lease = LeaderLease(open_session, "time_wait_scan")
+	_lease = lease
+
+	def renew() -> None:
+		was_held = lease.held()
+		if lease.acquire() and not was_held:
+			wake_scheduler()
+
+	_stopping.clear()
 	_scheduler = BackgroundScheduler(timezone="UTC")
-	_scheduler.add_job(lambda: _run_time_wait_rules(open_session), "interval", minutes=1, id="time_wait_scan", replace_existing=True)
+	# Renewed separately, so a long tick does not hand the lease to another process
+	_scheduler.add_job(renew, "interval", seconds=lease.renew_seconds, id="scheduler_lease", replace_existing=True, next_run_time=datetime.utcnow())
 	_scheduler.start()
+	_runner = threading.Thread(target=_scheduler_loop, args=(open_session, lease), name="automation-scheduler", daemon=True)
+	_runner.start()
+
 
+def stop_scheduler() -> None:
+	global _scheduler, _lease, _runner
+	if _runner:
+		_stopping.set()
+		_wakeup.set()
+		_runner.join()
+		_runner = None
+	if _scheduler:
+		_scheduler.shutdown()
+		_scheduler = None
+	if _lease:
+		_lease.release()
+		_lease = None
+
+
+def wake_scheduler() -> None:
+	"""Look at the due queue now rather than at the planned wakeup; safe to call from any thread."""
+	_wakeup.set()
 
-def _run_time_wait_rules(open_session: Callable[[], Session]) -> None:
-	from .models import AutomationRule
+
+def warn_if_unscheduled(open_session: Callable[[], Session]) -> bool:
+	"""Log a warning if active batching rules exist but no process holds the scheduler lease; return whether it warned.
+
+	For API processes started with SCHEDULER_MODE=off: only the scheduler delivers batches, so without a
+	running `python -m app.scheduler` they pile up in automation_batch_items and nothing reports it.
+	"""
 	with open_session() as db:
-		rules = db.query(AutomationRule).filter(AutomationRule.active == True, AutomationRule.trigger_type == TriggerType.time_wait).all()
-		for rule in rules:
-			_try_run_time_wait_rule(db, rule)
+		lease = db.get(SchedulerLease, "time_wait_scan")
+		if lease is not None and lease.expires_at > datetime.utcnow():
+			return False
+		batching = db.execute(
+			select(func.count()).select_from(AutomationRule).where(~_stopped_collecting())
+		).scalar()
+	if not batching:
+		return False
+	logger.warning(
+		"SCHEDULER_MODE=%s and no scheduler is running: %d batching rule(s) will collect events that are not delivered "
+		"until `python -m app.scheduler` is started",
+		SCHEDULER_MODE,
+		batching,
+	)
+	return True
 
 
-def _try_run_time_wait_rule(db: Session, rule: AutomationRule) -> None:
-	conf = rule.trigger_payload or {}
-	entity = conf.get("entity") or "lead"
-	if entity != "lead":
-		return
-	status_filter = conf.get("status")
-	hours_without_touch = conf.get("hours_without_touch") or 24
-	threshold = datetime.utcnow() - timedelta(hours=hours_without_touch)
+def _scheduler_loop(open_session: Callable[[], Session], lease: LeaderLease) -> None:
+	"""Sleep until the earliest due time_wait entry or batch (at most TIME_WAIT_MAX_SLEEP_SECONDS), run what is due, repeat."""
+	while not _stopping.is_set():
+		_wakeup.clear()
+		delay = TIME_WAIT_MAX_SLEEP_SECONDS
+		if lease.held():
+			for tick in (_run_time_wait_rules, _deliver_due_batches):
+				try:
+					next_due = tick(open_session)
+				except Exception:
+					logger.exception("Scheduler tick %s failed", tick.__name__)
+					continue
+				if next_due is not None:
+					delay = min(delay, max(0.0, (next_due - datetime.utcnow()).total_seconds()))
+		_wakeup.wait(delay)
+
+
+@event.listens_for(Session, "after_flush")
+def _note_time_wait_writes(session: Session, flush_context) -> None:
+	# New leads, status changes and rule edits can queue entries due sooner than the planned wakeup
+	if _runner is not None and any(isinstance(obj, (Lead, AutomationRule)) for obj in chain(session.new, session.dirty)):
+		session.info["wake_scheduler"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _wake_for_committed(session: Session) -> None:
+	if session.info.pop("wake_scheduler", False) and _runner is not None:
+		wake_scheduler()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_time_wait_writes(session: Session) -> None:
+	session.info.pop("wake_scheduler", None)
+
+
+@dataclass
+class _TimeWaitScan:
+	"""A time_wait rule's leads to fire in one scheduler tick."""
+	rule: AutomationRule
+	rows: List[Any]
+	fired: List[Any] = field(default_factory=list)
+
+
+def _run_time_wait_rules(open_session: Callable[[], Session]) -> Optional[datetime]:
+	"""One scheduler tick: fire every due time_wait entry and commit once; return when the next one is due."""
+	with open_session() as db:
+		now = datetime.utcnow()
+		scans = _due_time_wait_scans(db, now)
+		# Per-lead actions run before any bulk writes, firings or dequeues, and webhooks before
+		# other per-lead actions, so the write lock is never held across a webhook call
+		for scan in _webhooks_first(scans, lambda scan: scan.rule):
+			if scan.rule.action_type not in BULK_ACTION_TYPES:
+				_run_per_lead_actions(db, scan)
+		# Per-lead rules record their firings before bulk actions touch leads and requeue them
+		for scan in sorted(scans, key=lambda scan: scan.rule.action_type in BULK_ACTION_TYPES):
+			_finish_time_wait_scan(db, scan, now)
+		db.commit()
+		return db.execute(select(func.min(TimeWaitDue.due_at))).scalar()
+
+
+def _due_time_wait_scans(db: Session, now: datetime) -> List[_TimeWaitScan]:
+	rows = db.execute(
+		select(TimeWaitDue.id.label("due_id"), TimeWaitDue.rule_id, Lead.id, Lead.status, Lead.last_touch_at)
+		.join(Lead, Lead.id == TimeWaitDue.lead_id)
+		.where(TimeWaitDue.due_at <= now)
+		.order_by(TimeWaitDue.due_at)
+		.limit(TIME_WAIT_BATCH_SIZE)
+	).all()
+	by_rule: Dict[int, List[Any]] = {}
+	for row in rows:
+		by_rule.setdefault(row.rule_id, []).append(row)
+	if not by_rule:
+		return []
+	rules = db.query(AutomationRule).filter(AutomationRule.id.in_(list(by_rule))).all()
+	return [_TimeWaitScan(rule, by_rule[rule.id]) for rule in rules]
+
+
+def _run_per_lead_actions(db: Session, scan: _TimeWaitScan) -> None:
+	for row in scan.rows:
+		if _execute_action(db, scan.rule, {"lead_id": row.id, "status": row.status.value}):
+			scan.fired.append(row)
+
+
+def _finish_time_wait_scan(db: Session, scan: _TimeWaitScan, now: datetime) -> None:
+	"""Apply bulk actions, record firings and dequeue in one savepoint per rule; entries that did not fire are deferred."""
+	rule = scan.rule
+	try:
+		with db.begin_nested():
+			if rule.action_type in BULK_ACTION_TYPES:
+				scan.fired = scan.rows
+			# Dequeue and record firings before bulk actions write the leads: the triggers requeue a lead on
+			# every touch or status change, skipping only rules that already fired for its current touch
+			_dequeue(db, scan.fired)
+			_record_firings(db, rule, scan.fired, now)
+			if rule.action_type in BULK_ACTION_TYPES:
+				_execute_bulk_action(db, rule, [row.id for row in scan.rows])
+			fired = {row.due_id for row in scan.fired}
+			_defer(db, [row for row in scan.rows if row.due_id not in fired], now)
+	except Exception:
+		ACTION_FAILURES.inc()
+		logger.exception("time_wait rule %s failed", rule.id)
+		_defer(db, scan.rows, now)
+
+
+def _dequeue(db: Session, rows: List[Any]) -> None:
+	for start in range(0, len(rows), TIME_WAIT_CHUNK_SIZE):
+		chunk = rows[start:start + TIME_WAIT_CHUNK_SIZE]
+		db.execute(delete(TimeWaitDue).where(TimeWaitDue.id.in_([row.due_id for row in chunk])))
+
+
+def _defer(db: Session, rows: List[Any], now: datetime) -> None:
+	"""Push the entries of leads whose action failed back by TIME_WAIT_RETRY_SECONDS."""
+	retry_at = now + timedelta(seconds=TIME_WAIT_RETRY_SECONDS)
+	for start in range(0, len(rows), TIME_WAIT_CHUNK_SIZE):
+		chunk = rows[start:start + TIME_WAIT_CHUNK_SIZE]
+		db.execute(update(TimeWaitDue).where(TimeWaitDue.id.in_([row.due_id for row in chunk])).values(due_at=retry_at))
 
-	q = db.query(Lead)
-	if status_filter:
+
+def _record_firings(db: Session, rule: AutomationRule, rows: List[Any], now: datetime) -> None:
+	for start in range(0, len(rows), TIME_WAIT_CHUNK_SIZE):
+		chunk = rows[start:start + TIME_WAIT_CHUNK_SIZE]
+		db.execute(delete(TimeWaitFiring).where(TimeWaitFiring.rule_id == rule.id, TimeWaitFiring.lead_id.in_([row.id for row in chunk])))
+		db.execute(insert(TimeWaitFiring), [
+			{"rule_id": rule.id, "lead_id": row.id, "touch_at": row.last_touch_at, "fired_at": now}
+			for row in chunk
+		])
+
+
+def _execute_bulk_action(db: Session, rule: AutomationRule, lead_ids: List[str]) -> None:
+	"""Apply a lead action to many leads with chunked set-based statements; the caller commits."""
+	conf = rule.action_payload or {}
+	now = datetime.utcnow()
+	if rule.action_type == ActionType.update_status:
 		try:
-			q = q.filter(Lead.status == LeadStatus(status_filter))
-		except Exception:
+			status_value = LeadStatus(conf.get("status"))
+		except ValueError:
 			return
-	q = q.filter((Lead.last_touch_at == None) | (Lead.last_touch_at < threshold))
+	for start in range(0, len(lead_ids), TIME_WAIT_CHUNK_SIZE):
+		chunk = lead_ids[start:start + TIME_WAIT_CHUNK_SIZE]
+		with track_action(rule.action_type.value):
+			if rule.action_type == ActionType.create_activity:
+				_bulk_create_activity(db, conf, chunk, now)
+			elif rule.action_type == ActionType.update_status:
+				db.execute(update(Lead).where(Lead.id.in_(chunk)).values(status=status_value, updated_at=now))
+			elif rule.action_type == ActionType.create_deal:
+				_bulk_create_deal(db, conf, chunk, now)
+
+
+def _bulk_create_activity(db: Session, conf: Dict[str, Any], lead_ids: List[str], now: datetime) -> None:
+	rows = select(
+		Lead.id,
+		literal(ActivityType.note, ActivityLog.activity_type.type),
+		literal(conf.get("text") or "Automation note", ActivityLog.text.type),
+		literal(conf.get("created_by") or "automation", ActivityLog.created_by.type),
+		literal(now, ActivityLog.created_at.type),
+	).where(Lead.id.in_(lead_ids))
+	db.execute(insert(ActivityLog).from_select(["lead_id", "activity_type", "text", "created_by", "created_at"], rows))
+	db.execute(update(Lead).where(Lead.id.in_(lead_ids)).values(last_touch_at=now))
+
+
+def _bulk_create_deal(db: Session, conf: Dict[str, Any], lead_ids: List[str], now: datetime) -> None:
+	# Deal ids are UUIDs generated in Python, so this is an executemany rather than INSERT ... SELECT
+	db.execute(insert(Deal), [
+		{
+			"id": generate_uuid_str(),
+			"lead_id": lead_id,
+			"title": conf.get("title") or "New Deal",
+			"value": float(conf.get("value") or 0),
+			"currency": conf.get("currency") or "USD",
+			"stage": DealStage.new,
+			"probability": 0,
+			"created_at": now,
+			"updated_at": now,
+		}
+		for lead_id in lead_ids
+	])
+
+
+def _deliver_due_batches(open_session: Callable[[], Session]) -> Optional[datetime]:
+	"""Deliver every due rule batch and commit once; return when the next batch is due.
+
+	A rule that was disabled or stopped batching collects nothing more, so its pending events are delivered at once.
+	"""
+	with open_session() as db:
+		now = datetime.utcnow()
+		due = db.execute(
+			select(AutomationBatch.rule_id)
+			.outerjoin(AutomationRule, AutomationRule.id == AutomationBatch.rule_id)
+			.where(or_(AutomationBatch.due_at <= now, _stopped_collecting()))
+			.order_by(AutomationBatch.due_at)
+		).scalars().all()
+		rules = {rule.id: rule for rule in db.query(AutomationRule).filter(AutomationRule.id.in_(due))} if due else {}
+		batches: List[Tuple[AutomationRule, List[Any]]] = []
+		for rule_id in due:
+			rule = rules.get(rule_id)
+			if rule is None:
+				# The rule was deleted, so there is no action to run
+				db.execute(delete(AutomationBatchItem).where(AutomationBatchItem.rule_id == rule_id))
+				db.execute(delete(AutomationBatch).where(AutomationBatch.rule_id == rule_id))
+				continue
+			items = db.execute(
+				select(AutomationBatchItem.id, AutomationBatchItem.event, AutomationBatchItem.entity, AutomationBatchItem.payload)
+				.where(AutomationBatchItem.rule_id == rule_id)
+				.order_by(AutomationBatchItem.id)
+				.limit(min(rule.batch_max_size or AUTOMATION_BATCH_MAX_ITEMS, AUTOMATION_BATCH_MAX_ITEMS))
+			).all()
+			batches.append((rule, items))
+		# Webhook batches go out first, so the write lock is not held across the calls
+		for rule, items in _webhooks_first(batches, lambda batch: batch[0]):
+			if _deliver_batch(db, rule, items):
+				if items:
+					db.execute(delete(AutomationBatchItem).where(AutomationBatchItem.rule_id == rule.id, AutomationBatchItem.id <= items[-1].id))
+				_settle_batch(db, rule, now)
+			else:
+				db.execute(update(AutomationBatch).where(AutomationBatch.rule_id == rule.id).values(due_at=now + timedelta(seconds=TIME_WAIT_RETRY_SECONDS)))
+		db.commit()
+		return db.execute(select(func.min(AutomationBatch.due_at))).scalar()
 
-	for lead in q.all():
-		payload = {"lead_id": lead.id, "status": lead.status.value}
-		_execute_action(db, rule, payload)
+
+def _stopped_collecting() -> Any:
+	"""Batches whose rule is gone, disabled or no longer batching (the batch query outer-joins the rule)."""
+	return or_(
+		AutomationRule.id.is_(None),
+		AutomationRule.active.is_(False),
+		and_(func.coalesce(AutomationRule.batch_window_seconds, 0) == 0, func.coalesce(AutomationRule.batch_max_size, 0) == 0),
+	)
+
+
+def _batch_payload(rule: AutomationRule, items: List[Any]) -> Dict[str, Any]:
+	"""The body of a batched webhook: every collected event, oldest first."""
+	return {
+		"rule_id": rule.id,
+		"count": len(items),
+		"events": [{"event": item.event, "entity": item.entity, "payload": item.payload} for item in items],
+	}
+
+
+def _deliver_batch(db: Session, rule: AutomationRule, items: List[Any]) -> bool:
+	"""Run a rule's action once for a whole batch: one webhook call, or one set-based bulk action on the leads."""
+	if not items:
+		return True
+	if rule.action_type not in BULK_ACTION_TYPES:
+		return _execute_action(db, rule, _batch_payload(rule, items))
+	lead_ids = list(dict.fromkeys(item.payload["lead_id"] for item in items if (item.payload or {}).get("lead_id")))
+	try:
+		with db.begin_nested():
+			_execute_bulk_action(db, rule, lead_ids)
+	except Exception:
+		ACTION_FAILURES.inc()
+		logger.exception("Automation rule %s (%s) batch failed", rule.id, rule.action_type.value)
+		return False
+	return True
+
+
+def _settle_batch(db: Session, rule: AutomationRule, now: datetime) -> None:
+	"""Drop the batch row once empty, or reschedule it for the events collected meanwhile."""
+	size, first = db.execute(
+		select(func.count(), func.min(AutomationBatchItem.created_at)).where(AutomationBatchItem.rule_id == rule.id)
+	).one()
+	if not size:
+		db.execute(delete(AutomationBatch).where(AutomationBatch.rule_id == rule.id))
+		return
+	collecting = rule.active and bool(rule.batch_window_seconds or rule.batch_max_size)
+	full = not collecting or (bool(rule.batch_max_size) and size >= rule.batch_max_size)
+	window = rule.batch_window_seconds or AUTOMATION_BATCH_WINDOW_SECONDS
+	due_at = now if full else max(now, first + timedelta(seconds=window))
+	db.execute(update(AutomationBatch).where(AutomationBatch.rule_id == rule.id).values(size=size, due_at=due_at))
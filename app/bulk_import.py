@@ -0,0 +1,155 @@
+from __future__ import annotations
+import csv
+import json
+import logging
+import os
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple, Type
+
+from fastapi import HTTPException, Request
+from pydantic import BaseModel, ValidationError
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from .schemas import BulkImportResult, BulkRowError
+
+logger = logging.getLogger(__name__)
+
+BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", "1000"))
+
+NDJSON_TYPES = {"application/x-ndjson", "application/ndjson", "application/jsonl", "application/x-jsonlines"}
+CSV_TYPES = {"text/csv", "application/csv"}
+
+Chunk = List[Tuple[int, Any]]
+# Inserts a validated chunk without committing and returns per-row errors for rows it rejected.
+ChunkInserter = Callable[[Chunk], List[BulkRowError]]
+
+BULK_OPENAPI: Dict[str, Any] = {
+	"requestBody": {
+		"required": True,
+		"content": {
+			"application/json": {"schema": {"type": "array", "items": {"type": "object"}}},
+			"application/x-ndjson": {"schema": {"type": "string"}},
+			"text/csv": {"schema": {"type": "string"}},
+		},
+	}
+}
+
+
+async def _iter_lines(request: Request) -> AsyncIterator[str]:
+	buffer = b""
+	async for chunk in request.stream():
+		buffer += chunk
+		*lines, buffer = buffer.split(b"\n")
+		for line in lines:
+			yield line.decode("utf-8-sig").rstrip("\r")
+	if buffer:
+		yield buffer.decode("utf-8-sig").rstrip("\r")
+
+
+async def iter_records(request: Request) -> AsyncIterator[Tuple[int, Optional[Dict[str, Any]], Optional[str]]]:
+	"""Yield (row, record, parse_error) from a JSON array, NDJSON or CSV request body.
+
+	NDJSON and CSV bodies are consumed incrementally; CSV records must fit on one line.
+	"""
+	content_type = request.headers.get("content-type", "application/json").split(";")[0].strip().lower()
+	if content_type in NDJSON_TYPES:
+		row = 0
+		async for line in _iter_lines(request):
+			if not line.strip():
+				continue
+			row += 1
+			try:
+				record = json.loads(line)
+			except ValueError as exc:
+				yield row, None, f"Invalid JSON: {exc}"
+				continue
+			yield (row, record, None) if isinstance(record, dict) else (row, None, "Expected a JSON object")
+	elif content_type in CSV_TYPES:
+		header: Optional[List[str]] = None
+		row = 0
+		async for line in _iter_lines(request):
+			if not line.strip():
+				continue
+			values = next(csv.reader([line]))
+			if header is None:
+				header = [name.strip() for name in values]
+				continue
+			row += 1
+			if len(values) != len(header):
+				yield row, None, f"Expected {len(header)} columns, got {len(values)}"
+				continue
+			# Empty cells fall back to the schema defaults
+			yield row, {name: value for name, value in zip(header, values) if value != ""}, None
+	elif content_type == "application/json":
+		try:
+			records = json.loads(await request.body())
+		except ValueError:
+			raise HTTPException(status_code=400, detail="Invalid JSON body")
+		if not isinstance(records, list):
+			raise HTTPException(status_code=400, detail="Expected a JSON array")
+		for row, record in enumerate(records, start=1):
+			yield (row, record, None) if isinstance(record, dict) else (row, None, "Expected a JSON object")
+	else:
+		raise HTTPException(status_code=415, detail=f"Unsupported content type: {content_type}")
+
+
+def _format_validation_error(exc: ValidationError) -> str:
+	return "; ".join(f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" for err in exc.errors())
+
+
+def _apply_chunk(
+	db: Session,
+	insert_chunk: ChunkInserter,
+	chunk: Chunk,
+	result: BulkImportResult,
+	after_commit: Optional[Callable[[], None]],
+) -> None:
+	try:
+		errors = insert_chunk(chunk)
+		db.commit()
+	except Exception as exc:
+		db.rollback()
+		errors = [BulkRowError(row=row, error=f"Chunk rejected: {exc}") for row, _ in chunk]
+		after_commit = None
+	result.errors.extend(errors)
+	result.failed += len(errors)
+	result.created += len(chunk) - len(errors)
+	if after_commit is not None:
+		# The rows are stored; a failure here must not report them as rejected, or a retry duplicates them
+		try:
+			after_commit()
+		except Exception:
+			db.rollback()
+			logger.exception("Post-commit step of a bulk import chunk failed")
+
+
+async def run_import(
+	request: Request,
+	db: Session,
+	schema: Type[BaseModel],
+	insert_chunk: ChunkInserter,
+	after_commit: Optional[Callable[[], None]] = None,
+) -> BulkImportResult:
+	"""Validate request records against `schema` and insert them in chunks of BULK_CHUNK_SIZE.
+
+	Each chunk is committed on its own; a chunk that raises is rolled back and all its rows are reported.
+	`after_commit` runs after each committed chunk (e.g. inline automations); its failures are only logged.
+	"""
+	result = BulkImportResult()
+	chunk: Chunk = []
+	async for row, record, error in iter_records(request):
+		if error is None:
+			try:
+				chunk.append((row, schema.model_validate(record)))
+			except ValidationError as exc:
+				error = _format_validation_error(exc)
+		if error is not None:
+			result.errors.append(BulkRowError(row=row, error=error))
+			result.failed += 1
+			continue
+		if len(chunk) >= BULK_CHUNK_SIZE:
+			await run_in_threadpool(_apply_chunk, db, insert_chunk, chunk, result, after_commit)
+			chunk = []
+	if chunk:
+		await run_in_threadpool(_apply_chunk, db, insert_chunk, chunk, result, after_commit)
+	return result
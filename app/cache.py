@@ -0,0 +1,217 @@
+"""Optional read-through cache of serialized GET responses.
+
+Entries are JSON bytes tagged with what they were built from: `<table>:<id>`
+for a single row, `<table>` for list pages of that table, and `<table>:*` on
+everything from the table. Session events collect tags from the rows each
+transaction writes (or the whole table for bulk Core statements) and
+invalidate them after commit. Tag versions are checked on store, so a response
+built from a snapshot older than the latest invalidation is never cached.
+
+The in-process backend only sees writes from its own process. Keys include
+the response's ETag, which is read from the database on every request, so a
+write from another process (another worker, the standalone scheduler) turns
+the next lookup into a miss; RESPONSE_CACHE_TTL_SECONDS is only a backstop.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+
+from fastapi import Request, Response
+from pydantic import BaseModel
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from .instrumentation import METRICS, Counter
+
+RESPONSE_CACHE = os.getenv("RESPONSE_CACHE", "0") == "1"
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "1024"))
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "30"))
+
+CACHE_HITS = Counter("response_cache_hits_total", "GET responses served from the response cache.")
+CACHE_MISSES = Counter("response_cache_misses_total", "Cacheable GET responses built from the database.")
+CACHE_INVALIDATIONS = Counter("response_cache_invalidated_tags_total", "Cache tags invalidated by committed writes.")
+METRICS.extend([CACHE_HITS, CACHE_MISSES, CACHE_INVALIDATIONS])
+
+Versions = Tuple[int, ...]
+
+
+class CacheBackend:
+	"""Storage for tagged cache entries; subclass to share the cache between processes."""
+
+	def get(self, key: str) -> Optional[bytes]:
+		raise NotImplementedError
+
+	def versions(self, tags: Tuple[str, ...]) -> Versions:
+		raise NotImplementedError
+
+	def set(self, key: str, value: bytes, tags: Tuple[str, ...], versions: Versions, ttl: float) -> None:
+		"""Store `value` unless any tag was invalidated since `versions` was read."""
+		raise NotImplementedError
+
+	def invalidate(self, tags: Iterable[str]) -> None:
+		raise NotImplementedError
+
+
+class MemoryBackend(CacheBackend):
+	"""Thread-safe LRU with per-entry expiry."""
+
+	def __init__(self, max_entries: int):
+		self.max_entries = max_entries
+		self._entries: "OrderedDict[str, Tuple[bytes, float, Tuple[str, ...]]]" = OrderedDict()
+		self._tagged: Dict[str, Set[str]] = {}
+		self._versions: Dict[str, int] = {}
+		self._lock = threading.Lock()
+
+	def get(self, key: str) -> Optional[bytes]:
+		with self._lock:
+			entry = self._entries.get(key)
+			if entry is None:
+				return None
+			if entry[1] < time.monotonic():
+				self._drop(key)
+				return None
+			self._entries.move_to_end(key)
+			return entry[0]
+
+	def versions(self, tags: Tuple[str, ...]) -> Versions:
+		with self._lock:
+			return tuple(self._versions.get(tag, 0) for tag in tags)
+
+	def set(self, key: str, value: bytes, tags: Tuple[str, ...], versions: Versions, ttl: float) -> None:
+		with self._lock:
+			if tuple(self._versions.get(tag, 0) for tag in tags) != versions:
+				return
+			self._drop(key)
+			self._entries[key] = (value, time.monotonic() + ttl, tags)
+			for tag in tags:
+				self._tagged.setdefault(tag, set()).add(key)
+			while len(self._entries) > self.max_entries:
+				self._drop(next(iter(self._entries)))
+
+	def invalidate(self, tags: Iterable[str]) -> None:
+		with self._lock:
+			for tag in tags:
+				self._versions[tag] = self._versions.get(tag, 0) + 1
+				for key in self._tagged.pop(tag, ()):
+					self._drop(key)
+
+	def _drop(self, key: str) -> None:
+		entry = self._entries.pop(key, None)
+		if entry is None:
+			return
+		for tag in entry[2]:
+			keys = self._tagged.get(tag)
+			if keys is not None:
+				keys.discard(key)
+				if not keys:
+					del self._tagged[tag]
+
+
+class CachedRead:
+	"""One cacheable GET: `body` is set on a hit; otherwise build the model and pass it to `store`."""
+
+	def __init__(self, backend: Optional[CacheBackend], key: str, tags: Tuple[str, ...]):
+		self.backend = backend
+		self.key = key
+		self.tags = tags
+		self.body: Optional[bytes] = None
+		self.versions: Versions = ()
+		if backend is None:
+			return
+		self.body = backend.get(key)
+		if self.body is not None:
+			CACHE_HITS.inc()
+		else:
+			CACHE_MISSES.inc()
+			# Read before querying, so writes committed meanwhile prevent the store
+			self.versions = backend.versions(tags)
+
+	def response(self) -> Response:
+		return Response(content=self.body, media_type="application/json")
+
+	def store(self, model: BaseModel, exclude_unset: bool = False) -> Response:
+		return self.store_json(model.model_dump_json(exclude_unset=exclude_unset).encode())
+
+	def store_json(self, body: bytes) -> Response:
+		"""Like `store`, for a body already serialized to JSON bytes."""
+		self.body = body
+		if self.backend is not None:
+			self.backend.set(self.key, self.body, self.tags, self.versions, RESPONSE_CACHE_TTL_SECONDS)
+		return self.response()
+
+
+_backend: Optional[CacheBackend] = MemoryBackend(RESPONSE_CACHE_SIZE) if RESPONSE_CACHE else None
+
+
+def set_cache_backend(backend: Optional[CacheBackend]) -> None:
+	"""Swap the cache backend; None disables caching."""
+	global _backend
+	_backend = backend
+
+
+def get_cache_backend() -> Optional[CacheBackend]:
+	return _backend
+
+
+def entity_tags(table: str, row_id: Any) -> Tuple[str, ...]:
+	return (f"{table}:{row_id}", f"{table}:*")
+
+
+def list_tags(table: str, *extra: str) -> Tuple[str, ...]:
+	return (table, f"{table}:*") + extra
+
+
+def cached_read(request: Request, tags: Tuple[str, ...], etag: str) -> CachedRead:
+	"""Look up the response for this request's path and query string, built under validator `etag`.
+
+	The ETag comes fresh from the database, so an entry left stale by a write from another
+	process misses instead of pairing the new ETag with the old body.
+	"""
+	query = "&".join(sorted(f"{k}={v}" for k, v in request.query_params.multi_items()))
+	return CachedRead(_backend, f"{request.url.path}?{query}#{etag}", tags)
+
+
+def _row_tags(obj: Any) -> Set[str]:
+	table = getattr(obj, "__tablename__", None)
+	if table is None:
+		return set()
+	tags = {f"{table}:{getattr(obj, 'id', None)}", table}
+	# Activities and deals are also read per lead
+	lead_id = getattr(obj, "lead_id", None) if table in ("activity_logs", "deals") else None
+	if lead_id is not None:
+		tags.add(f"{table}:lead:{lead_id}")
+	return tags
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_flushed(session: Session, flush_context) -> None:
+	if _backend is None:
+		return
+	pending = session.info.setdefault("cache_tags", set())
+	for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+		pending |= _row_tags(obj)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_bulk(orm_execute_state) -> None:
+	if _backend is None or orm_execute_state.is_select:
+		return
+	table = getattr(orm_execute_state.statement, "table", None)
+	if table is not None:
+		# Rows are unknown for Core insert/update/delete, so drop everything from the table
+		orm_execute_state.session.info.setdefault("cache_tags", set()).update({table.name, f"{table.name}:*"})
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session: Session) -> None:
+	tags = session.info.pop("cache_tags", None)
+	if tags and _backend is not None:
+		_backend.invalidate(tags)
+		CACHE_INVALIDATIONS.inc(len(tags))
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back(session: Session) -> None:
+	session.info.pop("cache_tags", None)
@@ -0,0 +1,187 @@
+"""Change log and in-process fan-out for the /events/stream SSE endpoint.
+
+Writers append to `change_events` in the same transaction as the change.
+Each process runs one poller that reads new rows for all of its subscribers,
+so the database load does not grow with the number of clients. Commits made
+in this process wake the poller at once; commits from other processes are
+picked up on the next poll. SQLite serializes write transactions, so ids
+become visible in order and polling by `id > last` cannot skip a row.
+"""
+import asyncio
+import os
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import delete, event, func, insert, select
+from sqlalchemy.orm import Session
+
+from .database import SessionLocal
+from .models import ActivityLog, ChangeEvent
+
+CHANGE_FEED_POLL_SECONDS = float(os.getenv("CHANGE_FEED_POLL_SECONDS", "0.5"))
+CHANGE_FEED_QUEUE_SIZE = int(os.getenv("CHANGE_FEED_QUEUE_SIZE", "1000"))
+CHANGE_FEED_HEARTBEAT_SECONDS = float(os.getenv("CHANGE_FEED_HEARTBEAT_SECONDS", "15"))
+CHANGE_LOG_MAX_ROWS = int(os.getenv("CHANGE_LOG_MAX_ROWS", "100000"))
+CHANGE_LOG_PRUNE_SECONDS = float(os.getenv("CHANGE_LOG_PRUNE_SECONDS", "60"))
+CHANGE_FEED_BATCH_SIZE = 1000
+
+Change = Dict[str, Any]
+
+
+def record_changes(db: Session, events: List[Tuple[str, str, Dict[str, Any]]]) -> None:
+	"""Append (event, entity, payload) rows to the change log; the caller commits."""
+	if not events:
+		return
+	now = datetime.utcnow()
+	db.execute(insert(ChangeEvent), [
+		{"event": name, "entity": entity, "payload": payload, "created_at": now}
+		for name, entity, payload in events
+	])
+	db.info["changes_recorded"] = True
+
+
+def activity_change(activity: ActivityLog) -> Tuple[str, str, Dict[str, Any]]:
+	"""The change event for a flushed activity."""
+	return ("activity", "lead", {
+		"lead_id": activity.lead_id,
+		"activity_id": activity.id,
+		"activity_type": activity.activity_type.value,
+	})
+
+
+@event.listens_for(Session, "after_commit")
+def _wake_feed(session: Session) -> None:
+	if session.info.pop("changes_recorded", False):
+		get_change_feed().notify()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changes(session: Session) -> None:
+	session.info.pop("changes_recorded", None)
+
+
+def _as_change(row: Any) -> Change:
+	return {
+		"id": row.id,
+		"event": row.event,
+		"entity": row.entity,
+		"payload": row.payload,
+		"created_at": row.created_at.isoformat(),
+	}
+
+
+def read_changes(after_id: int, limit: int = CHANGE_FEED_BATCH_SIZE) -> List[Change]:
+	with SessionLocal() as db:
+		rows = db.execute(
+			select(ChangeEvent.id, ChangeEvent.event, ChangeEvent.entity, ChangeEvent.payload, ChangeEvent.created_at)
+			.where(ChangeEvent.id > after_id)
+			.order_by(ChangeEvent.id)
+			.limit(limit)
+		).all()
+	return [_as_change(row) for row in rows]
+
+
+def change_log_bounds() -> Tuple[Optional[int], Optional[int]]:
+	"""(oldest, newest) retained change ids."""
+	with SessionLocal() as db:
+		return tuple(db.execute(select(func.min(ChangeEvent.id), func.max(ChangeEvent.id))).one())
+
+
+def prune_change_log() -> None:
+	"""Keep only the newest CHANGE_LOG_MAX_ROWS entries."""
+	with SessionLocal() as db:
+		newest = db.execute(select(func.max(ChangeEvent.id))).scalar()
+		if newest is not None and newest > CHANGE_LOG_MAX_ROWS:
+			db.execute(delete(ChangeEvent).where(ChangeEvent.id <= newest - CHANGE_LOG_MAX_ROWS))
+			db.commit()
+
+
+@dataclass(eq=False)
+class Subscription:
+	entities: Set[str] = field(default_factory=set)
+	events: Set[str] = field(default_factory=set)
+	queue: "asyncio.Queue[Change]" = field(default_factory=lambda: asyncio.Queue(CHANGE_FEED_QUEUE_SIZE))
+	# Set when the client fell too far behind; it should reconnect with Last-Event-ID
+	overflowed: bool = False
+
+	def wants(self, change: Change) -> bool:
+		return (not self.entities or change["entity"] in self.entities) and (not self.events or change["event"] in self.events)
+
+
+class ChangeFeed:
+	def __init__(self):
+		self._subscribers: Set[Subscription] = set()
+		self._loop: Optional[asyncio.AbstractEventLoop] = None
+		self._task: Optional[asyncio.Task] = None
+		self._wakeup: Optional[asyncio.Event] = None
+		self._last_id = 0
+
+	async def subscribe(self, entities: Set[str], events: Set[str]) -> Subscription:
+		await self._ensure_running()
+		sub = Subscription(entities=entities, events=events)
+		self._subscribers.add(sub)
+		return sub
+
+	def unsubscribe(self, sub: Subscription) -> None:
+		self._subscribers.discard(sub)
+
+	def notify(self) -> None:
+		"""Wake the poller; safe to call from any thread."""
+		loop, wakeup = self._loop, self._wakeup
+		if loop is not None and wakeup is not None and not loop.is_closed():
+			loop.call_soon_threadsafe(wakeup.set)
+
+	async def _ensure_running(self) -> None:
+		loop = asyncio.get_running_loop()
+		if self._task is not None and not self._task.done() and self._loop is loop:
+			return
+		_, newest = await asyncio.to_thread(change_log_bounds)
+		if self._task is not None and not self._task.done() and self._loop is loop:
+			# Another subscriber started the poller while we were reading
+			return
+		self._loop = loop
+		self._wakeup = asyncio.Event()
+		self._last_id = newest or 0
+		self._task = loop.create_task(self._run())
+
+	async def _run(self) -> None:
+		next_prune = time.monotonic() + CHANGE_LOG_PRUNE_SECONDS
+		while True:
+			try:
+				await asyncio.wait_for(self._wakeup.wait(), CHANGE_FEED_POLL_SECONDS)
+			except asyncio.TimeoutError:
+				pass
+			self._wakeup.clear()
+			try:
+				if self._subscribers:
+					await self._poll()
+				if time.monotonic() >= next_prune:
+					next_prune = time.monotonic() + CHANGE_LOG_PRUNE_SECONDS
+					await asyncio.to_thread(prune_change_log)
+			except Exception:
+				# The next wakeup retries from the same position
+				await asyncio.sleep(CHANGE_FEED_POLL_SECONDS)
+
+	async def _poll(self) -> None:
+		while True:
+			changes = await asyncio.to_thread(read_changes, self._last_id)
+			for change in changes:
+				self._last_id = change["id"]
+				for sub in list(self._subscribers):
+					if sub.overflowed or not sub.wants(change):
+						continue
+					try:
+						sub.queue.put_nowait(change)
+					except asyncio.QueueFull:
+						sub.overflowed = True
+			if len(changes) < CHANGE_FEED_BATCH_SIZE:
+				return
+
+
+_feed = ChangeFeed()
+
+
+def get_change_feed() -> ChangeFeed:
+	return _feed
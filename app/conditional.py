@@ -0,0 +1,89 @@
+"""Weak ETag / Last-Modified validators and 304 responses for GET endpoints.
+
+Validators come from cheap indexed queries instead of the response body. An
+entity uses its own `updated_at` for both its ETag and Last-Modified. A list,
+or an entity embedding a collection, gets only an ETag, built from the max
+timestamp and row count (so deletes also change it) plus the query string; a
+delete leaves the max timestamp alone, so a Last-Modified would miss it. A
+matching `If-None-Match` (or, without one, `If-Modified-Since` on a plain
+entity) returns 304 before anything is loaded or serialized.
+"""
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Optional
+
+from fastapi import Request, Response
+from sqlalchemy import Select, func, select
+
+
+def entity_stmt(model: Any, row_id: Any) -> Select:
+	return select(model.updated_at).where(model.id == row_id)
+
+
+def list_stmt(model: Any, column: Any = None) -> Select:
+	"""Max of `column` (default `updated_at`) and row count; add `.where()` to scope it."""
+	column = model.updated_at if column is None else column
+	return select(func.max(column), func.count())
+
+
+class Validators:
+	def __init__(self, request: Request, key: str, modified: Optional[datetime]):
+		self.request = request
+		self.etag = f'W/"{hashlib.sha1(key.encode()).hexdigest()[:20]}"'
+		# HTTP dates have second precision; stored timestamps are naive UTC
+		self.last_modified = modified.replace(microsecond=0, tzinfo=timezone.utc) if modified else None
+
+	@classmethod
+	def for_entity(cls, request: Request, table: str, row_id: Any, updated_at: Optional[datetime]) -> Optional["Validators"]:
+		"""None when the row does not exist, so the endpoint can return its usual 404."""
+		if updated_at is None:
+			return None
+		return cls(request, f"{table}:{row_id}:{updated_at.isoformat()}", updated_at)
+
+	@classmethod
+	def for_expanded(cls, request: Request, table: str, row_id: Any, row: Optional[Any]) -> Optional["Validators"]:
+		"""For an entity embedding related rows: `row` holds every stamp and count the body depends on.
+
+		None when the row does not exist. The query string is part of the key, since it picks what is embedded.
+		"""
+		if row is None:
+			return None
+		stamps = [value for value in row if isinstance(value, datetime)]
+		# An embedded collection's row count catches deletes that no timestamp reflects, so only the ETag can
+		embeds_collection = any(isinstance(value, int) for value in row)
+		state = ":".join(value.isoformat() if isinstance(value, datetime) else str(value) for value in row)
+		return cls(request, f"{table}:{row_id}?{request.url.query}:{state}", max(stamps) if stamps and not embeds_collection else None)
+
+	@classmethod
+	def for_list(cls, request: Request, table: str, row: Any) -> "Validators":
+		"""ETag only: a delete leaves the newest timestamp alone, so Last-Modified could not reveal it."""
+		modified, count = row
+		stamp = modified.isoformat() if modified else ""
+		return cls(request, f"{table}:{request.url.path}?{request.url.query}:{stamp}:{count}", None)
+
+	def _matches(self) -> bool:
+		if_none_match = self.request.headers.get("if-none-match")
+		if if_none_match is not None:
+			# Weak comparison: ignore W/ prefixes
+			tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+			return "*" in tags or self.etag.removeprefix("W/") in tags
+		if_modified_since = self.request.headers.get("if-modified-since")
+		if if_modified_since and self.last_modified is not None:
+			try:
+				return self.last_modified <= parsedate_to_datetime(if_modified_since)
+			except (TypeError, ValueError):
+				return False
+		return False
+
+	def not_modified(self) -> Optional[Response]:
+		"""A 304 response when the client's copy is current, else None."""
+		if not self._matches():
+			return None
+		return self.apply(Response(status_code=304))
+
+	def apply(self, response: Response) -> Response:
+		response.headers["ETag"] = self.etag
+		if self.last_modified is not None:
+			response.headers["Last-Modified"] = format_datetime(self.last_modified, usegmt=True)
+		return response
@@ -1,12 +1,153 @@
 import os
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+import re
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import TextClause, create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from .instrumentation import METRICS, Gauge
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./crm.db")
 
-connect_args = {"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {}
-engine = create_engine(DATABASE_URL, connect_args=connect_args)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# "production" enables WAL, tuned pragmas and separate writer / read-only reader pools; "default" is plain SQLite
+SQLITE_PROFILE = os.getenv("SQLITE_PROFILE", "production")
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_READ_POOL_SIZE = int(os.getenv("SQLITE_READ_POOL_SIZE", "8"))
+# Sync sessions hold their reader until the response is serialized on the threadpool (40 threads), so the
+# reader pool must be able to grow to that size or waiting threads starve serialization
+SQLITE_READ_MAX_OVERFLOW = int(os.getenv("SQLITE_READ_MAX_OVERFLOW", "32"))
+
+
+def _apply_pragmas(dbapi_conn, read_only: bool) -> None:
+	cursor = dbapi_conn.cursor()
+	if not read_only:
+		# Persistent on the database file, so readers pick it up without switching modes themselves
+		cursor.execute("PRAGMA journal_mode=WAL")
+	cursor.execute("PRAGMA synchronous=NORMAL")
+	cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+	cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}")
+	cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+	cursor.execute("PRAGMA temp_store=MEMORY")
+	if read_only:
+		cursor.execute("PRAGMA query_only=ON")
+	cursor.close()
+
+
+def create_engines(url: str, profile: str = SQLITE_PROFILE, is_async: bool = False) -> Tuple[Any, Any]:
+	"""Return (write_engine, read_engine); they are the same engine unless the SQLite production profile applies.
+
+	With `is_async` the engines are AsyncEngines using the aiosqlite driver.
+	"""
+	factory = create_engine
+	if is_async:
+		factory = create_async_engine
+		url = url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+	if not url.startswith("sqlite"):
+		write_engine = factory(url)
+		return write_engine, write_engine
+	connect_args = {"check_same_thread": False, "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000}
+	in_memory = url.split("://", 1)[1] in ("", "/:memory:")
+	if profile != "production" or in_memory:
+		write_engine = factory(url, connect_args=connect_args)
+		return write_engine, write_engine
+
+	# Writers are pooled like readers: funnelling them through one connection made every request queue for it,
+	# and SQLite's own lock already serializes the commits
+	pool_args: Dict[str, Any] = {"poolclass": AsyncAdaptedQueuePool} if is_async else {}
+	write_engine = factory(url, connect_args=connect_args, **pool_args)
+	read_engine = factory(url, connect_args=connect_args, pool_size=SQLITE_READ_POOL_SIZE, max_overflow=SQLITE_READ_MAX_OVERFLOW, **pool_args)
+	sync_write = write_engine.sync_engine if is_async else write_engine
+	sync_read = read_engine.sync_engine if is_async else read_engine
+
+	@event.listens_for(sync_write, "connect")
+	def _on_write_connect(dbapi_conn, record):
+		# SQLAlchemy emits BEGIN itself so SAVEPOINTs work; pysqlite's implicit transactions mishandle them
+		dbapi_conn.isolation_level = None
+		_apply_pragmas(dbapi_conn, read_only=False)
+
+	@event.listens_for(sync_write, "begin")
+	def _on_write_begin(conn):
+		# Deferred: the write lock is taken by the first write, not held across the Python work leading up to it.
+		# Sessions only move to the writer on their first write, so the lock upgrade never follows a stale read.
+		conn.exec_driver_sql("BEGIN")
+
+	@event.listens_for(sync_read, "connect")
+	def _on_read_connect(dbapi_conn, record):
+		_apply_pragmas(dbapi_conn, read_only=True)
+
+	return write_engine, read_engine
+
+
+engine, read_engine = create_engines(DATABASE_URL)
+
+
+# Raw SQL carries no statement kind, so plain SELECTs and CTE queries (WITH without DML) are recognized by text
+_READ_SQL = re.compile(r"\s*(SELECT\b|WITH\b(?!.*\b(INSERT|UPDATE|DELETE|REPLACE)\b))", re.IGNORECASE | re.DOTALL)
+
+
+def is_read(clause: Any) -> bool:
+	"""Whether a statement only reads: any select construct (including unions and text().columns()), or SELECT text."""
+	if isinstance(clause, TextClause):
+		return _READ_SQL.match(clause.text) is not None
+	return bool(getattr(clause, "is_select", False))
+
+
+# Sessions pinned to the writer are those holding or queued for SQLite's write lock
+WRITER_SESSIONS = Gauge("db_writer_sessions", "Sessions whose open transaction has written, i.e. holding or waiting for the write lock.")
+METRICS.append(WRITER_SESSIONS)
+
+
+def _pin_writer(session: Session) -> None:
+	if not session.info.get("writer"):
+		session.info["writer"] = True
+		WRITER_SESSIONS.inc()
+
+
+class RoutingSession(Session):
+	"""Sends reads to the read pool until the transaction writes, then pins it to the writer."""
+
+	write_bind: Engine = engine
+	read_bind: Engine = read_engine
+
+	def get_bind(self, mapper=None, clause=None, **kw):
+		if clause is not None and not is_read(clause):
+			_pin_writer(self)
+		if self.info.get("writer") or self.read_bind is self.write_bind:
+			return self.write_bind
+		return self.read_bind
+
+
+@event.listens_for(RoutingSession, "before_flush")
+def _pin_flush_to_writer(session, flush_context, instances):
+	_pin_writer(session)
+
+
+@event.listens_for(RoutingSession, "after_transaction_end")
+def _unpin_writer(session, transaction):
+	if transaction.parent is None and session.info.pop("writer", None):
+		WRITER_SESSIONS.dec()
+
+
+SessionLocal = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False)
+
+# "sync" serves the API from the threadpool with blocking sessions; "async" uses AsyncSession over aiosqlite
+DB_MODE = os.getenv("DB_MODE", "sync")
+AsyncSessionLocal: Optional[async_sessionmaker] = None
+
+if DB_MODE == "async":
+	async_engine, async_read_engine = create_engines(DATABASE_URL, is_async=True)
+
+	class AsyncRoutingSession(RoutingSession):
+		write_bind = async_engine.sync_engine
+		read_bind = async_read_engine.sync_engine
+
+	# expire_on_commit=False: expired attributes cannot be lazy-loaded while serializing an async response
+	AsyncSessionLocal = async_sessionmaker(sync_session_class=AsyncRoutingSession, autoflush=False, expire_on_commit=False)
 
 Base = declarative_base()
 
@@ -17,3 +158,9 @@ def get_db():
 		yield db
 	finally:
 		db.close()
+
+
+async def get_async_db():
+	"""FastAPI dependency that yields an AsyncSession (DB_MODE=async only)."""
+	async with AsyncSessionLocal() as db:
+		yield db
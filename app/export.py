@@ -0,0 +1,89 @@
+import csv
+import enum
+import io
+import json
+import os
+from datetime import datetime
+from typing import Any, Iterator, List, Optional, Type
+
+from fastapi import Query
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy import Select, select
+
+from .database import SessionLocal
+
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+
+class ExportFormat(str, enum.Enum):
+	ndjson = "ndjson"
+	csv = "csv"
+
+
+class ExportParams:
+	"""FastAPI dependency with the format and `updated_at` window shared by export endpoints."""
+
+	def __init__(
+		self,
+		format: ExportFormat = Query(default=ExportFormat.ndjson),
+		updated_since: Optional[datetime] = Query(default=None),
+		updated_until: Optional[datetime] = Query(default=None),
+	):
+		self.format = format
+		self.updated_since = updated_since
+		self.updated_until = updated_until
+
+
+def export_select(model: Any, schema: Type[BaseModel], params: ExportParams) -> Select:
+	"""Select the schema's columns as plain rows, filtered by the `updated_at` window."""
+	stmt = select(*[getattr(model, name) for name in schema.model_fields])
+	if params.updated_since is not None:
+		stmt = stmt.where(model.updated_at >= params.updated_since)
+	if params.updated_until is not None:
+		stmt = stmt.where(model.updated_at < params.updated_until)
+	return stmt.order_by(model.updated_at, model.id)
+
+
+def _json_default(value: Any) -> Any:
+	if isinstance(value, datetime):
+		return value.isoformat()
+	raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def _csv_value(value: Any) -> Any:
+	if isinstance(value, enum.Enum):
+		return value.value
+	if isinstance(value, datetime):
+		return value.isoformat()
+	return "" if value is None else value
+
+
+def _iter_export(stmt: Select, fields: List[str], fmt: ExportFormat) -> Iterator[str]:
+	# Own session: the request's get_db session is closed before a streamed body is sent
+	with SessionLocal() as db:
+		result = db.execute(stmt.execution_options(yield_per=EXPORT_BATCH_SIZE))
+		if fmt == ExportFormat.csv:
+			buffer = io.StringIO()
+			writer = csv.writer(buffer)
+			writer.writerow(fields)
+			for rows in result.partitions():
+				writer.writerows([_csv_value(value) for value in row] for row in rows)
+				yield buffer.getvalue()
+				buffer.seek(0)
+				buffer.truncate()
+			if buffer.tell():
+				yield buffer.getvalue()
+		else:
+			for rows in result.partitions():
+				yield "".join(json.dumps(dict(zip(fields, row)), default=_json_default) + "\n" for row in rows)
+
+
+def export_response(stmt: Select, schema: Type[BaseModel], fmt: ExportFormat, name: str) -> StreamingResponse:
+	fields = list(schema.model_fields)
+	media_type = "text/csv" if fmt == ExportFormat.csv else "application/x-ndjson"
+	return StreamingResponse(
+		_iter_export(stmt, fields, fmt),
+		media_type=media_type,
+		headers={"Content-Disposition": f'attachment; filename="{name}.{fmt.value}"'},
+	)
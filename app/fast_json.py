@@ -0,0 +1,39 @@
+"""Serialize list pages straight from Core rows, skipping ORM hydration.
+
+`row_select` picks a schema's columns as plain tuples and `page_json` turns a
+page of them into the same JSON bytes the `response_model` path produces. With
+orjson installed (`pip install orjson`) rows are dumped directly; otherwise a
+cached pydantic TypeAdapter validates the row mappings and dumps them.
+"""
+import functools
+from typing import Any, Dict, Type
+
+from pydantic import BaseModel, TypeAdapter
+from sqlalchemy import Select, select
+
+from .schemas import Page
+
+try:
+	import orjson
+except ImportError:
+	orjson = None
+
+
+def row_select(model: Any, schema: Type[BaseModel]) -> Select:
+	"""Select the schema's columns of `model` as plain rows."""
+	return select(*[getattr(model, name) for name in schema.model_fields])
+
+
+@functools.lru_cache(maxsize=None)
+def _page_adapter(schema: Type[BaseModel]) -> TypeAdapter:
+	return TypeAdapter(Page[schema])
+
+
+def page_json(schema: Type[BaseModel], page: Dict[str, Any]) -> bytes:
+	"""JSON bytes of a `Page[schema]` whose items are rows from `row_select(model, schema)`."""
+	fields = list(schema.model_fields)
+	body = {"items": [dict(zip(fields, row)) for row in page["items"]], "next_cursor": page["next_cursor"]}
+	if orjson is not None:
+		return orjson.dumps(body)
+	adapter = _page_adapter(schema)
+	return adapter.dump_json(adapter.validate_python(body))
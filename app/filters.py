@@ -0,0 +1,14 @@
+"""Query-param filters shared by the sync and async routers."""
+from typing import Any, List, Optional
+
+from . import models
+
+
+def deal_filters(lead_id: Optional[str], stage: Optional[models.DealStage]) -> List[Any]:
+	"""WHERE clauses for `GET /deals/?lead_id=&stage=`; served by `ix_deals_lead_id` and `ix_deals_stage_created_at_id`."""
+	filters: List[Any] = []
+	if lead_id is not None:
+		filters.append(models.Deal.lead_id == lead_id)
+	if stage is not None:
+		filters.append(models.Deal.stage == stage)
+	return filters
@@ -0,0 +1,193 @@
+"""Per-request query counting, slow-query logging and Prometheus metrics.
+
+SQLAlchemy cursor events feed every active `Stats` collector in the current
+context: one per HTTP request (set by `QueryStatsMiddleware`) and one per
+automation action (`track_action`). Collectors are plain objects shared by
+reference, so queries run on the threadpool still reach the request's stats.
+"""
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+
+logger = logging.getLogger(__name__)
+
+# Adds X-DB-* headers to every response; leave off in production
+DEBUG_QUERY_HEADERS = os.getenv("DEBUG_QUERY_HEADERS", "0") == "1"
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "100"))
+SLOW_QUERIES_KEPT = 5
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50, 100)
+
+
+@dataclass
+class Stats:
+	queries: int = 0
+	db_seconds: float = 0.0
+	slow: List[Tuple[float, str]] = field(default_factory=list)
+
+
+_active: ContextVar[Tuple[Stats, ...]] = ContextVar("query_stats", default=())
+
+
+class Histogram:
+	"""Minimal thread-safe Prometheus histogram with labels."""
+
+	def __init__(self, name: str, help: str, labelnames: Sequence[str], buckets: Sequence[float]):
+		self.name = name
+		self.help = help
+		self.labelnames = tuple(labelnames)
+		self.buckets = tuple(buckets)
+		self._series: Dict[Tuple[str, ...], List[float]] = {}
+		self._lock = threading.Lock()
+
+	def observe(self, labels: Tuple[str, ...], value: float) -> None:
+		with self._lock:
+			# Per-bucket counts, then sum and count
+			series = self._series.setdefault(labels, [0.0] * (len(self.buckets) + 2))
+			for i, bound in enumerate(self.buckets):
+				if value <= bound:
+					series[i] += 1
+			series[-2] += value
+			series[-1] += 1
+
+	def render(self) -> List[str]:
+		lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+		with self._lock:
+			items = sorted(self._series.items())
+		for labels, series in items:
+			pairs = [f'{name}="{value}"' for name, value in zip(self.labelnames, labels)]
+			bounds = [f"{bound:g}" for bound in self.buckets] + ["+Inf"]
+			for bound, count in zip(bounds, series[:-2] + series[-1:]):
+				le = ",".join(pairs + [f'le="{bound}"'])
+				lines.append(f"{self.name}_bucket{{{le}}} {count:g}")
+			suffix = f"{{{','.join(pairs)}}}" if pairs else ""
+			lines.append(f"{self.name}_sum{suffix} {series[-2]:g}")
+			lines.append(f"{self.name}_count{suffix} {series[-1]:g}")
+		return lines
+
+
+class Counter:
+	def __init__(self, name: str, help: str):
+		self.name = name
+		self.help = help
+		self.value = 0
+		self._lock = threading.Lock()
+
+	def inc(self, amount: int = 1) -> None:
+		with self._lock:
+			self.value += amount
+
+	def render(self) -> List[str]:
+		return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter", f"{self.name} {self.value}"]
+
+
+class Gauge(Counter):
+	"""A value that goes up and down, e.g. requests in flight."""
+
+	def dec(self, amount: int = 1) -> None:
+		self.inc(-amount)
+
+	def render(self) -> List[str]:
+		return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge", f"{self.name} {self.value}"]
+
+
+REQUEST_SECONDS = Histogram("http_request_duration_seconds", "HTTP request latency.", ("method", "route", "status"), LATENCY_BUCKETS)
+REQUEST_QUERIES = Histogram("http_request_db_queries", "DB queries per HTTP request.", ("method", "route"), QUERY_COUNT_BUCKETS)
+REQUEST_DB_SECONDS = Histogram("http_request_db_seconds", "DB time per HTTP request.", ("method", "route"), LATENCY_BUCKETS)
+ACTION_SECONDS = Histogram("automation_action_duration_seconds", "Automation action latency.", ("action_type",), LATENCY_BUCKETS)
+ACTION_QUERIES = Histogram("automation_action_db_queries", "DB queries per automation action.", ("action_type",), QUERY_COUNT_BUCKETS)
+SLOW_QUERIES = Counter("db_slow_queries_total", "Statements slower than SLOW_QUERY_MS.")
+
+METRICS = [REQUEST_SECONDS, REQUEST_QUERIES, REQUEST_DB_SECONDS, ACTION_SECONDS, ACTION_QUERIES, SLOW_QUERIES]
+
+
+def render_metrics() -> str:
+	return "\n".join(line for metric in METRICS for line in metric.render()) + "\n"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+	conn.info.setdefault("query_started", []).append((cursor, time.perf_counter()))
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+	started = conn.info.get("query_started")
+	if not started:
+		return
+	elapsed = time.perf_counter() - started.pop()[1]
+	slow = elapsed * 1000 >= SLOW_QUERY_MS
+	if slow:
+		SLOW_QUERIES.inc()
+		logger.warning("Slow query (%.1f ms): %s", elapsed * 1000, statement)
+	for stats in _active.get():
+		stats.queries += 1
+		stats.db_seconds += elapsed
+		if slow and len(stats.slow) < SLOW_QUERIES_KEPT:
+			stats.slow.append((elapsed, statement))
+
+
+def _handle_error(context) -> None:
+	# A failed statement never reaches after_cursor_execute; drop its start time so the stack stays paired
+	execution = context.execution_context
+	started = context.connection.info.get("query_started") if context.connection is not None else None
+	if started and execution is not None and started[-1][0] is execution.cursor:
+		started.pop()
+
+
+def instrument_engine(engine: Engine) -> None:
+	"""Attach the cursor listeners to a sync engine (use `.sync_engine` for an AsyncEngine)."""
+	if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+		event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+		event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+		event.listen(engine, "handle_error", _handle_error)
+
+
+@contextmanager
+def collect() -> Iterator[Stats]:
+	"""Collect queries run in this context (and threadpool calls made from it) into a new `Stats`."""
+	stats = Stats()
+	token = _active.set(_active.get() + (stats,))
+	try:
+		yield stats
+	finally:
+		_active.reset(token)
+
+
+@contextmanager
+def track_action(action_type: str) -> Iterator[None]:
+	start = time.perf_counter()
+	with collect() as stats:
+		yield
+	ACTION_SECONDS.observe((action_type,), time.perf_counter() - start)
+	ACTION_QUERIES.observe((action_type,), stats.queries)
+
+
+class QueryStatsMiddleware(BaseHTTPMiddleware):
+	"""Records latency and DB usage per route; adds X-DB-* headers when DEBUG_QUERY_HEADERS is on."""
+
+	async def dispatch(self, request: Request, call_next):
+		start = time.perf_counter()
+		with collect() as stats:
+			response = await call_next(request)
+		route = request.scope.get("route")
+		# Route templates keep label cardinality bounded
+		path = getattr(route, "path", "unmatched")
+		REQUEST_SECONDS.observe((request.method, path, str(response.status_code)), time.perf_counter() - start)
+		REQUEST_QUERIES.observe((request.method, path), stats.queries)
+		REQUEST_DB_SECONDS.observe((request.method, path), stats.db_seconds)
+		if DEBUG_QUERY_HEADERS:
+			response.headers["X-DB-Query-Count"] = str(stats.queries)
+			response.headers["X-DB-Time-Ms"] = f"{stats.db_seconds * 1000:.2f}"
+			if stats.slow:
+				response.headers["X-DB-Slow-Queries"] = str(len(stats.slow))
+		return response
@@ -0,0 +1,88 @@
+"""`GET /leads/{id}?expand=contact,deals,activities`, shared by the sync and async routers.
+
+The lead and everything it embeds load in a fixed number of queries: the lead
+joined to its contact, then one `selectinload` query each for deals and
+activities. Validators and cache tags cover the embedded rows too, so a new
+deal or activity changes the ETag and invalidates the cached body.
+"""
+from typing import Any, FrozenSet, List, Optional, Tuple
+
+from fastapi import HTTPException, Query
+from sqlalchemy import Select, func, select
+from sqlalchemy.orm import joinedload, selectinload
+
+from . import models, schemas
+from .cache import entity_tags
+
+LEAD_EXPANSIONS = ("contact", "deals", "activities")
+
+
+class LeadExpand:
+	"""FastAPI dependency parsing the comma-separated `expand` query parameter."""
+
+	def __init__(self, expand: Optional[str] = Query(default=None, description="Comma-separated: contact, deals, activities")):
+		fields = {field.strip() for field in (expand or "").split(",") if field.strip()}
+		unknown = fields - set(LEAD_EXPANSIONS)
+		if unknown:
+			raise HTTPException(status_code=400, detail=f"Unknown expand field(s): {', '.join(sorted(unknown))}")
+		self.fields: FrozenSet[str] = frozenset(fields)
+
+
+def validator_stmt(lead_id: str, expand: LeadExpand) -> Select:
+	"""The lead's `updated_at` and `contact_id`, then the newest timestamp and row count of each expanded relation."""
+	lead = models.Lead
+	columns: List[Any] = [lead.updated_at, lead.contact_id]
+	if "contact" in expand.fields:
+		columns.append(select(models.Contact.updated_at).where(models.Contact.id == lead.contact_id).scalar_subquery())
+	if "deals" in expand.fields:
+		deal = models.Deal
+		columns += [
+			select(func.max(deal.updated_at)).where(deal.lead_id == lead.id).scalar_subquery(),
+			select(func.count()).where(deal.lead_id == lead.id).scalar_subquery(),
+		]
+	if "activities" in expand.fields:
+		activity = models.ActivityLog
+		columns += [
+			select(func.max(activity.created_at)).where(activity.lead_id == lead.id).scalar_subquery(),
+			select(func.count()).where(activity.lead_id == lead.id).scalar_subquery(),
+		]
+	return select(*columns).where(lead.id == lead_id)
+
+
+def cache_tags(lead_id: str, contact_id: str, expand: LeadExpand) -> Tuple[str, ...]:
+	tags = entity_tags("leads", lead_id)
+	if "contact" in expand.fields:
+		tags += entity_tags("contacts", contact_id)
+	if "deals" in expand.fields:
+		tags += (f"deals:lead:{lead_id}", "deals:*")
+	if "activities" in expand.fields:
+		tags += (f"activity_logs:lead:{lead_id}", "activity_logs:*")
+	return tags
+
+
+def load_stmt(lead_id: str, expand: LeadExpand) -> Select:
+	stmt = select(models.Lead).where(models.Lead.id == lead_id)
+	if "contact" in expand.fields:
+		stmt = stmt.options(joinedload(models.Lead.contact))
+	if "deals" in expand.fields:
+		stmt = stmt.options(selectinload(models.Lead.deals))
+	if "activities" in expand.fields:
+		stmt = stmt.options(selectinload(models.Lead.activities))
+	return stmt
+
+
+def _newest_first(rows: List[Any]) -> List[Any]:
+	# Same order as the paginated list endpoints
+	return sorted(rows, key=lambda row: (row.created_at, row.id), reverse=True)
+
+
+def to_schema(lead: models.Lead, expand: LeadExpand) -> schemas.LeadDetailOut:
+	"""Build the response from a lead loaded with `load_stmt`; only expanded relations are set."""
+	detail = schemas.LeadDetailOut.model_validate(schemas.LeadOut.model_validate(lead).model_dump())
+	if "contact" in expand.fields:
+		detail.contact = schemas.ContactOut.model_validate(lead.contact)
+	if "deals" in expand.fields:
+		detail.deals = [schemas.DealOut.model_validate(deal) for deal in _newest_first(lead.deals)]
+	if "activities" in expand.fields:
+		detail.activities = [schemas.ActivityOut.model_validate(activity) for activity in _newest_first(lead.activities)]
+	return detail
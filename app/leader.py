@@ -0,0 +1,71 @@
+"""DB-backed leases for electing one leader among API workers and replicas.
+
+A lease row names its holder and an expiry. Taking or renewing it is one
+conditional UPDATE (the holder is us, or the lease has expired), so any number
+of processes sharing the database agree on a single holder. Expiry uses each
+host's clock, so keep clocks in sync and the TTL well above the skew.
+"""
+import os
+import socket
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable
+
+from sqlalchemy import or_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from .models import SchedulerLease
+
+SCHEDULER_LEASE_SECONDS = float(os.getenv("SCHEDULER_LEASE_SECONDS", "90"))
+
+
+class LeaderLease:
+	def __init__(self, open_session: Callable[[], Session], name: str, ttl_seconds: float = SCHEDULER_LEASE_SECONDS):
+		self.open_session = open_session
+		self.name = name
+		self.ttl_seconds = ttl_seconds
+		self.holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+		self._held_until = 0.0
+
+	@property
+	def renew_seconds(self) -> float:
+		"""How often the holder should renew so the lease never lapses between renewals."""
+		return self.ttl_seconds / 3
+
+	def acquire(self) -> bool:
+		"""Take the lease if it is free or expired, or renew it if we hold it; True while we hold it."""
+		now, started = datetime.utcnow(), time.monotonic()
+		with self.open_session() as db:
+			claimed = db.execute(
+				update(SchedulerLease)
+				.where(SchedulerLease.name == self.name, or_(SchedulerLease.holder == self.holder, SchedulerLease.expires_at < now))
+				.values(holder=self.holder, expires_at=now + timedelta(seconds=self.ttl_seconds))
+			).rowcount
+			if not claimed and db.get(SchedulerLease, self.name) is None:
+				db.add(SchedulerLease(name=self.name, holder=self.holder, expires_at=now + timedelta(seconds=self.ttl_seconds)))
+				claimed = 1
+			try:
+				db.commit()
+			except IntegrityError:
+				# Another process created the row first
+				db.rollback()
+				claimed = 0
+		self._held_until = started + self.ttl_seconds if claimed else 0.0
+		return bool(claimed)
+
+	def held(self) -> bool:
+		"""Whether the last acquire succeeded and its TTL has not run out; no database round trip."""
+		return time.monotonic() < self._held_until
+
+	def release(self) -> None:
+		"""Expire the lease now if we hold it, so another process takes over without waiting for the TTL."""
+		self._held_until = 0.0
+		with self.open_session() as db:
+			db.execute(
+				update(SchedulerLease)
+				.where(SchedulerLease.name == self.name, SchedulerLease.holder == self.holder)
+				.values(expires_at=datetime.utcnow())
+			)
+			db.commit()
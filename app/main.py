@@ -1,12 +1,21 @@
+import atexit
+
 from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
 
-from .database import Base, engine, get_db, SessionLocal
+from . import database
+from .database import DB_MODE, engine, get_db, SessionLocal
 from . import models
+from .instrumentation import QueryStatsMiddleware, instrument_engine
+from .rate_limit import WriteLimitMiddleware
 from .auth import issue_token, get_current_user
-from .automation_engine import start_scheduler
+from .migrations import run_migrations
+from .automation_engine import SCHEDULER_MODE, start_scheduler, stop_scheduler, process_event, warn_if_unscheduled
+from .outbox import start_event_workers
+from .webhooks import start_webhook_delivery
 
-from .routers import contacts, leads, deals, automation, health
+from .routers import contacts, leads, deals, automation, events, health, stats
+from .routers import async_contacts, async_leads, async_deals, async_automation
 
 app = FastAPI(title="Mini CRM", version="0.1.0")
 
@@ -18,12 +27,31 @@ app.add_middleware(
 	,
 	allow_headers=["*"],
 )
+# Added before the stats middleware so rejected writes still show up in request metrics
+app.add_middleware(WriteLimitMiddleware)
+app.add_middleware(QueryStatsMiddleware)
+
+# Count queries and DB time on every engine the app uses
+for sync_engine in {database.engine, database.read_engine}:
+	instrument_engine(sync_engine)
+if DB_MODE == "async":
+	instrument_engine(database.async_engine.sync_engine)
+	instrument_engine(database.async_read_engine.sync_engine)
 
-# Create tables
-Base.metadata.create_all(bind=engine)
+# Create or upgrade tables
+run_migrations(engine)
 
-# Start scheduler
-start_scheduler(lambda: SessionLocal())
+# Start batched webhook log writer and automation outbox workers
+start_webhook_delivery(lambda: SessionLocal())
+start_event_workers(lambda: SessionLocal(), process_event)
+
+# Start scheduler unless it runs as its own process (python -m app.scheduler);
+# registered after the log writer so it stops first
+if SCHEDULER_MODE == "embedded":
+	start_scheduler(lambda: SessionLocal())
+	atexit.register(stop_scheduler)
+else:
+	warn_if_unscheduled(lambda: SessionLocal())
 
 # Root
 @app.get("/")
@@ -36,8 +64,19 @@ async def auth_token(resp = Depends(issue_token)):
 	return resp
 
 # Routers (protected)
+if DB_MODE == "async":
+	crud_routers = {"contacts": async_contacts.router, "leads": async_leads.router, "deals": async_deals.router, "automation": async_automation.router}
+else:
+	crud_routers = {"contacts": contacts.router, "leads": leads.router, "deals": deals.router, "automation": automation.router}
+
 app.include_router(health.router, tags=["health"])
-app.include_router(contacts.router, prefix="/contacts", tags=["contacts"], dependencies=[Depends(get_current_user)])
-app.include_router(leads.router, prefix="/leads", tags=["leads"], dependencies=[Depends(get_current_user)])
-app.include_router(deals.router, prefix="/deals", tags=["deals"], dependencies=[Depends(get_current_user)])
-app.include_router(automation.router, prefix="/automation", tags=["automation"], dependencies=[Depends(get_current_user)])
+app.include_router(stats.router, tags=["stats"], dependencies=[Depends(get_current_user)])
+app.include_router(events.router, tags=["events"], dependencies=[Depends(get_current_user)])
+# Import/export and search routes have static paths, so they must be registered before /{id} routes
+app.include_router(contacts.io_router, prefix="/contacts", tags=["contacts"], dependencies=[Depends(get_current_user)])
+app.include_router(leads.io_router, prefix="/leads", tags=["leads"], dependencies=[Depends(get_current_user)])
+app.include_router(deals.io_router, prefix="/deals", tags=["deals"], dependencies=[Depends(get_current_user)])
+app.include_router(crud_routers["contacts"], prefix="/contacts", tags=["contacts"], dependencies=[Depends(get_current_user)])
+app.include_router(crud_routers["leads"], prefix="/leads", tags=["leads"], dependencies=[Depends(get_current_user)])
+app.include_router(crud_routers["deals"], prefix="/deals", tags=["deals"], dependencies=[Depends(get_current_user)])
+app.include_router(crud_routers["automation"], prefix="/automation", tags=["automation"], dependencies=[Depends(get_current_user)])
@@ -0,0 +1,182 @@
+"""Versioned schema migrations.
+
+Applied versions are recorded in `schema_migrations`. Databases created before
+migrations existed start at version 0, so every migration must be idempotent
+(create tables, columns and indexes only when missing).
+
+	python -m app.migrations
+"""
+from datetime import datetime
+from typing import Callable, List, Tuple
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect, select, text
+from sqlalchemy.engine import Connection, Engine
+
+from .database import Base, engine
+from .search import create_search_index
+from .time_wait_queue import create_time_wait_queue
+from . import models  # noqa: F401  (registers the tables on Base.metadata)
+
+_meta = MetaData()
+schema_migrations = Table(
+	"schema_migrations",
+	_meta,
+	Column("version", Integer, primary_key=True),
+	Column("name", String, nullable=False),
+	Column("applied_at", DateTime, nullable=False),
+)
+
+
+def _create_tables(conn: Connection) -> None:
+	Base.metadata.create_all(bind=conn)
+
+
+def _add_missing_columns(conn: Connection) -> None:
+	"""Add columns declared on the models but missing from existing tables."""
+	inspector = inspect(conn)
+	for table in Base.metadata.sorted_tables:
+		if not inspector.has_table(table.name):
+			continue
+		existing = {col["name"] for col in inspector.get_columns(table.name)}
+		for column in table.columns:
+			if column.name in existing:
+				continue
+			ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(conn.dialect)}"
+			if column.server_default is not None:
+				# Existing rows take the default; a NOT NULL column without one cannot be added, so stays nullable
+				if not column.nullable:
+					ddl += " NOT NULL"
+				ddl += f" DEFAULT '{column.server_default.arg}'"
+			conn.execute(text(ddl))
+
+
+def _create_indexes(conn: Connection) -> None:
+	for table in Base.metadata.sorted_tables:
+		for index in table.indexes:
+			index.create(bind=conn, checkfirst=True)
+
+
+LEAD_ROLLUP_DIMENSIONS = ("status", "source", "assigned_to")
+
+
+def _lead_rollup_sql(sign: int, row: str) -> str:
+	if sign > 0:
+		return "".join(
+			f"INSERT INTO lead_rollups (dimension, value, count) VALUES ('{dim}', {row}.{dim}, 1) "
+			f"ON CONFLICT (dimension, value) DO UPDATE SET count = count + 1;\n"
+			for dim in LEAD_ROLLUP_DIMENSIONS
+		)
+	return "".join(
+		f"UPDATE lead_rollups SET count = count - 1 WHERE dimension = '{dim}' AND value = {row}.{dim};\n"
+		for dim in LEAD_ROLLUP_DIMENSIONS
+	)
+
+
+def _deal_rollup_sql(sign: int, row: str) -> str:
+	if sign > 0:
+		return (
+			f"INSERT INTO deal_rollups (stage, currency, count, value_sum) VALUES ({row}.stage, {row}.currency, 1, {row}.value) "
+			f"ON CONFLICT (stage, currency) DO UPDATE SET count = count + 1, value_sum = value_sum + {row}.value;\n"
+		)
+	return (
+		f"UPDATE deal_rollups SET count = count - 1, value_sum = value_sum - {row}.value "
+		f"WHERE stage = {row}.stage AND currency = {row}.currency;\n"
+	)
+
+
+ROLLUP_TRIGGERS = {
+	"leads_rollup_insert": f"AFTER INSERT ON leads BEGIN\n{_lead_rollup_sql(1, 'NEW')}END",
+	"leads_rollup_delete": f"AFTER DELETE ON leads BEGIN\n{_lead_rollup_sql(-1, 'OLD')}END",
+	"leads_rollup_update": (
+		"AFTER UPDATE OF status, source, assigned_to ON leads "
+		"WHEN OLD.status IS NOT NEW.status OR OLD.source IS NOT NEW.source OR OLD.assigned_to IS NOT NEW.assigned_to BEGIN\n"
+		f"{_lead_rollup_sql(-1, 'OLD')}{_lead_rollup_sql(1, 'NEW')}END"
+	),
+	"deals_rollup_insert": f"AFTER INSERT ON deals BEGIN\n{_deal_rollup_sql(1, 'NEW')}END",
+	"deals_rollup_delete": f"AFTER DELETE ON deals BEGIN\n{_deal_rollup_sql(-1, 'OLD')}END",
+	"deals_rollup_update": (
+		"AFTER UPDATE OF stage, currency, value ON deals "
+		"WHEN OLD.stage IS NOT NEW.stage OR OLD.currency IS NOT NEW.currency OR OLD.value IS NOT NEW.value BEGIN\n"
+		f"{_deal_rollup_sql(-1, 'OLD')}{_deal_rollup_sql(1, 'NEW')}END"
+	),
+}
+
+
+def rebuild_rollups(conn: Connection) -> None:
+	"""Recompute lead_rollups and deal_rollups from the base tables."""
+	conn.execute(text("DELETE FROM lead_rollups"))
+	for dim in LEAD_ROLLUP_DIMENSIONS:
+		conn.execute(text(
+			f"INSERT INTO lead_rollups (dimension, value, count) SELECT '{dim}', {dim}, COUNT(*) FROM leads GROUP BY {dim}"
+		))
+	conn.execute(text("DELETE FROM deal_rollups"))
+	conn.execute(text(
+		"INSERT INTO deal_rollups (stage, currency, count, value_sum) "
+		"SELECT stage, currency, COUNT(*), SUM(value) FROM deals GROUP BY stage, currency"
+	))
+
+
+def _create_rollups(conn: Connection) -> None:
+	"""Create the stats rollup tables, the triggers that keep them current on every write path, and backfill."""
+	_create_tables(conn)
+	# Triggers are SQLite syntax; other databases serve /stats from the base tables
+	if conn.dialect.name != "sqlite":
+		return
+	for name, body in ROLLUP_TRIGGERS.items():
+		conn.execute(text(f"DROP TRIGGER IF EXISTS {name}"))
+		conn.execute(text(f"CREATE TRIGGER {name} {body}"))
+	rebuild_rollups(conn)
+
+
+def _create_search_index(conn: Connection) -> None:
+	_create_tables(conn)
+	create_search_index(conn)
+
+
+def _create_time_wait_queue(conn: Connection) -> None:
+	_create_tables(conn)
+	create_time_wait_queue(conn)
+
+
+def _create_batching(conn: Connection) -> None:
+	_create_tables(conn)
+	_add_missing_columns(conn)
+
+
+def _drop_time_wait_watermarks(conn: Connection) -> None:
+	# The rule scans that advanced these were replaced by the time_wait_due queue
+	conn.execute(text("DROP TABLE IF EXISTS time_wait_watermarks"))
+
+
+MIGRATIONS: List[Tuple[int, str, Callable[[Connection], None]]] = [
+	(1, "create_tables", _create_tables),
+	(2, "webhook_delivery_columns", _add_missing_columns),
+	(3, "hot_path_indexes", _create_indexes),
+	(4, "stats_rollups", _create_rollups),
+	(5, "search_index", _create_search_index),
+	(6, "change_events", _create_tables),
+	(7, "scheduler_leases", _create_tables),
+	(8, "time_wait_due_queue", _create_time_wait_queue),
+	(9, "automation_batching", _create_batching),
+	(10, "deal_stage_index", _create_indexes),
+	(11, "drop_time_wait_watermarks", _drop_time_wait_watermarks),
+]
+
+
+def run_migrations(bind: Engine = engine) -> List[int]:
+	"""Apply pending migrations in one transaction and return the versions applied."""
+	applied: List[int] = []
+	with bind.begin() as conn:
+		_meta.create_all(bind=conn)
+		done = set(conn.execute(select(schema_migrations.c.version)).scalars())
+		for version, name, migrate in MIGRATIONS:
+			if version in done:
+				continue
+			migrate(conn)
+			conn.execute(schema_migrations.insert().values(version=version, name=name, applied_at=datetime.utcnow()))
+			applied.append(version)
+	return applied
+
+
+if __name__ == "__main__":
+	print(f"Applied migrations: {run_migrations() or 'none'}")
@@ -11,6 +11,7 @@ from sqlalchemy import (
 	Enum,
 	Float,
 	ForeignKey,
+	Index,
 	Integer,
 	JSON,
 	String,
@@ -63,6 +64,19 @@ class ActionType(str, enum.Enum):
 	email = "email"
 
 
+class WebhookDeliveryStatus(str, enum.Enum):
+	delivered = "delivered"
+	failed = "failed"
+	dead_letter = "dead_letter"
+
+
+class EventStatus(str, enum.Enum):
+	pending = "pending"
+	processing = "processing"
+	done = "done"
+	failed = "failed"
+
+
 def generate_uuid_str() -> str:
 	return str(uuid.uuid4())
 
@@ -80,6 +94,11 @@ class Contact(Base):
 
 	leads = relationship("Lead", back_populates="contact", cascade="all, delete-orphan")
 
+	__table_args__ = (
+		Index("ix_contacts_created_at_id", "created_at", "id"),
+		Index("ix_contacts_updated_at_id", "updated_at", "id"),
+	)
+
 
 class Lead(Base):
 	__tablename__ = "leads"
@@ -97,6 +116,15 @@ class Lead(Base):
 	deals = relationship("Deal", back_populates="lead", cascade="all, delete-orphan")
 	activities = relationship("ActivityLog", back_populates="lead", cascade="all, delete-orphan")
 
+	__table_args__ = (
+		Index("ix_leads_created_at_id", "created_at", "id"),
+		Index("ix_leads_status_created_at_id", "status", "created_at", "id"),
+		Index("ix_leads_last_touch_at", "last_touch_at"),
+		Index("ix_leads_status_last_touch_at", "status", "last_touch_at"),
+		Index("ix_leads_contact_id", "contact_id"),
+		Index("ix_leads_updated_at_id", "updated_at", "id"),
+	)
+
 
 class Deal(Base):
 	__tablename__ = "deals"
@@ -115,6 +143,10 @@ class Deal(Base):
 
 	__table_args__ = (
 		CheckConstraint("probability >= 0 AND probability <= 100", name="probability_range"),
+		Index("ix_deals_lead_id", "lead_id"),
+		Index("ix_deals_created_at_id", "created_at", "id"),
+		Index("ix_deals_stage_created_at_id", "stage", "created_at", "id"),
+		Index("ix_deals_updated_at_id", "updated_at", "id"),
 	)
 
 
@@ -130,6 +162,10 @@ class ActivityLog(Base):
 
 	lead = relationship("Lead", back_populates="activities")
 
+	__table_args__ = (
+		Index("ix_activity_logs_lead_id_created_at_id", "lead_id", "created_at", "id"),
+	)
+
 
 class AutomationRule(Base):
 	__tablename__ = "automation_rules"
@@ -141,6 +177,9 @@ class AutomationRule(Base):
 	action_type: Mapped[ActionType] = mapped_column(Enum(ActionType), nullable=False)
 	action_payload: Mapped[dict] = mapped_column(JSON, nullable=True)
 	active: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False)
+	# Either one set collects matching events and delivers them together (see AutomationBatch)
+	batch_window_seconds: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+	batch_max_size: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
 	created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
 
 	webhook_logs = relationship("WebhookLog", back_populates="rule", cascade="all, delete-orphan")
@@ -154,6 +193,141 @@ class WebhookLog(Base):
 	request_payload: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
 	response_status: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
 	response_body: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+	delivery_status: Mapped[Optional[WebhookDeliveryStatus]] = mapped_column(Enum(WebhookDeliveryStatus), nullable=True)
+	attempts: Mapped[int] = mapped_column(Integer, default=1, server_default="1", nullable=False)
 	created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
 
 	rule = relationship("AutomationRule", back_populates="webhook_logs")
+
+	__table_args__ = (
+		Index("ix_webhook_logs_rule_id_created_at_id", "automation_rule_id", "created_at", "id"),
+	)
+
+
+class AutomationEvent(Base):
+	__tablename__ = "automation_events"
+
+	id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+	event: Mapped[str] = mapped_column(String, nullable=False)
+	entity: Mapped[str] = mapped_column(String, nullable=False)
+	payload: Mapped[dict] = mapped_column(JSON, nullable=False)
+	status: Mapped[EventStatus] = mapped_column(Enum(EventStatus), default=EventStatus.pending, nullable=False)
+	attempts: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+	last_error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+	available_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+	locked_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+	created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+	processed_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+
+	__table_args__ = (
+		Index("ix_automation_events_status_available_at", "status", "available_at"),
+	)
+
+
+class TimeWaitFiring(Base):
+	"""Last time a time_wait rule fired for a lead, keyed by the lead's last_touch_at at that moment."""
+
+	__tablename__ = "time_wait_firings"
+
+	rule_id: Mapped[int] = mapped_column(Integer, ForeignKey("automation_rules.id", ondelete="CASCADE"), primary_key=True)
+	lead_id: Mapped[str] = mapped_column(String, ForeignKey("leads.id", ondelete="CASCADE"), primary_key=True)
+	touch_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+	fired_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class TimeWaitDue(Base):
+	"""When a lead next goes stale for an active time_wait rule. Maintained by triggers."""
+
+	__tablename__ = "time_wait_due"
+
+	id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+	rule_id: Mapped[int] = mapped_column(Integer, ForeignKey("automation_rules.id", ondelete="CASCADE"), nullable=False)
+	lead_id: Mapped[str] = mapped_column(String, ForeignKey("leads.id", ondelete="CASCADE"), nullable=False)
+	due_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+	__table_args__ = (
+		Index("ix_time_wait_due_due_at", "due_at"),
+		Index("ix_time_wait_due_lead_id", "lead_id"),
+		Index("ix_time_wait_due_rule_id", "rule_id"),
+	)
+
+
+class AutomationBatch(Base):
+	"""Events a batching rule has collected but not delivered; due when its window closes or it fills up."""
+
+	__tablename__ = "automation_batches"
+
+	rule_id: Mapped[int] = mapped_column(Integer, ForeignKey("automation_rules.id", ondelete="CASCADE"), primary_key=True)
+	size: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+	due_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+	__table_args__ = (
+		Index("ix_automation_batches_due_at", "due_at"),
+	)
+
+
+class AutomationBatchItem(Base):
+	__tablename__ = "automation_batch_items"
+
+	id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+	rule_id: Mapped[int] = mapped_column(Integer, ForeignKey("automation_rules.id", ondelete="CASCADE"), nullable=False)
+	event: Mapped[str] = mapped_column(String, nullable=False)
+	entity: Mapped[str] = mapped_column(String, nullable=False)
+	payload: Mapped[dict] = mapped_column(JSON, nullable=True)
+	created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+
+	__table_args__ = (
+		Index("ix_automation_batch_items_rule_id_id", "rule_id", "id"),
+	)
+
+
+class LeadRollup(Base):
+	"""Lead count per (dimension, value); dimension is status, source or assigned_to. Maintained by triggers."""
+
+	__tablename__ = "lead_rollups"
+
+	dimension: Mapped[str] = mapped_column(String, primary_key=True)
+	value: Mapped[str] = mapped_column(String, primary_key=True)
+	count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+
+
+class DealRollup(Base):
+	"""Deal count and value sum per (stage, currency). Maintained by triggers."""
+
+	__tablename__ = "deal_rollups"
+
+	stage: Mapped[str] = mapped_column(String, primary_key=True)
+	currency: Mapped[str] = mapped_column(String, primary_key=True)
+	count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+	value_sum: Mapped[float] = mapped_column(Float, default=0, nullable=False)
+
+
+class ContactSearchDoc(Base):
+	"""Stable integer rowid of a contact in the contacts_fts index. Maintained by triggers."""
+
+	__tablename__ = "contact_search_docs"
+
+	id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+	contact_id: Mapped[str] = mapped_column(String, nullable=False, unique=True)
+
+
+class ChangeEvent(Base):
+	"""Bounded log of CRM change events streamed by /events/stream; ids order events."""
+
+	__tablename__ = "change_events"
+
+	id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+	event: Mapped[str] = mapped_column(String, nullable=False)
+	entity: Mapped[str] = mapped_column(String, nullable=False)
+	payload: Mapped[dict] = mapped_column(JSON, nullable=False)
+	created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class SchedulerLease(Base):
+	"""A named lease held by one process at a time; used to elect the scheduler leader."""
+
+	__tablename__ = "scheduler_leases"
+
+	name: Mapped[str] = mapped_column(String, primary_key=True)
+	holder: Mapped[str] = mapped_column(String, nullable=False)
+	expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
@@ -0,0 +1,212 @@
+from __future__ import annotations
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, delete, event, insert, or_, select
+from sqlalchemy.orm import Session
+
+from .models import AutomationEvent, EventStatus
+
+AUTOMATION_WORKERS = int(os.getenv("AUTOMATION_WORKERS", "4"))
+POLL_SECONDS = float(os.getenv("AUTOMATION_POLL_SECONDS", "1.0"))
+MAX_ATTEMPTS = int(os.getenv("AUTOMATION_MAX_ATTEMPTS", "5"))
+LEASE_SECONDS = int(os.getenv("AUTOMATION_LEASE_SECONDS", "300"))
+# Processed events are kept this long for debugging, then deleted; failed events are kept
+RETENTION_HOURS = float(os.getenv("AUTOMATION_EVENT_RETENTION_HOURS", "24"))
+PRUNE_SECONDS = float(os.getenv("AUTOMATION_PRUNE_SECONDS", "300"))
+PRUNE_BATCH_SIZE = 5000
+
+EventHandler = Callable[[Session, str, str, Dict[str, Any]], None]
+
+
+class OutboxWorkerPool:
+	"""Thread pool draining the `automation_events` outbox table.
+
+	Events are claimed with a conditional UPDATE so several pools (e.g. one per
+	uvicorn worker) can share a database without double-processing. Rows stuck
+	in `processing` past the lease are reclaimed, so a crash never loses events.
+	"""
+
+	def __init__(self, open_session: Callable[[], Session], handler: EventHandler, concurrency: int = AUTOMATION_WORKERS):
+		self.open_session = open_session
+		self.handler = handler
+		self.concurrency = max(1, concurrency)
+		self._wakeup = threading.Condition()
+		self._pending_signals = 0
+		self._stopping = False
+		self._threads: List[threading.Thread] = []
+		self._next_prune = time.monotonic() + PRUNE_SECONDS
+
+	def start(self) -> None:
+		for i in range(self.concurrency):
+			thread = threading.Thread(target=self._run, name=f"outbox-worker-{i}", daemon=True)
+			thread.start()
+			self._threads.append(thread)
+
+	def stop(self, timeout: float = 5.0) -> None:
+		with self._wakeup:
+			self._stopping = True
+			self._wakeup.notify_all()
+		for thread in self._threads:
+			thread.join(timeout)
+		self._threads = []
+
+	def enqueue(self, db: Session, event: str, entity: str, payload: Dict[str, Any]) -> None:
+		"""Add an event to the caller's transaction; the workers are woken once it commits."""
+		self.enqueue_many(db, [(event, entity, payload)])
+
+	def enqueue_many(self, db: Session, events: List[Tuple[str, str, Dict[str, Any]]]) -> None:
+		if not events:
+			return
+		now = datetime.utcnow()
+		db.execute(insert(AutomationEvent), [
+			{"event": event, "entity": entity, "payload": payload, "status": EventStatus.pending, "attempts": 0, "available_at": now, "created_at": now}
+			for event, entity, payload in events
+		])
+		db.info["outbox_enqueued"] = db.info.get("outbox_enqueued", 0) + len(events)
+
+	def notify(self, count: int = 1) -> None:
+		with self._wakeup:
+			self._pending_signals += count
+			self._wakeup.notify(count)
+
+	def _run(self) -> None:
+		while not self._stopping:
+			try:
+				self._prune_if_due()
+				processed = self._process_next()
+			except Exception:
+				processed = False
+			if processed:
+				continue
+			with self._wakeup:
+				if not self._pending_signals and not self._stopping:
+					self._wakeup.wait(POLL_SECONDS)
+				self._pending_signals = max(0, self._pending_signals - 1)
+
+	def _prune_if_due(self) -> None:
+		# Whichever worker gets here first after the interval prunes; the others carry on
+		with self._wakeup:
+			if time.monotonic() < self._next_prune:
+				return
+			self._next_prune = time.monotonic() + PRUNE_SECONDS
+		with self.open_session() as db:
+			prune_outbox(db)
+
+	def _process_next(self) -> bool:
+		with self.open_session() as db:
+			event = self._claim(db)
+			if event is None:
+				return False
+			try:
+				self.handler(db, event.event, event.entity, event.payload or {})
+			except Exception as exc:
+				db.rollback()
+				self._mark_failed(db, event, exc)
+				return True
+			event.status = EventStatus.done
+			event.processed_at = datetime.utcnow()
+			event.locked_at = None
+			db.commit()
+			return True
+
+	def _claim(self, db: Session) -> Optional[AutomationEvent]:
+		now = datetime.utcnow()
+		claimable = or_(
+			and_(AutomationEvent.status == EventStatus.pending, AutomationEvent.available_at <= now),
+			and_(AutomationEvent.status == EventStatus.processing, AutomationEvent.locked_at < now - timedelta(seconds=LEASE_SECONDS)),
+		)
+		candidates = (
+			db.query(AutomationEvent.id)
+			.filter(claimable)
+			.order_by(AutomationEvent.id)
+			.limit(self.concurrency)
+			.all()
+		)
+		for (event_id,) in candidates:
+			claimed = (
+				db.query(AutomationEvent)
+				.filter(AutomationEvent.id == event_id, claimable)
+				.update(
+					{
+						AutomationEvent.status: EventStatus.processing,
+						AutomationEvent.locked_at: now,
+						AutomationEvent.attempts: AutomationEvent.attempts + 1,
+					},
+					synchronize_session=False,
+				)
+			)
+			db.commit()
+			if claimed:
+				return db.get(AutomationEvent, event_id)
+		return None
+
+	def _mark_failed(self, db: Session, event: AutomationEvent, exc: Exception) -> None:
+		event = db.get(AutomationEvent, event.id)
+		event.last_error = str(exc)
+		event.locked_at = None
+		if event.attempts >= MAX_ATTEMPTS:
+			event.status = EventStatus.failed
+			event.processed_at = datetime.utcnow()
+		else:
+			event.status = EventStatus.pending
+			event.available_at = datetime.utcnow() + timedelta(seconds=2 ** event.attempts)
+		db.commit()
+
+
+@event.listens_for(Session, "after_commit")
+def _wake_workers(session: Session) -> None:
+	count = session.info.pop("outbox_enqueued", 0)
+	if count and _pool is not None:
+		_pool.notify(count)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_enqueued(session: Session) -> None:
+	session.info.pop("outbox_enqueued", None)
+
+
+def prune_outbox(db: Session, now: Optional[datetime] = None) -> int:
+	"""Delete `done` events processed more than RETENTION_HOURS ago; return how many were deleted.
+
+	Deletes run in chunks of PRUNE_BATCH_SIZE, each in its own short write transaction.
+	"""
+	cutoff = (now or datetime.utcnow()) - timedelta(hours=RETENTION_HOURS)
+	expired = (
+		select(AutomationEvent.id)
+		.where(AutomationEvent.status == EventStatus.done, AutomationEvent.processed_at < cutoff)
+		.limit(PRUNE_BATCH_SIZE)
+	)
+	deleted = 0
+	while True:
+		count = db.execute(delete(AutomationEvent).where(AutomationEvent.id.in_(expired))).rowcount
+		db.commit()
+		deleted += count
+		if count < PRUNE_BATCH_SIZE:
+			return deleted
+
+
+_pool: Optional[OutboxWorkerPool] = None
+
+
+def get_worker_pool() -> Optional[OutboxWorkerPool]:
+	return _pool
+
+
+def start_event_workers(open_session: Callable[[], Session], handler: EventHandler) -> None:
+	"""Start draining the outbox. With AUTOMATION_WORKERS=0 events run inline instead."""
+	global _pool
+	if _pool or AUTOMATION_WORKERS <= 0:
+		return
+	_pool = OutboxWorkerPool(open_session, handler)
+	_pool.start()
+
+
+def stop_event_workers() -> None:
+	global _pool
+	if _pool:
+		_pool.stop()
+		_pool = None
@@ -0,0 +1,76 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, Query
+from sqlalchemy import Select, and_, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Query as OrmQuery, Session
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+
+class PageParams:
+	"""FastAPI dependency carrying `limit` and the opaque `after` cursor."""
+
+	def __init__(
+		self,
+		limit: int = Query(default=DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+		after: Optional[str] = Query(default=None),
+	):
+		self.limit = limit
+		self.after = after
+
+
+def encode_cursor(created_at: datetime, row_id: Any) -> str:
+	raw = json.dumps([created_at.isoformat(), row_id]).encode()
+	return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, Any]:
+	try:
+		raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+		created_at, row_id = json.loads(raw)
+		return datetime.fromisoformat(created_at), row_id
+	except Exception:
+		raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _keyset(q: Any, model: Any, params: PageParams) -> Any:
+	created_col, id_col = model.created_at, model.id
+	if params.after:
+		created_at, last_id = decode_cursor(params.after)
+		q = q.filter(or_(created_col < created_at, and_(created_col == created_at, id_col < last_id)))
+	return q.order_by(created_col.desc(), id_col.desc()).limit(params.limit + 1)
+
+
+def _page(rows: List[Any], params: PageParams) -> Dict[str, Any]:
+	next_cursor = None
+	if len(rows) > params.limit:
+		rows = rows[: params.limit]
+		next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+	return {"items": rows, "next_cursor": next_cursor}
+
+
+def paginate(q: OrmQuery, model: Any, params: PageParams) -> Dict[str, Any]:
+	"""Apply keyset pagination on (created_at, id), newest first."""
+	return _page(_keyset(q, model, params).all(), params)
+
+
+async def apaginate(db: AsyncSession, stmt: Select, model: Any, params: PageParams) -> Dict[str, Any]:
+	"""Async counterpart of `paginate` for a `select(model)` statement."""
+	result = await db.execute(_keyset(stmt, model, params))
+	return _page(list(result.scalars().all()), params)
+
+
+def paginate_rows(db: Session, stmt: Select, model: Any, params: PageParams) -> Dict[str, Any]:
+	"""`paginate` for a Core select of plain columns; the columns must include `created_at` and `id`."""
+	return _page(db.execute(_keyset(stmt, model, params)).all(), params)
+
+
+async def apaginate_rows(db: AsyncSession, stmt: Select, model: Any, params: PageParams) -> Dict[str, Any]:
+	"""Async counterpart of `paginate_rows`."""
+	result = await db.execute(_keyset(stmt, model, params))
+	return _page(list(result.all()), params)
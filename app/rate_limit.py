@@ -0,0 +1,135 @@
+"""Rate limiting and load shedding for write requests.
+
+Every POST, PUT, PATCH and DELETE takes a token from a bucket keyed by the
+caller's API token and the route template, so one integration hammering
+`POST /leads/` cannot use up another's budget or its own budget on other
+routes. Empty buckets get 429. Independently, once LOAD_SHED_MAX_WRITES
+sessions in the process hold or wait for SQLite's write lock, further writes
+get 503 straight away instead of joining that queue. Requests still
+validating input or calling webhooks are not in the queue and do not count.
+Both responses carry `Retry-After`.
+
+The in-process backend limits each worker separately; with several workers,
+plug in a shared backend.
+"""
+import hashlib
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from fastapi.responses import JSONResponse
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.routing import Match
+
+from .database import WRITER_SESSIONS
+from .instrumentation import METRICS, Counter, Gauge
+
+# 0 turns rate limiting off
+RATE_LIMIT_PER_SECOND = float(os.getenv("RATE_LIMIT_PER_SECOND", "0"))
+RATE_LIMIT_BURST = float(os.getenv("RATE_LIMIT_BURST", "20"))
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "10000"))
+# Writer sessions (holding or queued for the write lock) at which writes are shed; 0 turns load shedding off
+LOAD_SHED_MAX_WRITES = int(os.getenv("LOAD_SHED_MAX_WRITES", "16"))
+LOAD_SHED_RETRY_AFTER_SECONDS = float(os.getenv("LOAD_SHED_RETRY_AFTER_SECONDS", "1"))
+
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+RATE_LIMITED = Counter("rate_limited_requests_total", "Write requests rejected with 429 by the token-bucket rate limiter.")
+SHED = Counter("load_shed_requests_total", "Write requests rejected with 503 because the write lock queue was full.")
+WRITES_IN_FLIGHT = Gauge("write_requests_in_flight", "Write requests currently being served.")
+METRICS.extend([RATE_LIMITED, SHED, WRITES_IN_FLIGHT])
+
+
+class RateLimitBackend:
+	"""Token bucket storage; subclass to share limits between processes."""
+
+	def take(self, key: str, rate: float, burst: float) -> float:
+		"""Take one token from the bucket at `key`; return 0 if one was available, else seconds until one is."""
+		raise NotImplementedError
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+	"""Thread-safe buckets, least recently used evicted past `max_keys` (an evicted bucket starts full again)."""
+
+	def __init__(self, max_keys: int):
+		self.max_keys = max_keys
+		self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+		self._lock = threading.Lock()
+
+	def take(self, key: str, rate: float, burst: float) -> float:
+		now = time.monotonic()
+		with self._lock:
+			tokens, updated = self._buckets.pop(key, (burst, now))
+			tokens = min(burst, tokens + (now - updated) * rate)
+			wait = 0.0
+			if tokens >= 1:
+				tokens -= 1
+			else:
+				wait = (1 - tokens) / rate
+			self._buckets[key] = (tokens, now)
+			while len(self._buckets) > self.max_keys:
+				self._buckets.popitem(last=False)
+			return wait
+
+
+_backend: Optional[RateLimitBackend] = MemoryRateLimitBackend(RATE_LIMIT_MAX_KEYS)
+
+
+def set_rate_limit_backend(backend: Optional[RateLimitBackend]) -> None:
+	"""Swap the bucket backend; None disables rate limiting."""
+	global _backend
+	_backend = backend
+
+
+def get_rate_limit_backend() -> Optional[RateLimitBackend]:
+	return _backend
+
+
+def _route_template(request: Request) -> str:
+	# Middleware runs before routing; templates keep one bucket per route rather than per id
+	for route in request.app.router.routes:
+		match, _ = route.matches(request.scope)
+		if match == Match.FULL:
+			return route.path
+	return "unmatched"
+
+
+def bucket_key(request: Request) -> str:
+	"""`<caller>:<method> <route>`; the caller is a digest of the bearer token, or the client address without one."""
+	scheme, _, token = request.headers.get("authorization", "").partition(" ")
+	if scheme.lower() == "bearer" and token:
+		caller = hashlib.sha256(token.encode()).hexdigest()[:16]
+	else:
+		caller = request.client.host if request.client else "anonymous"
+	return f"{caller}:{request.method} {_route_template(request)}"
+
+
+def _reject(status_code: int, detail: str, retry_after: float) -> JSONResponse:
+	# Retry-After takes whole seconds
+	return JSONResponse({"detail": detail}, status_code=status_code, headers={"Retry-After": str(max(1, math.ceil(retry_after)))})
+
+
+class WriteLimitMiddleware(BaseHTTPMiddleware):
+	"""Applies the per-token, per-route rate limit and sheds writes while the write lock queue is full."""
+
+	async def dispatch(self, request: Request, call_next):
+		if request.method not in WRITE_METHODS:
+			return await call_next(request)
+		backend = _backend
+		if RATE_LIMIT_PER_SECOND > 0 and backend is not None:
+			wait = backend.take(bucket_key(request), RATE_LIMIT_PER_SECOND, RATE_LIMIT_BURST)
+			if wait > 0:
+				RATE_LIMITED.inc()
+				return _reject(429, "Rate limit exceeded", wait)
+		if LOAD_SHED_MAX_WRITES > 0 and WRITER_SESSIONS.value >= LOAD_SHED_MAX_WRITES:
+			SHED.inc()
+			return _reject(503, "Too many writes in progress", LOAD_SHED_RETRY_AFTER_SECONDS)
+		WRITES_IN_FLIGHT.inc()
+		try:
+			return await call_next(request)
+		finally:
+			WRITES_IN_FLIGHT.dec()
@@ -0,0 +1,79 @@
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from ..database import SessionLocal, get_async_db
+from .. import models, schemas
+from ..automation_engine import run_action
+from ..pagination import PageParams, apaginate
+from ..rule_index import invalidate_rule_index
+
+router = APIRouter()
+
+
+@router.post("/rules", response_model=schemas.AutomationRuleOut, status_code=status.HTTP_201_CREATED)
+async def create_rule(payload: schemas.AutomationRuleCreate, db: AsyncSession = Depends(get_async_db)):
+	rule = models.AutomationRule(
+		name=payload.name,
+		trigger_type=payload.trigger_type,
+		trigger_payload=payload.trigger_payload,
+		action_type=payload.action_type,
+		action_payload=payload.action_payload,
+		active=payload.active,
+		batch_window_seconds=payload.batch_window_seconds,
+		batch_max_size=payload.batch_max_size,
+	)
+	db.add(rule)
+	await db.commit()
+	await db.refresh(rule)
+	invalidate_rule_index()
+	return rule
+
+
+@router.get("/rules", response_model=List[schemas.AutomationRuleOut])
+async def list_rules(db: AsyncSession = Depends(get_async_db)):
+	result = await db.execute(select(models.AutomationRule).order_by(models.AutomationRule.created_at.desc()))
+	return result.scalars().all()
+
+
+@router.patch("/rules/{rule_id}", response_model=schemas.AutomationRuleOut)
+async def update_rule(rule_id: int, payload: schemas.AutomationRuleUpdate, db: AsyncSession = Depends(get_async_db)):
+	rule = await db.get(models.AutomationRule, rule_id)
+	if not rule:
+		raise HTTPException(status_code=404, detail="Rule not found")
+	for field, value in payload.model_dump(exclude_unset=True).items():
+		setattr(rule, field, value)
+	await db.commit()
+	await db.refresh(rule)
+	invalidate_rule_index()
+	return rule
+
+
+@router.post("/execute/{rule_id}", response_model=schemas.Message)
+async def execute_rule(rule_id: int):
+	# Actions may make blocking webhook calls, so run them on a sync session in the threadpool
+	def run() -> Optional[str]:
+		with SessionLocal() as db:
+			rule = db.get(models.AutomationRule, rule_id)
+			if not rule:
+				raise HTTPException(status_code=404, detail="Rule not found")
+			# Execute with empty payload for manual testing; user can supply richer payloads by design change later
+			error = run_action(db, rule, payload={})
+			db.commit()
+			return error
+
+	error = await run_in_threadpool(run)
+	if error is not None:
+		raise HTTPException(status_code=500, detail=f"Action failed: {error}")
+	return {"message": "executed"}
+
+
+@router.get("/rules/{rule_id}/logs", response_model=schemas.Page[schemas.WebhookLogOut])
+async def get_rule_logs(rule_id: int, page: PageParams = Depends(), db: AsyncSession = Depends(get_async_db)):
+	rule = await db.get(models.AutomationRule, rule_id)
+	if not rule:
+		raise HTTPException(status_code=404, detail="Rule not found")
+	stmt = select(models.WebhookLog).where(models.WebhookLog.automation_rule_id == rule_id)
+	return await apaginate(db, stmt, models.WebhookLog, page)
@@ -0,0 +1,77 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..database import get_async_db
+from .. import models, schemas
+from ..pagination import PageParams, apaginate_rows
+from ..fast_json import page_json, row_select
+from ..cache import cached_read, entity_tags, list_tags
+from ..conditional import Validators, entity_stmt, list_stmt
+
+router = APIRouter()
+
+
+@router.post("/", response_model=schemas.ContactOut, status_code=status.HTTP_201_CREATED)
+async def create_contact(contact: schemas.ContactCreate, db: AsyncSession = Depends(get_async_db)):
+	obj = models.Contact(
+		name=contact.name,
+		phone=contact.phone,
+		email=contact.email,
+		company=contact.company,
+	)
+	db.add(obj)
+	await db.commit()
+	await db.refresh(obj)
+	return obj
+
+
+@router.get("/", response_model=schemas.Page[schemas.ContactOut])
+async def list_contacts(request: Request, page: PageParams = Depends(), db: AsyncSession = Depends(get_async_db)):
+	validators = Validators.for_list(request, "contacts", (await db.execute(list_stmt(models.Contact))).one())
+	not_modified = validators.not_modified()
+	if not_modified is not None:
+		return not_modified
+	cached = cached_read(request, list_tags("contacts"), validators.etag)
+	if cached.body is not None:
+		return validators.apply(cached.response())
+	result = await apaginate_rows(db, row_select(models.Contact, schemas.ContactOut), models.Contact, page)
+	return validators.apply(cached.store_json(page_json(schemas.ContactOut, result)))
+
+
+@router.get("/{contact_id}", response_model=schemas.ContactOut)
+async def get_contact(contact_id: str, request: Request, db: AsyncSession = Depends(get_async_db)):
+	validators = Validators.for_entity(request, "contacts", contact_id, (await db.execute(entity_stmt(models.Contact, contact_id))).scalar())
+	if validators is None:
+		raise HTTPException(status_code=404, detail="Contact not found")
+	not_modified = validators.not_modified()
+	if not_modified is not None:
+		return not_modified
+	cached = cached_read(request, entity_tags("contacts", contact_id), validators.etag)
+	if cached.body is not None:
+		return validators.apply(cached.response())
+	obj = await db.get(models.Contact, contact_id)
+	if not obj:
+		raise HTTPException(status_code=404, detail="Contact not found")
+	return validators.apply(cached.store(schemas.ContactOut.model_validate(obj)))
+
+
+@router.patch("/{contact_id}", response_model=schemas.ContactOut)
+async def update_contact(contact_id: str, payload: schemas.ContactUpdate, db: AsyncSession = Depends(get_async_db)):
+	obj = await db.get(models.Contact, contact_id)
+	if not obj:
+		raise HTTPException(status_code=404, detail="Contact not found")
+	for field, value in payload.model_dump(exclude_unset=True).items():
+		setattr(obj, field, value)
+	await db.commit()
+	await db.refresh(obj)
+	return obj
+
+
+@router.delete("/{contact_id}", response_model=schemas.Message)
+async def delete_contact(contact_id: str, db: AsyncSession = Depends(get_async_db)):
+	obj = await db.get(models.Contact, contact_id)
+	if not obj:
+		raise HTTPException(status_code=404, detail="Contact not found")
+	await db.delete(obj)
+	await db.commit()
+	return {"message": "deleted"}
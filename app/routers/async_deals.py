@@ -0,0 +1,51 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..database import get_async_db
+from .. import models, schemas
+from ..filters import deal_filters
+from ..pagination import PageParams, apaginate_rows
+from ..fast_json import page_json, row_select
+from ..cache import cached_read, list_tags
+from ..conditional import Validators, list_stmt
+
+router = APIRouter()
+
+
+@router.post("/", response_model=schemas.DealOut, status_code=status.HTTP_201_CREATED)
+async def create_deal(payload: schemas.DealCreate, db: AsyncSession = Depends(get_async_db)):
+	lead = await db.get(models.Lead, payload.lead_id)
+	if not lead:
+		raise HTTPException(status_code=400, detail="Invalid lead_id")
+	deal = models.Deal(
+		lead_id=payload.lead_id,
+		title=payload.title,
+		value=payload.value,
+		currency=payload.currency,
+	)
+	db.add(deal)
+	await db.commit()
+	await db.refresh(deal)
+	return deal
+
+
+@router.get("/", response_model=schemas.Page[schemas.DealOut])
+async def list_deals(
+	request: Request,
+	lead_id: Optional[str] = Query(default=None),
+	stage: Optional[models.DealStage] = Query(default=None),
+	page: PageParams = Depends(),
+	db: AsyncSession = Depends(get_async_db),
+):
+	filters = deal_filters(lead_id, stage)
+	validators = Validators.for_list(request, "deals", (await db.execute(list_stmt(models.Deal).where(*filters))).one())
+	not_modified = validators.not_modified()
+	if not_modified is not None:
+		return not_modified
+	cached = cached_read(request, list_tags("deals"), validators.etag)
+	if cached.body is not None:
+		return validators.apply(cached.response())
+	result = await apaginate_rows(db, row_select(models.Deal, schemas.DealOut).where(*filters), models.Deal, page)
+	return validators.apply(cached.store_json(page_json(schemas.DealOut, result)))
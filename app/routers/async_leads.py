@@ -0,0 +1,163 @@
+from typing import Optional
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from ..database import SessionLocal, get_async_db
+from .. import models, schemas
+from ..automation_engine import dispatch_event, run_inline_events, take_inline_events
+from ..change_feed import activity_change, record_changes
+from ..pagination import PageParams, apaginate_rows
+from ..fast_json import page_json, row_select
+from ..cache import cached_read, entity_tags, list_tags
+from ..conditional import Validators, list_stmt
+from .. import lead_detail
+from ..lead_detail import LeadExpand
+
+router = APIRouter()
+
+
+async def _run_inline_events(db: AsyncSession) -> None:
+	"""Run the events the committed transaction dispatched inline (none when workers run)."""
+	events = take_inline_events(db.sync_session)
+	if not events:
+		return
+
+	# Inline rule execution makes blocking webhook calls, so keep it off the event loop
+	def run() -> None:
+		with SessionLocal() as sync_db:
+			run_inline_events(sync_db, events)
+
+	await run_in_threadpool(run)
+
+
+@router.post("/", response_model=schemas.LeadOut, status_code=status.HTTP_201_CREATED)
+async def create_lead(payload: schemas.LeadCreate, db: AsyncSession = Depends(get_async_db)):
+	contact = await db.get(models.Contact, payload.contact_id)
+	if not contact:
+		raise HTTPException(status_code=400, detail="Invalid contact_id")
+	lead = models.Lead(
+		contact_id=payload.contact_id,
+		source=payload.source,
+		assigned_to=payload.assigned_to,
+		last_touch_at=datetime.utcnow(),
+	)
+	db.add(lead)
+	await db.flush()
+	created = {"lead_id": lead.id, "contact_id": lead.contact_id, "status": lead.status.value}
+	changes = [("create", "lead", created)]
+	# Optional note
+	if payload.notes:
+		activity = models.ActivityLog(
+			lead_id=lead.id,
+			activity_type=models.ActivityType.note,
+			text=payload.notes,
+			created_by=payload.assigned_to,
+		)
+		db.add(activity)
+		await db.flush()
+		changes.append(activity_change(activity))
+	# The change log entry and the automation event commit together with the lead
+	await db.run_sync(record_changes, changes)
+	# Dispatch automation: on_create lead
+	await db.run_sync(dispatch_event, "create", "lead", created)
+	await db.commit()
+	await db.refresh(lead)
+	await _run_inline_events(db)
+	return lead
+
+
+@router.get("/", response_model=schemas.Page[schemas.LeadOut])
+async def list_leads(request: Request, status: Optional[models.LeadStatus] = Query(default=None), page: PageParams = Depends(), db: AsyncSession = Depends(get_async_db)):
+	validators = Validators.for_list(request, "leads", (await db.execute(list_stmt(models.Lead))).one())
+	not_modified = validators.not_modified()
+	if not_modified is not None:
+		return not_modified
+	cached = cached_read(request, list_tags("leads"), validators.etag)
+	if cached.body is not None:
+		return validators.apply(cached.response())
+	stmt = row_select(models.Lead, schemas.LeadOut)
+	if status is not None:
+		stmt = stmt.where(models.Lead.status == status)
+	result = await apaginate_rows(db, stmt, models.Lead, page)
+	return validators.apply(cached.store_json(page_json(schemas.LeadOut, result)))
+
+
+@router.get("/{lead_id}", response_model=schemas.LeadDetailOut, response_model_exclude_unset=True)
+async def get_lead(lead_id: str, request: Request, expand: LeadExpand = Depends(), db: AsyncSession = Depends(get_async_db)):
+	"""A lead with its contact, deals and activities embedded as named in `expand`, in a fixed number of queries."""
+	row = (await db.execute(lead_detail.validator_stmt(lead_id, expand))).first()
+	validators = Validators.for_expanded(request, "leads", lead_id, row)
+	if validators is None:
+		raise HTTPException(status_code=404, detail="Lead not found")
+	not_modified = validators.not_modified()
+	if not_modified is not None:
+		return not_modified
+	cached = cached_read(request, lead_detail.cache_tags(lead_id, row.contact_id, expand), validators.etag)
+	if cached.body is not None:
+		return validators.apply(cached.response())
+	lead = (await db.execute(lead_detail.load_stmt(lead_id, expand))).scalars().first()
+	if not lead:
+		raise HTTPException(status_code=404, detail="Lead not found")
+	return validators.apply(cached.store(lead_detail.to_schema(lead, expand), exclude_unset=True))
+
+
+@router.patch("/{lead_id}", response_model=schemas.LeadOut)
+async def update_lead(lead_id: str, payload: schemas.LeadUpdate, db: AsyncSession = Depends(get_async_db)):
+	lead = await db.get(models.Lead, lead_id)
+	if not lead:
+		raise HTTPException(status_code=404, detail="Lead not found")
+	old_status = lead.status
+	for field, value in payload.model_dump(exclude_unset=True).items():
+		setattr(lead, field, value)
+	lead.updated_at = datetime.utcnow()
+	status_changed = payload.status is not None and payload.status != old_status
+	if status_changed:
+		changed = {"lead_id": lead.id, "status": lead.status.value}
+		await db.run_sync(record_changes, [("status_change", "lead", changed)])
+		# Dispatch automation: status change
+		await db.run_sync(dispatch_event, "status_change", "lead", changed)
+	await db.commit()
+	await db.refresh(lead)
+	await _run_inline_events(db)
+	return lead
+
+
+@router.post("/{lead_id}/activity", response_model=schemas.ActivityOut, status_code=status.HTTP_201_CREATED)
+async def create_activity(lead_id: str, payload: schemas.ActivityCreate, db: AsyncSession = Depends(get_async_db)):
+	lead = await db.get(models.Lead, lead_id)
+	if not lead:
+		raise HTTPException(status_code=404, detail="Lead not found")
+	activity = models.ActivityLog(
+		lead_id=lead_id,
+		activity_type=payload.activity_type,
+		text=payload.text,
+		created_by=payload.created_by,
+	)
+	db.add(activity)
+	lead.last_touch_at = datetime.utcnow()
+	await db.flush()
+	await db.run_sync(record_changes, [activity_change(activity)])
+	await db.commit()
+	await db.refresh(activity)
+	return activity
+
+
+@router.get("/{lead_id}/activity", response_model=schemas.Page[schemas.ActivityOut])
+async def list_activities(lead_id: str, request: Request, page: PageParams = Depends(), db: AsyncSession = Depends(get_async_db)):
+	# Checked before the validators, so an If-None-Match for a deleted lead gets 404 rather than 304
+	if (await db.execute(select(models.Lead.id).where(models.Lead.id == lead_id))).first() is None:
+		raise HTTPException(status_code=404, detail="Lead not found")
+	activity_stmt = list_stmt(models.ActivityLog, models.ActivityLog.created_at).where(models.ActivityLog.lead_id == lead_id)
+	validators = Validators.for_list(request, "activity_logs", (await db.execute(activity_stmt)).one())
+	not_modified = validators.not_modified()
+	if not_modified is not None:
+		return not_modified
+	cached = cached_read(request, (f"activity_logs:lead:{lead_id}", "activity_logs:*") + entity_tags("leads", lead_id), validators.etag)
+	if cached.body is not None:
+		return validators.apply(cached.response())
+	stmt = row_select(models.ActivityLog, schemas.ActivityOut).where(models.ActivityLog.lead_id == lead_id)
+	result = await apaginate_rows(db, stmt, models.ActivityLog, page)
+	return validators.apply(cached.store_json(page_json(schemas.ActivityOut, result)))
@@ -4,7 +4,9 @@ from sqlalchemy.orm import Session
 
 from ..database import get_db
 from .. import models, schemas
-from ..automation_engine import _execute_action as execute_action_internal
+from ..automation_engine import run_action
+from ..pagination import PageParams, paginate
+from ..rule_index import invalidate_rule_index
 
 router = APIRouter()
 
@@ -18,10 +20,13 @@ def create_rule(payload: schemas.AutomationRuleCreate, db: Session = Depends(get
 		action_type=payload.action_type,
 		action_payload=payload.action_payload,
 		active=payload.active,
+		batch_window_seconds=payload.batch_window_seconds,
+		batch_max_size=payload.batch_max_size,
 	)
 	db.add(rule)
 	db.commit()
 	db.refresh(rule)
+	invalidate_rule_index()
 	return rule
 
 
@@ -30,24 +35,36 @@ def list_rules(db: Session = Depends(get_db)):
 	return db.query(models.AutomationRule).order_by(models.AutomationRule.created_at.desc()).all()
 
 
+@router.patch("/rules/{rule_id}", response_model=schemas.AutomationRuleOut)
+def update_rule(rule_id: int, payload: schemas.AutomationRuleUpdate, db: Session = Depends(get_db)):
+	rule = db.query(models.AutomationRule).get(rule_id)
+	if not rule:
+		raise HTTPException(status_code=404, detail="Rule not found")
+	for field, value in payload.model_dump(exclude_unset=True).items():
+		setattr(rule, field, value)
+	db.commit()
+	db.refresh(rule)
+	invalidate_rule_index()
+	return rule
+
+
 @router.post("/execute/{rule_id}", response_model=schemas.Message)
 def execute_rule(rule_id: int, db: Session = Depends(get_db)):
 	rule = db.query(models.AutomationRule).get(rule_id)
 	if not rule:
 		raise HTTPException(status_code=404, detail="Rule not found")
 	# Execute with empty payload for manual testing; user can supply richer payloads by design change later
-	execute_action_internal(db, rule, payload={})
+	error = run_action(db, rule, payload={})
+	db.commit()
+	if error is not None:
+		raise HTTPException(status_code=500, detail=f"Action failed: {error}")
 	return {"message": "executed"}
 
 
-@router.get("/rules/{rule_id}/logs", response_model=List[schemas.WebhookLogOut])
-def get_rule_logs(rule_id: int, db: Session = Depends(get_db)):
+@router.get("/rules/{rule_id}/logs", response_model=schemas.Page[schemas.WebhookLogOut])
+def get_rule_logs(rule_id: int, page: PageParams = Depends(), db: Session = Depends(get_db)):
 	rule = db.query(models.AutomationRule).get(rule_id)
 	if not rule:
 		raise HTTPException(status_code=404, detail="Rule not found")
-	return (
-		db.query(models.WebhookLog)
-		.filter(models.WebhookLog.automation_rule_id == rule_id)
-		.order_by(models.WebhookLog.created_at.desc())
-		.all()
-	)
+	q = db.query(models.WebhookLog).filter(models.WebhookLog.automation_rule_id == rule_id)
+	return paginate(q, models.WebhookLog, page)
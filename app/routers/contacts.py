@@ -1,11 +1,22 @@
+from datetime import datetime
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 
 from ..database import get_db
 from .. import models, schemas
+from ..pagination import PageParams, paginate_rows
+from ..fast_json import page_json, row_select
+from ..bulk_import import BULK_OPENAPI, Chunk, run_import
+from ..export import ExportParams, export_response, export_select
+from ..search import search_contacts
+from ..cache import cached_read, entity_tags, list_tags
+from ..conditional import Validators, entity_stmt, list_stmt
 
 router = APIRouter()
+# Bulk import/export and search routes, served by these sync handlers in every DB_MODE
+io_router = APIRouter()
 
 
 @router.post("/", response_model=schemas.ContactOut, status_code=status.HTTP_201_CREATED)
@@ -22,17 +33,61 @@ def create_contact(contact: schemas.ContactCreate, db: Session = Depends(get_db)
 	return obj
 
 
-@router.get("/", response_model=List[schemas.ContactOut])
-def list_contacts(db: Session = Depends(get_db)):
-	return db.query(models.Contact).order_by(models.Contact.created_at.desc()).all()
+@io_router.post("/bulk", response_model=schemas.BulkImportResult, openapi_extra=BULK_OPENAPI)
+async def bulk_create_contacts(request: Request, db: Session = Depends(get_db)):
+	"""Import contacts from a JSON array, NDJSON or CSV body."""
+	def insert_chunk(chunk: Chunk) -> List[schemas.BulkRowError]:
+		now = datetime.utcnow()
+		db.execute(insert(models.Contact), [
+			{**item.model_dump(), "id": models.generate_uuid_str(), "created_at": now, "updated_at": now}
+			for _, item in chunk
+		])
+		return []
+
+	return await run_import(request, db, schemas.ContactCreate, insert_chunk)
+
+
+@router.get("/", response_model=schemas.Page[schemas.ContactOut])
+def list_contacts(request: Request, page: PageParams = Depends(), db: Session = Depends(get_db)):
+	validators = Validators.for_list(request, "contacts", db.execute(list_stmt(models.Contact)).one())
+	not_modified = validators.not_modified()
+	if not_modified is not None:
+		return not_modified
+	cached = cached_read(request, list_tags("contacts"), validators.etag)
+	if cached.body is not None:
+		return validators.apply(cached.response())
+	result = paginate_rows(db, row_select(models.Contact, schemas.ContactOut), models.Contact, page)
+	return validators.apply(cached.store_json(page_json(schemas.ContactOut, result)))
+
+
+@io_router.get("/export")
+def export_contacts(params: ExportParams = Depends()):
+	"""Stream contacts as NDJSON or CSV, ordered by updated_at."""
+	stmt = export_select(models.Contact, schemas.ContactOut, params)
+	return export_response(stmt, schemas.ContactOut, params.format, "contacts")
+
+
+@io_router.get("/search", response_model=schemas.Page[schemas.ContactOut])
+def search(q: str = Query(min_length=1), page: PageParams = Depends(), db: Session = Depends(get_db)):
+	"""Full-text search on name, email, company and phone; every term matches as a prefix, best match first."""
+	return search_contacts(db, q, page)
 
 
 @router.get("/{contact_id}", response_model=schemas.ContactOut)
-def get_contact(contact_id: str, db: Session = Depends(get_db)):
+def get_contact(contact_id: str, request: Request, db: Session = Depends(get_db)):
+	validators = Validators.for_entity(request, "contacts", contact_id, db.execute(entity_stmt(models.Contact, contact_id)).scalar())
+	if validators is None:
+		raise HTTPException(status_code=404, detail="Contact not found")
+	not_modified = validators.not_modified()
+	if not_modified is not None:
+		return not_modified
+	cached = cached_read(request, entity_tags("contacts", contact_id), validators.etag)
+	if cached.body is not None:
+		return validators.apply(cached.response())
 	obj = db.query(models.Contact).get(contact_id)
 	if not obj:
 		raise HTTPException(status_code=404, detail="Contact not found")
-	return obj
+	return validators.apply(cached.store(schemas.ContactOut.model_validate(obj)))
 
 
 @router.patch("/{contact_id}", response_model=schemas.ContactOut)
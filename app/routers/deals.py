@@ -1,11 +1,19 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from sqlalchemy.orm import Session
 
 from ..database import get_db
 from .. import models, schemas
+from ..filters import deal_filters
+from ..pagination import PageParams, paginate_rows
+from ..fast_json import page_json, row_select
+from ..export import ExportParams, export_response, export_select
+from ..cache import cached_read, list_tags
+from ..conditional import Validators, list_stmt
 
 router = APIRouter()
+# Bulk import/export routes, served by these sync handlers in every DB_MODE
+io_router = APIRouter()
 
 
 @router.post("/", response_model=schemas.DealOut, status_code=status.HTTP_201_CREATED)
@@ -25,6 +33,30 @@ def create_deal(payload: schemas.DealCreate, db: Session = Depends(get_db)):
 	return deal
 
 
-@router.get("/", response_model=List[schemas.DealOut])
-def list_deals(db: Session = Depends(get_db)):
-	return db.query(models.Deal).order_by(models.Deal.created_at.desc()).all()
+@router.get("/", response_model=schemas.Page[schemas.DealOut])
+def list_deals(
+	request: Request,
+	lead_id: Optional[str] = Query(default=None),
+	stage: Optional[models.DealStage] = Query(default=None),
+	page: PageParams = Depends(),
+	db: Session = Depends(get_db),
+):
+	filters = deal_filters(lead_id, stage)
+	validators = Validators.for_list(request, "deals", db.execute(list_stmt(models.Deal).where(*filters)).one())
+	not_modified = validators.not_modified()
+	if not_modified is not None:
+		return not_modified
+	cached = cached_read(request, list_tags("deals"), validators.etag)
+	if cached.body is not None:
+		return validators.apply(cached.response())
+	result = paginate_rows(db, row_select(models.Deal, schemas.DealOut).where(*filters), models.Deal, page)
+	return validators.apply(cached.store_json(page_json(schemas.DealOut, result)))
+
+
+@io_router.get("/export")
+def export_deals(stage: Optional[models.DealStage] = Query(default=None), params: ExportParams = Depends()):
+	"""Stream deals as NDJSON or CSV, ordered by updated_at."""
+	stmt = export_select(models.Deal, schemas.DealOut, params)
+	if stage is not None:
+		stmt = stmt.where(models.Deal.stage == stage)
+	return export_response(stmt, schemas.DealOut, params.format, "deals")
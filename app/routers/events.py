@@ -0,0 +1,85 @@
+import asyncio
+import json
+from typing import Any, AsyncIterator, List, Optional, Set
+
+from fastapi import APIRouter, Header, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from ..change_feed import (
+	CHANGE_FEED_BATCH_SIZE,
+	CHANGE_FEED_HEARTBEAT_SECONDS,
+	Change,
+	change_log_bounds,
+	get_change_feed,
+	read_changes,
+)
+
+router = APIRouter()
+
+
+def _format(change: Change) -> str:
+	return f"id: {change['id']}\nevent: {change['event']}\ndata: {json.dumps(change)}\n\n"
+
+
+async def _stream(entities: Set[str], events: Set[str], last_id: Optional[int]) -> AsyncIterator[str]:
+	feed = get_change_feed()
+	# Subscribed here rather than by the endpoint, so a response that is never streamed holds no subscription;
+	# and before the backlog is replayed, so nothing committed in between is missed
+	sub = await feed.subscribe(entities, events)
+	try:
+		yield "retry: 3000\n\n"
+		last = 0
+		if last_id is not None:
+			last = last_id
+			oldest, _ = await asyncio.to_thread(change_log_bounds)
+			if oldest is not None and last + 1 < oldest:
+				# Events after Last-Event-ID were pruned; the client should refetch its state
+				yield f"event: reset\ndata: {json.dumps({'reason': 'history_truncated', 'oldest_id': oldest})}\n\n"
+			while True:
+				backlog = await asyncio.to_thread(read_changes, last)
+				for change in backlog:
+					last = change["id"]
+					if sub.wants(change):
+						yield _format(change)
+				if len(backlog) < CHANGE_FEED_BATCH_SIZE:
+					break
+		while True:
+			if sub.overflowed and sub.queue.empty():
+				# Fell behind the live feed; reconnecting with Last-Event-ID replays from the log
+				return
+			try:
+				change = await asyncio.wait_for(sub.queue.get(), CHANGE_FEED_HEARTBEAT_SECONDS)
+			except asyncio.TimeoutError:
+				yield ": keepalive\n\n"
+				continue
+			# The live queue can overlap the replayed backlog
+			if change["id"] <= last:
+				continue
+			last = change["id"]
+			yield _format(change)
+	finally:
+		feed.unsubscribe(sub)
+
+
+@router.get("/events/stream")
+async def stream_events(
+	entity: List[str] = Query(default=[]),
+	event: List[str] = Query(default=[]),
+	last_event_id: Optional[str] = Query(default=None, description="For clients that cannot send the Last-Event-ID header"),
+	last_event_id_header: Optional[str] = Header(default=None, alias="Last-Event-ID"),
+):
+	"""Server-sent events for CRM changes (lead create, status_change, activity).
+
+	Filter with repeated `entity` / `event` parameters. Reconnecting with `Last-Event-ID` replays missed events from
+	the change log; a `reset` event means some were already pruned.
+	"""
+	raw_last_id: Any = last_event_id_header or last_event_id
+	try:
+		last_id = int(raw_last_id) if raw_last_id else None
+	except ValueError:
+		raise HTTPException(status_code=400, detail="Invalid Last-Event-ID")
+	return StreamingResponse(
+		_stream(set(entity), set(event), last_id),
+		media_type="text/event-stream",
+		headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+	)
@@ -1,7 +1,16 @@
 from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from ..instrumentation import render_metrics
 
 router = APIRouter()
 
 @router.get("/health")
 def health():
 	return {"status": "ok"}
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+	"""Prometheus text exposition of request, query and automation action metrics."""
+	return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
@@ -1,13 +1,26 @@
 from typing import List, Optional
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from sqlalchemy import insert, update
 from sqlalchemy.orm import Session
 
 from ..database import get_db
 from .. import models, schemas
-from ..automation_engine import dispatch_event
+from ..automation_engine import dispatch_event, dispatch_events, run_inline_events
+from ..change_feed import activity_change, record_changes
+from ..pagination import PageParams, paginate_rows
+from ..fast_json import page_json, row_select
+from ..bulk_import import BULK_OPENAPI, Chunk, run_import
+from ..export import ExportParams, export_response, export_select
+from ..search import search_leads
+from ..cache import cached_read, entity_tags, list_tags
+from ..conditional import Validators, list_stmt
+from .. import lead_detail
+from ..lead_detail import LeadExpand
 
 router = APIRouter()
+# Bulk import/export and search routes, served by these sync handlers in every DB_MODE
+io_router = APIRouter()
 
 
 @router.post("/", response_model=schemas.LeadOut, status_code=status.HTTP_201_CREATED)
@@ -22,14 +35,9 @@ def create_lead(payload: schemas.LeadCreate, db: Session = Depends(get_db)):
 		last_touch_at=datetime.utcnow(),
 	)
 	db.add(lead)
-	db.commit()
-	db.refresh(lead)
-	# Dispatch automation: on_create lead
-	dispatch_event(db, event="create", entity="lead", payload={
-		"lead_id": lead.id,
-		"contact_id": lead.contact_id,
-		"status": lead.status.value,
-	})
+	db.flush()
+	created = {"lead_id": lead.id, "contact_id": lead.contact_id, "status": lead.status.value}
+	changes = [("create", "lead", created)]
 	# Optional note
 	if payload.notes:
 		activity = models.ActivityLog(
@@ -39,16 +47,147 @@ def create_lead(payload: schemas.LeadCreate, db: Session = Depends(get_db)):
 			created_by=payload.assigned_to,
 		)
 		db.add(activity)
-		db.commit()
+		db.flush()
+		changes.append(activity_change(activity))
+	# The change log entry and the automation event commit together with the lead
+	record_changes(db, changes)
+	# Dispatch automation: on_create lead
+	dispatch_event(db, event="create", entity="lead", payload=created)
+	db.commit()
+	db.refresh(lead)
+	run_inline_events(db)
 	return lead
 
 
-@router.get("/", response_model=List[schemas.LeadOut])
-def list_leads(status: Optional[models.LeadStatus] = Query(default=None), db: Session = Depends(get_db)):
-	q = db.query(models.Lead)
+@io_router.post("/bulk", response_model=schemas.BulkImportResult, openapi_extra=BULK_OPENAPI)
+async def bulk_create_leads(request: Request, dispatch: bool = Query(default=True), db: Session = Depends(get_db)):
+	"""Import leads from a JSON array, NDJSON or CSV body.
+
+	With `dispatch=true` the on_create events of each chunk are queued together; `dispatch=false` skips automations.
+	"""
+	def insert_chunk(chunk: Chunk) -> List[schemas.BulkRowError]:
+		contact_ids = {item.contact_id for _, item in chunk}
+		known = {cid for (cid,) in db.query(models.Contact.id).filter(models.Contact.id.in_(contact_ids))}
+		now = datetime.utcnow()
+		errors, leads, activities, events = [], [], [], []
+		for row, item in chunk:
+			if item.contact_id not in known:
+				errors.append(schemas.BulkRowError(row=row, error="Invalid contact_id"))
+				continue
+			lead_id = models.generate_uuid_str()
+			leads.append({
+				"id": lead_id,
+				"contact_id": item.contact_id,
+				"source": item.source,
+				"status": models.LeadStatus.new,
+				"assigned_to": item.assigned_to,
+				"created_at": now,
+				"last_touch_at": now,
+				"updated_at": now,
+			})
+			if item.notes:
+				activities.append({
+					"lead_id": lead_id,
+					"activity_type": models.ActivityType.note,
+					"text": item.notes,
+					"created_by": item.assigned_to,
+					"created_at": now,
+				})
+			events.append(("create", "lead", {"lead_id": lead_id, "contact_id": item.contact_id, "status": models.LeadStatus.new.value}))
+		if leads:
+			db.execute(insert(models.Lead), leads)
+		if activities:
+			db.execute(insert(models.ActivityLog), activities)
+		# Logged with the rows whether or not automations run
+		record_changes(db, events + [
+			("activity", "lead", {"lead_id": activity["lead_id"], "activity_type": activity["activity_type"].value})
+			for activity in activities
+		])
+		if dispatch:
+			dispatch_events(db, events)
+		return errors
+
+	return await run_import(request, db, schemas.LeadCreate, insert_chunk, after_commit=lambda: run_inline_events(db))
+
+
+@io_router.post("/activity/bulk", response_model=schemas.BulkImportResult, openapi_extra=BULK_OPENAPI)
+async def bulk_create_activities(request: Request, db: Session = Depends(get_db)):
+	"""Import activities (each with a `lead_id`) from a JSON array, NDJSON or CSV body."""
+	def insert_chunk(chunk: Chunk) -> List[schemas.BulkRowError]:
+		lead_ids = {item.lead_id for _, item in chunk}
+		known = {lid for (lid,) in db.query(models.Lead.id).filter(models.Lead.id.in_(lead_ids))}
+		now = datetime.utcnow()
+		errors, activities = [], []
+		for row, item in chunk:
+			if item.lead_id not in known:
+				errors.append(schemas.BulkRowError(row=row, error="Invalid lead_id"))
+				continue
+			activities.append({**item.model_dump(), "created_at": now})
+		if activities:
+			db.execute(insert(models.ActivityLog), activities)
+			touched = list({activity["lead_id"] for activity in activities})
+			db.execute(update(models.Lead).where(models.Lead.id.in_(touched)).values(last_touch_at=now))
+			record_changes(db, [
+				("activity", "lead", {"lead_id": activity["lead_id"], "activity_type": activity["activity_type"].value})
+				for activity in activities
+			])
+		return errors
+
+	return await run_import(request, db, schemas.ActivityBulkCreate, insert_chunk)
+
+
+@router.get("/", response_model=schemas.Page[schemas.LeadOut])
+def list_leads(request: Request, status: Optional[models.LeadStatus] = Query(default=None), page: PageParams = Depends(), db: Session = Depends(get_db)):
+	validators = Validators.for_list(request, "leads", db.execute(list_stmt(models.Lead)).one())
+	not_modified = validators.not_modified()
+	if not_modified is not None:
+		return not_modified
+	cached = cached_read(request, list_tags("leads"), validators.etag)
+	if cached.body is not None:
+		return validators.apply(cached.response())
+	stmt = row_select(models.Lead, schemas.LeadOut)
+	if status is not None:
+		stmt = stmt.where(models.Lead.status == status)
+	return validators.apply(cached.store_json(page_json(schemas.LeadOut, paginate_rows(db, stmt, models.Lead, page))))
+
+
+@io_router.get("/export")
+def export_leads(status: Optional[models.LeadStatus] = Query(default=None), params: ExportParams = Depends()):
+	"""Stream leads as NDJSON or CSV, ordered by updated_at."""
+	stmt = export_select(models.Lead, schemas.LeadOut, params)
 	if status is not None:
-		q = q.filter(models.Lead.status == status)
-	return q.order_by(models.Lead.created_at.desc()).all()
+		stmt = stmt.where(models.Lead.status == status)
+	return export_response(stmt, schemas.LeadOut, params.format, "leads")
+
+
+@io_router.get("/search", response_model=schemas.Page[schemas.LeadOut])
+def search(
+	q: str = Query(min_length=1),
+	status: Optional[models.LeadStatus] = Query(default=None),
+	page: PageParams = Depends(),
+	db: Session = Depends(get_db),
+):
+	"""Full-text search on the lead's contact and its activity text, best match first."""
+	return search_leads(db, q, status, page)
+
+
+@router.get("/{lead_id}", response_model=schemas.LeadDetailOut, response_model_exclude_unset=True)
+def get_lead(lead_id: str, request: Request, expand: LeadExpand = Depends(), db: Session = Depends(get_db)):
+	"""A lead with its contact, deals and activities embedded as named in `expand`, in a fixed number of queries."""
+	row = db.execute(lead_detail.validator_stmt(lead_id, expand)).first()
+	validators = Validators.for_expanded(request, "leads", lead_id, row)
+	if validators is None:
+		raise HTTPException(status_code=404, detail="Lead not found")
+	not_modified = validators.not_modified()
+	if not_modified is not None:
+		return not_modified
+	cached = cached_read(request, lead_detail.cache_tags(lead_id, row.contact_id, expand), validators.etag)
+	if cached.body is not None:
+		return validators.apply(cached.response())
+	lead = db.execute(lead_detail.load_stmt(lead_id, expand)).scalars().first()
+	if not lead:
+		raise HTTPException(status_code=404, detail="Lead not found")
+	return validators.apply(cached.store(lead_detail.to_schema(lead, expand), exclude_unset=True))
 
 
 @router.patch("/{lead_id}", response_model=schemas.LeadOut)
@@ -60,14 +199,15 @@ def update_lead(lead_id: str, payload: schemas.LeadUpdate, db: Session = Depends
 	for field, value in payload.model_dump(exclude_unset=True).items():
 		setattr(lead, field, value)
 	lead.updated_at = datetime.utcnow()
+	status_changed = payload.status is not None and payload.status != old_status
+	if status_changed:
+		changed = {"lead_id": lead.id, "status": lead.status.value}
+		record_changes(db, [("status_change", "lead", changed)])
+		# Dispatch automation: status change
+		dispatch_event(db, event="status_change", entity="lead", payload=changed)
 	db.commit()
 	db.refresh(lead)
-	if payload.status is not None and payload.status != old_status:
-		# Dispatch automation: status change
-		dispatch_event(db, event="status_change", entity="lead", payload={
-			"lead_id": lead.id,
-			"status": lead.status.value,
-		})
+	run_inline_events(db)
 	return lead
 
 
@@ -84,19 +224,25 @@ def create_activity(lead_id: str, payload: schemas.ActivityCreate, db: Session =
 	)
 	db.add(activity)
 	lead.last_touch_at = datetime.utcnow()
+	db.flush()
+	record_changes(db, [activity_change(activity)])
 	db.commit()
 	db.refresh(activity)
 	return activity
 
 
-@router.get("/{lead_id}/activity", response_model=List[schemas.ActivityOut])
-def list_activities(lead_id: str, db: Session = Depends(get_db)):
-	lead = db.query(models.Lead).get(lead_id)
-	if not lead:
+@router.get("/{lead_id}/activity", response_model=schemas.Page[schemas.ActivityOut])
+def list_activities(lead_id: str, request: Request, page: PageParams = Depends(), db: Session = Depends(get_db)):
+	# Checked before the validators, so an If-None-Match for a deleted lead gets 404 rather than 304
+	if db.query(models.Lead.id).filter(models.Lead.id == lead_id).first() is None:
 		raise HTTPException(status_code=404, detail="Lead not found")
-	return (
-		db.query(models.ActivityLog)
-		.filter(models.ActivityLog.lead_id == lead_id)
-		.order_by(models.ActivityLog.created_at.desc())
-		.all()
-	)
+	activity_stmt = list_stmt(models.ActivityLog, models.ActivityLog.created_at).where(models.ActivityLog.lead_id == lead_id)
+	validators = Validators.for_list(request, "activity_logs", db.execute(activity_stmt).one())
+	not_modified = validators.not_modified()
+	if not_modified is not None:
+		return not_modified
+	cached = cached_read(request, (f"activity_logs:lead:{lead_id}", "activity_logs:*") + entity_tags("leads", lead_id), validators.etag)
+	if cached.body is not None:
+		return validators.apply(cached.response())
+	stmt = row_select(models.ActivityLog, schemas.ActivityOut).where(models.ActivityLog.lead_id == lead_id)
+	return validators.apply(cached.store_json(page_json(schemas.ActivityOut, paginate_rows(db, stmt, models.ActivityLog, page))))
@@ -0,0 +1,52 @@
+from typing import Dict, List, Tuple
+
+from fastapi import APIRouter, Depends
+from sqlalchemy import String, cast, func, literal, select, union_all
+from sqlalchemy.orm import Session
+
+from ..database import get_db
+from .. import models, schemas
+
+router = APIRouter()
+
+LEAD_DIMENSIONS = {"status": "by_status", "source": "by_source", "assigned_to": "by_assignee"}
+
+
+def _lead_rows(db: Session) -> List[Tuple[str, str, int]]:
+	if db.get_bind().dialect.name == "sqlite":
+		rollup = models.LeadRollup
+		return db.execute(select(rollup.dimension, rollup.value, rollup.count).where(rollup.count > 0)).all()
+	# Without rollup triggers, aggregate the base table
+	lead = models.Lead
+	stmt = union_all(*[
+		select(literal(dim), cast(getattr(lead, dim), String), func.count()).group_by(getattr(lead, dim))
+		for dim in LEAD_DIMENSIONS
+	])
+	return db.execute(stmt).all()
+
+
+def _deal_rows(db: Session) -> List[Tuple[str, str, int, float]]:
+	if db.get_bind().dialect.name == "sqlite":
+		rollup = models.DealRollup
+		return db.execute(select(rollup.stage, rollup.currency, rollup.count, rollup.value_sum).where(rollup.count > 0)).all()
+	deal = models.Deal
+	return db.execute(
+		select(cast(deal.stage, String), deal.currency, func.count(), func.sum(deal.value)).group_by(deal.stage, deal.currency)
+	).all()
+
+
+@router.get("/stats", response_model=schemas.StatsOut)
+def get_stats(db: Session = Depends(get_db)):
+	"""Lead counts by status, source and assignee, and deal counts and value by stage and currency.
+
+	Served from rollup tables kept current by triggers, so the cost does not grow with the data.
+	"""
+	groups: Dict[str, Dict[str, int]] = {key: {} for key in LEAD_DIMENSIONS.values()}
+	for dimension, value, count in _lead_rows(db):
+		groups[LEAD_DIMENSIONS[dimension]][value] = count
+	leads = schemas.LeadStats(total=sum(groups["by_status"].values()), **groups)
+	deals = [
+		schemas.DealBucket(stage=stage, currency=currency, count=count, value=value_sum or 0)
+		for stage, currency, count, value_sum in sorted(_deal_rows(db))
+	]
+	return schemas.StatsOut(leads=leads, deals=deals)
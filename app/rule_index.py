@@ -0,0 +1,104 @@
+from __future__ import annotations
+import os
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from .models import ActionType, AutomationRule, TriggerType
+
+# Safety net for rule changes made by other processes, which cannot invalidate our index.
+RULE_INDEX_TTL_SECONDS = float(os.getenv("RULE_INDEX_TTL_SECONDS", "60"))
+
+IndexKey = Tuple[TriggerType, str, str, Optional[str]]
+
+EVENT_TRIGGERS = (TriggerType.on_create, TriggerType.on_stage_change)
+
+
+@dataclass(frozen=True)
+class CompiledRule:
+	"""Detached snapshot of an active AutomationRule, safe to share across threads."""
+
+	id: int
+	name: str
+	trigger_type: TriggerType
+	action_type: ActionType
+	trigger_payload: Dict[str, Any] = field(default_factory=dict)
+	action_payload: Dict[str, Any] = field(default_factory=dict)
+	batch_window_seconds: Optional[float] = None
+	batch_max_size: Optional[int] = None
+
+	@property
+	def batched(self) -> bool:
+		return bool(self.batch_window_seconds or self.batch_max_size)
+
+	@classmethod
+	def from_model(cls, rule: AutomationRule) -> "CompiledRule":
+		return cls(
+			id=rule.id,
+			name=rule.name,
+			trigger_type=rule.trigger_type,
+			action_type=rule.action_type,
+			trigger_payload=dict(rule.trigger_payload or {}),
+			action_payload=dict(rule.action_payload or {}),
+			batch_window_seconds=rule.batch_window_seconds,
+			batch_max_size=rule.batch_max_size,
+		)
+
+
+def _index_key(rule: CompiledRule) -> Optional[IndexKey]:
+	config = rule.trigger_payload
+	if rule.trigger_type == TriggerType.on_create:
+		entity = config.get("entity")
+		return (TriggerType.on_create, entity, "create", None) if entity else None
+	if rule.trigger_type == TriggerType.on_stage_change:
+		# For leads, consider status change
+		return (TriggerType.on_stage_change, "lead", "status_change", config.get("status"))
+	# time_wait rules are handled by scheduler, not here
+	return None
+
+
+class RuleIndex:
+	"""Event-triggered rules keyed by (trigger_type, entity, event, status)."""
+
+	def __init__(self, rules: List[CompiledRule]):
+		self._by_key: Dict[IndexKey, List[CompiledRule]] = defaultdict(list)
+		for rule in sorted(rules, key=lambda r: r.id):
+			key = _index_key(rule)
+			if key is not None:
+				self._by_key[key].append(rule)
+
+	def match(self, event: str, entity: str, payload: Dict[str, Any]) -> List[CompiledRule]:
+		status = payload.get("status")
+		matched: List[CompiledRule] = []
+		for trigger_type in EVENT_TRIGGERS:
+			matched.extend(self._by_key.get((trigger_type, entity, event, None), ()))
+			if status is not None:
+				matched.extend(self._by_key.get((trigger_type, entity, event, status), ()))
+		matched.sort(key=lambda r: r.id)
+		return matched
+
+
+_index: Optional[RuleIndex] = None
+_loaded_at = 0.0
+_lock = threading.Lock()
+
+
+def get_rule_index(db: Session) -> RuleIndex:
+	"""Return the compiled index, loading it with `db` only when missing or expired."""
+	global _index, _loaded_at
+	with _lock:
+		if _index is None or time.monotonic() - _loaded_at > RULE_INDEX_TTL_SECONDS:
+			rules = db.query(AutomationRule).filter(AutomationRule.active == True).all()
+			_index = RuleIndex([CompiledRule.from_model(rule) for rule in rules])
+			_loaded_at = time.monotonic()
+		return _index
+
+
+def invalidate_rule_index() -> None:
+	global _index
+	with _lock:
+		_index = None
@@ -0,0 +1,37 @@
+"""Run the time_wait scheduler as its own process, decoupled from the API.
+
+	SCHEDULER_MODE=off uvicorn app.main:app --workers 4
+	python -m app.scheduler
+
+Several scheduler processes may run for failover; the `time_wait_scan` lease
+lets only one of them fire rules at a time.
+"""
+import logging
+import signal
+import threading
+
+from .automation_engine import start_scheduler, stop_scheduler
+from .database import SessionLocal, engine
+from .migrations import run_migrations
+from .webhooks import start_webhook_delivery
+
+logger = logging.getLogger(__name__)
+
+
+def main() -> None:
+	logging.basicConfig(level=logging.INFO)
+	run_migrations(engine)
+	start_webhook_delivery(lambda: SessionLocal())
+	start_scheduler(lambda: SessionLocal())
+	logger.info("Scheduler running")
+
+	stopping = threading.Event()
+	for sig in (signal.SIGINT, signal.SIGTERM):
+		signal.signal(sig, lambda *_: stopping.set())
+	stopping.wait()
+	stop_scheduler()
+	logger.info("Scheduler stopped")
+
+
+if __name__ == "__main__":
+	main()
@@ -1,9 +1,9 @@
 from __future__ import annotations
 from datetime import datetime
-from typing import Optional, Literal, Any
+from typing import Optional, Literal, Any, Dict, Generic, List, TypeVar
 from pydantic import BaseModel, Field
 
-from .models import LeadSource, LeadStatus, DealStage, ActivityType, TriggerType, ActionType
+from .models import LeadSource, LeadStatus, DealStage, ActivityType, TriggerType, ActionType, WebhookDeliveryStatus
 
 
 # Shared
@@ -11,6 +11,25 @@ class Message(BaseModel):
 	message: str
 
 
+T = TypeVar("T")
+
+
+class BulkRowError(BaseModel):
+	row: int
+	error: str
+
+
+class BulkImportResult(BaseModel):
+	created: int = 0
+	failed: int = 0
+	errors: List[BulkRowError] = []
+
+
+class Page(BaseModel, Generic[T]):
+	items: List[T]
+	next_cursor: Optional[str] = None
+
+
 # Contacts
 class ContactCreate(BaseModel):
 	name: str
@@ -96,6 +115,10 @@ class ActivityCreate(BaseModel):
 	created_by: str
 
 
+class ActivityBulkCreate(ActivityCreate):
+	lead_id: str
+
+
 class ActivityOut(BaseModel):
 	id: int
 	lead_id: str
@@ -108,6 +131,14 @@ class ActivityOut(BaseModel):
 		from_attributes = True
 
 
+# Lead detail
+class LeadDetailOut(LeadOut):
+	"""A lead with the relations named in `expand`; relations not expanded are omitted."""
+	contact: Optional[ContactOut] = None
+	deals: Optional[List[DealOut]] = None
+	activities: Optional[List[ActivityOut]] = None
+
+
 # Automation
 class AutomationRuleCreate(BaseModel):
 	name: str
@@ -116,6 +147,16 @@ class AutomationRuleCreate(BaseModel):
 	action_type: ActionType
 	action_payload: Optional[dict] = None
 	active: bool = True
+	batch_window_seconds: Optional[float] = Field(None, gt=0)
+	batch_max_size: Optional[int] = Field(None, ge=1)
+
+
+class AutomationRuleUpdate(BaseModel):
+	trigger_payload: Optional[dict] = None
+	action_payload: Optional[dict] = None
+	active: Optional[bool] = None
+	batch_window_seconds: Optional[float] = Field(None, gt=0)
+	batch_max_size: Optional[int] = Field(None, ge=1)
 
 
 class AutomationRuleOut(BaseModel):
@@ -126,6 +167,8 @@ class AutomationRuleOut(BaseModel):
 	action_type: ActionType
 	action_payload: Optional[dict]
 	active: bool
+	batch_window_seconds: Optional[float] = None
+	batch_max_size: Optional[int] = None
 	created_at: datetime
 
 	class Config:
@@ -138,7 +181,29 @@ class WebhookLogOut(BaseModel):
 	request_payload: Optional[dict]
 	response_status: Optional[int]
 	response_body: Optional[str]
+	delivery_status: Optional[WebhookDeliveryStatus] = None
+	attempts: int = 1
 	created_at: datetime
 
 	class Config:
 		from_attributes = True
+
+
+# Stats
+class LeadStats(BaseModel):
+	total: int
+	by_status: Dict[str, int]
+	by_source: Dict[str, int]
+	by_assignee: Dict[str, int]
+
+
+class DealBucket(BaseModel):
+	stage: str
+	currency: str
+	count: int
+	value: float
+
+
+class StatsOut(BaseModel):
+	leads: LeadStats
+	deals: List[DealBucket]
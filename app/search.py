@@ -0,0 +1,197 @@
+"""SQLite FTS5 search over contacts and lead activity.
+
+`contacts_fts` indexes name, email, company and phone; `activity_fts` indexes
+activity text, keyed by the activity id. Contact ids are strings, so
+`contact_search_docs` gives each contact a stable integer FTS rowid. Triggers
+keep both indexes in sync on every write path.
+
+Phones are indexed as their digits plus every digit suffix, so a prefix query
+on any run of trailing digits ("4567" or "555-4567") matches.
+"""
+import base64
+import json
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import column, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from . import models
+from .pagination import PageParams
+
+PHONE_SEPARATORS = " -().+/"
+# Longest phone number (E.164) is 15 digits; suffixes shorter than 3 digits are not indexed
+MAX_PHONE_DIGITS = 15
+MIN_PHONE_QUERY_DIGITS = 3
+
+
+def _digits_sql(expr: str) -> str:
+	for char in PHONE_SEPARATORS:
+		expr = f"replace({expr}, '{char}', '')"
+	return expr
+
+
+def _phone_tokens_sql(expr: str) -> str:
+	digits = _digits_sql(f"coalesce({expr}, '')")
+	suffixes = [f"substr({digits}, {start})" for start in range(1, MAX_PHONE_DIGITS - MIN_PHONE_QUERY_DIGITS + 2)]
+	return " || ' ' || ".join(suffixes)
+
+
+_CONTACT_DOC = "(SELECT id FROM contact_search_docs WHERE contact_id = {row}.id)"
+_CONTACT_VALUES = "{row}.name, coalesce({row}.email, ''), coalesce({row}.company, ''), " + _phone_tokens_sql("{row}.phone")
+
+SEARCH_TABLES = {
+	"contacts_fts": "CREATE VIRTUAL TABLE contacts_fts USING fts5(name, email, company, phone, tokenize = 'unicode61')",
+	"activity_fts": "CREATE VIRTUAL TABLE activity_fts USING fts5(text, tokenize = 'unicode61')",
+}
+
+SEARCH_TRIGGERS = {
+	"contacts_search_insert": (
+		"AFTER INSERT ON contacts BEGIN\n"
+		"INSERT INTO contact_search_docs (contact_id) VALUES (NEW.id);\n"
+		f"INSERT INTO contacts_fts (rowid, name, email, company, phone) VALUES ({_CONTACT_DOC.format(row='NEW')}, {_CONTACT_VALUES.format(row='NEW')});\n"
+		"END"
+	),
+	"contacts_search_update": (
+		"AFTER UPDATE OF name, email, company, phone ON contacts BEGIN\n"
+		f"DELETE FROM contacts_fts WHERE rowid = {_CONTACT_DOC.format(row='OLD')};\n"
+		f"INSERT INTO contacts_fts (rowid, name, email, company, phone) VALUES ({_CONTACT_DOC.format(row='NEW')}, {_CONTACT_VALUES.format(row='NEW')});\n"
+		"END"
+	),
+	"contacts_search_delete": (
+		"AFTER DELETE ON contacts BEGIN\n"
+		f"DELETE FROM contacts_fts WHERE rowid = {_CONTACT_DOC.format(row='OLD')};\n"
+		"DELETE FROM contact_search_docs WHERE contact_id = OLD.id;\n"
+		"END"
+	),
+	"activity_search_insert": "AFTER INSERT ON activity_logs BEGIN\nINSERT INTO activity_fts (rowid, text) VALUES (NEW.id, NEW.text);\nEND",
+	"activity_search_update": (
+		"AFTER UPDATE OF text ON activity_logs BEGIN\n"
+		"DELETE FROM activity_fts WHERE rowid = OLD.id;\n"
+		"INSERT INTO activity_fts (rowid, text) VALUES (NEW.id, NEW.text);\n"
+		"END"
+	),
+	"activity_search_delete": "AFTER DELETE ON activity_logs BEGIN\nDELETE FROM activity_fts WHERE rowid = OLD.id;\nEND",
+}
+
+
+def rebuild_search_index(conn: Connection) -> None:
+	"""Repopulate the FTS tables from contacts and activity_logs."""
+	conn.execute(text("DELETE FROM contacts_fts"))
+	conn.execute(text("DELETE FROM contact_search_docs"))
+	conn.execute(text("INSERT INTO contact_search_docs (contact_id) SELECT id FROM contacts"))
+	conn.execute(text(
+		"INSERT INTO contacts_fts (rowid, name, email, company, phone) "
+		f"SELECT d.id, {_CONTACT_VALUES.format(row='c')} FROM contacts c JOIN contact_search_docs d ON d.contact_id = c.id"
+	))
+	conn.execute(text("DELETE FROM activity_fts"))
+	conn.execute(text("INSERT INTO activity_fts (rowid, text) SELECT id, text FROM activity_logs"))
+
+
+def create_search_index(conn: Connection) -> None:
+	"""Create the FTS5 tables and sync triggers, then index existing rows (SQLite only)."""
+	if conn.dialect.name != "sqlite":
+		return
+	for name, ddl in SEARCH_TABLES.items():
+		conn.execute(text(f"DROP TABLE IF EXISTS {name}"))
+		conn.execute(text(ddl))
+	for name, body in SEARCH_TRIGGERS.items():
+		conn.execute(text(f"DROP TRIGGER IF EXISTS {name}"))
+		conn.execute(text(f"CREATE TRIGGER {name} {body}"))
+	rebuild_search_index(conn)
+
+
+def build_match_query(q: str) -> Optional[str]:
+	"""Turn user input into an FTS5 query: every term must match, each as a prefix.
+
+	A chunk made only of digits and phone separators becomes one digit term, so "+1 (555) 12" matches "15551234".
+	"""
+	terms: List[str] = []
+	for chunk in q.split():
+		digits = "".join(char for char in chunk if char not in PHONE_SEPARATORS)
+		if digits.isdigit():
+			terms.append(digits)
+		else:
+			terms.extend(re.findall(r"\w+", chunk))
+	if not terms:
+		return None
+	return " ".join(f'"{term}"*' for term in terms)
+
+
+def _encode_offset(offset: int) -> str:
+	return base64.urlsafe_b64encode(json.dumps({"offset": offset}).encode()).decode().rstrip("=")
+
+
+def _decode_offset(cursor: Optional[str]) -> int:
+	if not cursor:
+		return 0
+	try:
+		offset = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))["offset"]
+		if isinstance(offset, int) and offset >= 0:
+			return offset
+	except Exception:
+		pass
+	raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _ranked_page(db: Session, sql: str, params: Dict[str, Any], page: PageParams) -> Tuple[List[str], Optional[str]]:
+	"""Run a query returning ids in rank order; return one page of ids and the next cursor.
+
+	Ranks move as the index changes, so search pages by offset rather than by keyset.
+	"""
+	if db.get_bind().dialect.name != "sqlite":
+		raise HTTPException(status_code=501, detail="Search requires SQLite FTS5")
+	offset = _decode_offset(page.after)
+	# A TextualSelect is a read, so the session sends it to the read pool rather than the writer
+	stmt = text(f"{sql} LIMIT :limit OFFSET :offset").columns(column("id"))
+	rows = db.execute(stmt, {**params, "limit": page.limit + 1, "offset": offset}).scalars().all()
+	next_cursor = _encode_offset(offset + page.limit) if len(rows) > page.limit else None
+	return list(rows[: page.limit]), next_cursor
+
+
+def _load_in_order(db: Session, model: Any, ids: List[str]) -> List[Any]:
+	if not ids:
+		return []
+	found = {obj.id: obj for obj in db.query(model).filter(model.id.in_(ids))}
+	return [found[obj_id] for obj_id in ids if obj_id in found]
+
+
+def search_contacts(db: Session, q: str, page: PageParams) -> Dict[str, Any]:
+	"""Contacts matching `q` on name, email, company or phone digits, best match first."""
+	match = build_match_query(q)
+	if match is None:
+		return {"items": [], "next_cursor": None}
+	sql = (
+		"SELECT d.contact_id FROM contacts_fts JOIN contact_search_docs d ON d.id = contacts_fts.rowid "
+		"WHERE contacts_fts MATCH :match ORDER BY contacts_fts.rank, d.contact_id"
+	)
+	ids, next_cursor = _ranked_page(db, sql, {"match": match}, page)
+	return {"items": _load_in_order(db, models.Contact, ids), "next_cursor": next_cursor}
+
+
+def search_leads(db: Session, q: str, status: Optional[models.LeadStatus], page: PageParams) -> Dict[str, Any]:
+	"""Leads whose contact or any activity text matches `q`, ranked by their best hit."""
+	match = build_match_query(q)
+	if match is None:
+		return {"items": [], "next_cursor": None}
+	status_filter = "WHERE l.status = :status" if status is not None else ""
+	sql = (
+		"WITH hits AS ("
+		" SELECT l.id AS lead_id, contacts_fts.rank AS score FROM contacts_fts"
+		" JOIN contact_search_docs d ON d.id = contacts_fts.rowid JOIN leads l ON l.contact_id = d.contact_id"
+		" WHERE contacts_fts MATCH :match"
+		" UNION ALL"
+		" SELECT a.lead_id, activity_fts.rank FROM activity_fts JOIN activity_logs a ON a.id = activity_fts.rowid"
+		" WHERE activity_fts MATCH :match"
+		") "
+		f"SELECT h.lead_id FROM hits h JOIN leads l ON l.id = h.lead_id {status_filter} "
+		"GROUP BY h.lead_id ORDER BY MIN(h.score), h.lead_id"
+	)
+	params: Dict[str, Any] = {"match": match}
+	if status is not None:
+		# Enum columns store the member name
+		params["status"] = status.name
+	ids, next_cursor = _ranked_page(db, sql, params, page)
+	return {"items": _load_in_order(db, models.Lead, ids), "next_cursor": next_cursor}
@@ -0,0 +1,70 @@
+"""Due-time queue for time_wait rules.
+
+`time_wait_due` holds one row per (active time_wait rule, lead) with the
+moment the lead goes stale: `last_touch_at + hours_without_touch`, or at once
+for a lead that was never touched. Triggers recompute a lead's rows whenever
+its `last_touch_at` or status changes (every activity write path touches the
+lead) and a rule's rows whenever the rule changes, so the scheduler only reads
+the head of the `due_at` index and can sleep until it.
+
+Leads that already fired for their current touch are left out, so editing or
+re-enabling a rule does not fire it again for the same stale period.
+"""
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+# Enum columns store the member name, which matches the value for LeadStatus and TriggerType
+_RULE_MATCHES = (
+	"r.active = 1 AND r.trigger_type = 'time_wait' "
+	"AND coalesce(json_extract(r.trigger_payload, '$.entity'), 'lead') = 'lead' "
+	"AND (coalesce(json_extract(r.trigger_payload, '$.status'), '') = '' OR json_extract(r.trigger_payload, '$.status') = {lead}.status) "
+	"AND NOT EXISTS (SELECT 1 FROM time_wait_firings f WHERE f.rule_id = r.id AND f.lead_id = {lead}.id AND f.touch_at IS {lead}.last_touch_at)"
+)
+# datetime() drops fractional seconds, so entries come due up to a second early
+_DUE_AT = (
+	"CASE WHEN {lead}.last_touch_at IS NULL THEN {lead}.created_at "
+	"ELSE datetime({lead}.last_touch_at, '+' || coalesce(nullif(json_extract(r.trigger_payload, '$.hours_without_touch'), 0), 24) || ' hours') END"
+)
+
+
+def _enqueue_sql(lead: str, where: str) -> str:
+	return (
+		f"INSERT INTO time_wait_due (rule_id, lead_id, due_at) SELECT r.id, {lead}.id, {_DUE_AT.format(lead=lead)} "
+		f"FROM automation_rules r{', leads l' if lead == 'l' else ''} WHERE {where} AND {_RULE_MATCHES.format(lead=lead)};\n"
+	)
+
+
+TIME_WAIT_DUE_TRIGGERS = {
+	"time_wait_due_lead_insert": f"AFTER INSERT ON leads BEGIN\n{_enqueue_sql('NEW', '1')}END",
+	"time_wait_due_lead_update": (
+		"AFTER UPDATE OF last_touch_at, status ON leads "
+		"WHEN OLD.last_touch_at IS NOT NEW.last_touch_at OR OLD.status IS NOT NEW.status BEGIN\n"
+		"DELETE FROM time_wait_due WHERE lead_id = NEW.id;\n"
+		f"{_enqueue_sql('NEW', '1')}END"
+	),
+	"time_wait_due_lead_delete": "AFTER DELETE ON leads BEGIN\nDELETE FROM time_wait_due WHERE lead_id = OLD.id;\nEND",
+	"time_wait_due_rule_insert": f"AFTER INSERT ON automation_rules BEGIN\n{_enqueue_sql('l', 'r.id = NEW.id')}END",
+	"time_wait_due_rule_update": (
+		"AFTER UPDATE OF active, trigger_type, trigger_payload ON automation_rules "
+		"WHEN OLD.active IS NOT NEW.active OR OLD.trigger_type IS NOT NEW.trigger_type OR OLD.trigger_payload IS NOT NEW.trigger_payload BEGIN\n"
+		"DELETE FROM time_wait_due WHERE rule_id = NEW.id;\n"
+		f"{_enqueue_sql('l', 'r.id = NEW.id')}END"
+	),
+	"time_wait_due_rule_delete": "AFTER DELETE ON automation_rules BEGIN\nDELETE FROM time_wait_due WHERE rule_id = OLD.id;\nEND",
+}
+
+
+def rebuild_time_wait_queue(conn: Connection) -> None:
+	"""Recompute every due entry from the rules, leads and firings."""
+	conn.execute(text("DELETE FROM time_wait_due"))
+	conn.execute(text(_enqueue_sql("l", "1")))
+
+
+def create_time_wait_queue(conn: Connection) -> None:
+	"""Create the sync triggers and fill the queue (SQLite only; elsewhere the queue stays empty and time_wait rules never fire)."""
+	if conn.dialect.name != "sqlite":
+		return
+	for name, body in TIME_WAIT_DUE_TRIGGERS.items():
+		conn.execute(text(f"DROP TRIGGER IF EXISTS {name}"))
+		conn.execute(text(f"CREATE TRIGGER {name} {body}"))
+	rebuild_time_wait_queue(conn)
@@ -0,0 +1,198 @@
+from __future__ import annotations
+import atexit
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from .models import WebhookDeliveryStatus, WebhookLog
+
+WEBHOOK_TIMEOUT_SECONDS = float(os.getenv("WEBHOOK_TIMEOUT_SECONDS", "5.0"))
+WEBHOOK_MAX_CONNECTIONS = int(os.getenv("WEBHOOK_MAX_CONNECTIONS", "100"))
+WEBHOOK_PER_HOST_CONCURRENCY = int(os.getenv("WEBHOOK_PER_HOST_CONCURRENCY", "8"))
+WEBHOOK_MAX_RETRIES = int(os.getenv("WEBHOOK_MAX_RETRIES", "3"))
+WEBHOOK_BACKOFF_SECONDS = float(os.getenv("WEBHOOK_BACKOFF_SECONDS", "0.5"))
+WEBHOOK_MAX_BACKOFF_SECONDS = float(os.getenv("WEBHOOK_MAX_BACKOFF_SECONDS", "30"))
+WEBHOOK_HTTP2 = os.getenv("WEBHOOK_HTTP2", "0") == "1"
+WEBHOOK_LOG_BATCH_SIZE = int(os.getenv("WEBHOOK_LOG_BATCH_SIZE", "50"))
+WEBHOOK_LOG_FLUSH_SECONDS = float(os.getenv("WEBHOOK_LOG_FLUSH_SECONDS", "1.0"))
+
+RETRYABLE_STATUS_CODES = {408, 425, 429, 500, 502, 503, 504}
+
+
+@dataclass
+class DeliveryResult:
+	status_code: int
+	body: str
+	attempts: int
+	delivery_status: WebhookDeliveryStatus
+
+
+def _http2_available() -> bool:
+	try:
+		import h2  # noqa: F401
+	except ImportError:
+		return False
+	return True
+
+
+class WebhookDeliverer:
+	"""Delivers webhooks over one pooled keep-alive client shared by all workers."""
+
+	def __init__(
+		self,
+		max_retries: int = WEBHOOK_MAX_RETRIES,
+		backoff_seconds: float = WEBHOOK_BACKOFF_SECONDS,
+		per_host_concurrency: int = WEBHOOK_PER_HOST_CONCURRENCY,
+		transport: Optional[httpx.BaseTransport] = None,
+	):
+		self.max_retries = max_retries
+		self.backoff_seconds = backoff_seconds
+		self.per_host_concurrency = per_host_concurrency
+		self._client = httpx.Client(
+			timeout=WEBHOOK_TIMEOUT_SECONDS,
+			limits=httpx.Limits(max_connections=WEBHOOK_MAX_CONNECTIONS, max_keepalive_connections=WEBHOOK_MAX_CONNECTIONS),
+			http2=WEBHOOK_HTTP2 and _http2_available(),
+			transport=transport,
+		)
+		self._host_slots: Dict[str, threading.BoundedSemaphore] = {}
+		self._lock = threading.Lock()
+
+	def deliver(self, method: str, url: str, payload: Dict[str, Any]) -> DeliveryResult:
+		attempts = 0
+		while True:
+			attempts += 1
+			retry_after: Optional[float] = None
+			try:
+				with self._host_slot(url):
+					resp = self._client.request(method, url, json=payload)
+				status_code, body = resp.status_code, resp.text
+				if status_code < 400:
+					return DeliveryResult(status_code, body, attempts, WebhookDeliveryStatus.delivered)
+				if status_code not in RETRYABLE_STATUS_CODES:
+					return DeliveryResult(status_code, body, attempts, WebhookDeliveryStatus.failed)
+				retry_after = _parse_retry_after(resp.headers.get("Retry-After"))
+			except (httpx.UnsupportedProtocol, httpx.InvalidURL) as exc:
+				return DeliveryResult(0, str(exc), attempts, WebhookDeliveryStatus.failed)
+			except (httpx.TransportError, httpx.TimeoutException) as exc:
+				status_code, body = 0, str(exc)
+			except httpx.HTTPError as exc:
+				return DeliveryResult(0, str(exc), attempts, WebhookDeliveryStatus.failed)
+			if attempts > self.max_retries:
+				return DeliveryResult(status_code, body, attempts, WebhookDeliveryStatus.dead_letter)
+			time.sleep(self._backoff(attempts, retry_after))
+
+	def close(self) -> None:
+		self._client.close()
+
+	def _host_slot(self, url: str) -> threading.BoundedSemaphore:
+		host = httpx.URL(url).host
+		with self._lock:
+			slot = self._host_slots.get(host)
+			if slot is None:
+				slot = threading.BoundedSemaphore(self.per_host_concurrency)
+				self._host_slots[host] = slot
+			return slot
+
+	def _backoff(self, attempt: int, retry_after: Optional[float]) -> float:
+		if retry_after is not None:
+			return min(retry_after, WEBHOOK_MAX_BACKOFF_SECONDS)
+		delay = self.backoff_seconds * (2 ** (attempt - 1))
+		return min(delay, WEBHOOK_MAX_BACKOFF_SECONDS) * random.uniform(0.5, 1.0)
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+	try:
+		return max(0.0, float(value)) if value is not None else None
+	except ValueError:
+		return None
+
+
+class WebhookLogWriter:
+	"""Buffers webhook log rows and inserts them in batches from a background thread."""
+
+	def __init__(self, open_session: Callable[[], Session], batch_size: int = WEBHOOK_LOG_BATCH_SIZE, flush_seconds: float = WEBHOOK_LOG_FLUSH_SECONDS):
+		self.open_session = open_session
+		self.batch_size = batch_size
+		self.flush_seconds = flush_seconds
+		self._buffer: List[Dict[str, Any]] = []
+		self._cond = threading.Condition()
+		self._stopping = False
+		self._thread: Optional[threading.Thread] = None
+
+	def start(self) -> None:
+		self._thread = threading.Thread(target=self._run, name="webhook-log-writer", daemon=True)
+		self._thread.start()
+
+	def stop(self) -> None:
+		with self._cond:
+			self._stopping = True
+			self._cond.notify()
+		if self._thread:
+			self._thread.join(5.0)
+		self.flush()
+
+	def add(self, **row: Any) -> None:
+		row.setdefault("created_at", datetime.utcnow())
+		with self._cond:
+			self._buffer.append(row)
+			if len(self._buffer) >= self.batch_size:
+				self._cond.notify()
+
+	def flush(self) -> None:
+		with self._cond:
+			rows, self._buffer = self._buffer, []
+		if not rows:
+			return
+		try:
+			with self.open_session() as db:
+				db.execute(insert(WebhookLog), rows)
+				db.commit()
+		except Exception:
+			with self._cond:
+				self._buffer[:0] = rows
+			raise
+
+	def _run(self) -> None:
+		while not self._stopping:
+			with self._cond:
+				if len(self._buffer) < self.batch_size and not self._stopping:
+					self._cond.wait(self.flush_seconds)
+			try:
+				self.flush()
+			except Exception:
+				pass
+
+
+_deliverer: Optional[WebhookDeliverer] = None
+_deliverer_lock = threading.Lock()
+_log_writer: Optional[WebhookLogWriter] = None
+
+
+def get_deliverer() -> WebhookDeliverer:
+	global _deliverer
+	with _deliverer_lock:
+		if _deliverer is None:
+			_deliverer = WebhookDeliverer()
+		return _deliverer
+
+
+def get_log_writer() -> Optional[WebhookLogWriter]:
+	return _log_writer
+
+
+def start_webhook_delivery(open_session: Callable[[], Session]) -> None:
+	"""Start the batched webhook log writer; without it logs are written inline."""
+	global _log_writer
+	if _log_writer:
+		return
+	_log_writer = WebhookLogWriter(open_session)
+	_log_writer.start()
+	atexit.register(_log_writer.stop)
@@ -0,0 +1,119 @@
+"""Requests/sec and latency of DB_MODE=sync vs DB_MODE=async over uvicorn.
+
+Each mode gets a fresh database seeded through the bulk endpoints, then a
+fixed mix of list, get and create requests is driven at a given concurrency.
+
+	python -m benchmarks.api_modes --concurrency 64 --seconds 15
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+import httpx
+
+HEADERS = {"Authorization": "Bearer demo-token"}
+
+
+def _free_port() -> int:
+	with socket.socket() as sock:
+		sock.bind(("127.0.0.1", 0))
+		return sock.getsockname()[1]
+
+
+def _start_server(mode: str, port: int, url: Optional[str] = None) -> subprocess.Popen:
+	env = dict(os.environ, DB_MODE=mode, DATABASE_URL=url or f"sqlite:///{tempfile.mkdtemp()}/bench.db")
+	proc = subprocess.Popen(
+		[sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+		env=env,
+	)
+	for _ in range(100):
+		try:
+			httpx.get(f"http://127.0.0.1:{port}/health")
+			return proc
+		except httpx.TransportError:
+			time.sleep(0.1)
+	proc.kill()
+	raise RuntimeError(f"uvicorn did not start for DB_MODE={mode}")
+
+
+def _seed(base: str, contacts: int, leads: int) -> List[str]:
+	with httpx.Client(base_url=base, headers=HEADERS, timeout=60) as client:
+		client.post("/contacts/bulk", json=[{"name": f"Contact {i}", "phone": str(i)} for i in range(contacts)])
+		ids = [c["id"] for c in client.get("/contacts/", params={"limit": 500}).json()["items"]]
+		client.post("/leads/bulk", params={"dispatch": "false"}, json=[
+			{"contact_id": random.choice(ids), "source": "ad", "assigned_to": "bench"} for _ in range(leads)
+		])
+	return ids
+
+
+def _percentile(samples: List[float], pct: float) -> float:
+	ordered = sorted(samples)
+	return ordered[min(len(ordered) - 1, int(len(ordered) * pct))] * 1000 if ordered else 0.0
+
+
+async def _drive(base: str, contact_ids: List[str], concurrency: int, seconds: float) -> Dict[str, List[float]]:
+	latencies: Dict[str, List[float]] = {"list_leads": [], "get_contact": [], "create_contact": []}
+	deadline = time.monotonic() + seconds
+	limits = httpx.Limits(max_connections=concurrency)
+
+	async with httpx.AsyncClient(base_url=base, headers=HEADERS, limits=limits, timeout=30) as client:
+		async def worker() -> None:
+			while time.monotonic() < deadline:
+				roll = random.random()
+				start = time.perf_counter()
+				if roll < 0.6:
+					name = "list_leads"
+					await client.get("/leads/", params={"limit": 50, "status": "new"})
+				elif roll < 0.8:
+					name = "get_contact"
+					await client.get(f"/contacts/{random.choice(contact_ids)}")
+				else:
+					name = "create_contact"
+					await client.post("/contacts/", json={"name": "bench", "phone": "0"})
+				latencies[name].append(time.perf_counter() - start)
+
+		await asyncio.gather(*(worker() for _ in range(concurrency)))
+	return latencies
+
+
+def run(mode: str, concurrency: int, seconds: float, contacts: int, leads: int) -> dict:
+	port = _free_port()
+	proc = _start_server(mode, port)
+	try:
+		base = f"http://127.0.0.1:{port}"
+		contact_ids = _seed(base, contacts, leads)
+		latencies = asyncio.run(_drive(base, contact_ids, concurrency, seconds))
+	finally:
+		proc.terminate()
+		proc.wait()
+	samples = [value for values in latencies.values() for value in values]
+	return {
+		"mode": mode,
+		"requests_per_sec": round(len(samples) / seconds, 1),
+		"p50_ms": round(_percentile(samples, 0.50), 2),
+		"p99_ms": round(_percentile(samples, 0.99), 2),
+		"per_endpoint_p99_ms": {name: round(_percentile(values, 0.99), 2) for name, values in latencies.items()},
+	}
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument("--concurrency", type=int, default=64)
+	parser.add_argument("--seconds", type=float, default=15.0)
+	parser.add_argument("--contacts", type=int, default=2000)
+	parser.add_argument("--leads", type=int, default=20000)
+	args = parser.parse_args()
+	for mode in ("sync", "async"):
+		print(json.dumps(run(mode, args.concurrency, args.seconds, args.contacts, args.leads)))
+
+
+if __name__ == "__main__":
+	main()
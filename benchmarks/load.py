@@ -0,0 +1,339 @@
+"""Seeded load test of the API with per-endpoint latency and query counts.
+
+Seeds a database with the requested volumes, then drives a mixed workload
+(create_lead with on_create automations, list_leads with filters, activity
+posts and periodic time_wait scans) against the app in-process and over
+uvicorn. Results are written as JSON so runs can be compared across commits.
+
+	python -m benchmarks.load --contacts 5000 --leads 50000 --seconds 20 --output bench.json
+	python -m benchmarks.load --baseline bench-main.json
+
+Query counts are only available in-process, where the benchmark shares the
+app's engines. time_wait scans run in the benchmark process against the same
+database file in both targets, since the scheduler has no HTTP trigger.
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import subprocess
+import tempfile
+import time
+from contextvars import ContextVar
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import httpx
+from sqlalchemy import event, insert
+
+from .api_modes import HEADERS, _free_port, _percentile, _start_server
+
+SEED_CHUNK_SIZE = 5000
+WORKLOAD = [("create_lead", 0.2), ("list_leads", 0.5), ("post_activity", 0.3)]
+STATUSES = ["new", "contacted", "qualified", "unqualified"]
+
+# Per-request query counter, shared with the threadpool through the copied context
+_query_counter: ContextVar[Optional[List[int]]] = ContextVar("benchmark_query_counter", default=None)
+
+
+def seed(url: str, contacts: int, leads: int, activities: int, rules: int) -> Dict[str, List[str]]:
+	"""Populate a fresh database at `url`; return sample contact and lead ids for the workload."""
+	from app.database import create_engines
+	from app.migrations import run_migrations
+	from app.models import (
+		ActionType, ActivityLog, ActivityType, AutomationRule, Contact, Lead, LeadSource, LeadStatus,
+		TriggerType, generate_uuid_str,
+	)
+
+	write_engine, _ = create_engines(url)
+	run_migrations(write_engine)
+	now = datetime.utcnow()
+	rng = random.Random(42)
+
+	def insert_chunked(table: Any, rows: List[Dict[str, Any]]) -> None:
+		with write_engine.begin() as conn:
+			for start in range(0, len(rows), SEED_CHUNK_SIZE):
+				conn.execute(insert(table), rows[start:start + SEED_CHUNK_SIZE])
+
+	contact_ids = [generate_uuid_str() for _ in range(contacts)]
+	insert_chunked(Contact, [
+		{"id": cid, "name": f"Contact {i}", "phone": f"+1555{i:07d}", "created_at": now, "updated_at": now}
+		for i, cid in enumerate(contact_ids)
+	])
+	lead_ids = [generate_uuid_str() for _ in range(leads)]
+	insert_chunked(Lead, [
+		{
+			"id": lid,
+			"contact_id": rng.choice(contact_ids),
+			"source": rng.choice(list(LeadSource)),
+			"status": rng.choice(list(LeadStatus)),
+			"assigned_to": f"agent{rng.randrange(10)}",
+			# Spread over three days so the time_wait rule has stale leads to fire on
+			"created_at": now - timedelta(minutes=rng.randrange(72 * 60)),
+			"last_touch_at": now - timedelta(minutes=rng.randrange(72 * 60)),
+			"updated_at": now,
+		}
+		for lid in lead_ids
+	])
+	insert_chunked(ActivityLog, [
+		{
+			"lead_id": rng.choice(lead_ids),
+			"activity_type": rng.choice(list(ActivityType)),
+			"text": "seeded",
+			"created_by": "bench",
+			"created_at": now - timedelta(minutes=rng.randrange(72 * 60)),
+		}
+		for _ in range(activities)
+	])
+	rule_rows = [
+		{
+			"name": f"bench on_create {i}",
+			"trigger_type": TriggerType.on_create,
+			"trigger_payload": {"entity": "lead"},
+			"action_type": ActionType.create_activity,
+			"action_payload": {"activity_type": "note", "text": f"auto {i}"},
+			"active": True,
+			"created_at": now,
+		}
+		for i in range(max(rules - 1, 0))
+	]
+	if rules:
+		rule_rows.append({
+			"name": "bench time_wait",
+			"trigger_type": TriggerType.time_wait,
+			"trigger_payload": {"entity": "lead", "status": "new", "hours_without_touch": 24},
+			"action_type": ActionType.create_activity,
+			"action_payload": {"activity_type": "note", "text": "follow up"},
+			"active": True,
+			"created_at": now,
+		})
+		insert_chunked(AutomationRule, rule_rows)
+	write_engine.dispose()
+	return {"contact_ids": contact_ids[:1000], "lead_ids": lead_ids[:1000]}
+
+
+def _request(op: str, ids: Dict[str, List[str]], rng: random.Random) -> Tuple[str, str, Dict[str, Any]]:
+	if op == "create_lead":
+		body = {"contact_id": rng.choice(ids["contact_ids"]), "source": "ad", "assigned_to": "bench"}
+		return "POST", "/leads/", {"json": body}
+	if op == "list_leads":
+		params: Dict[str, Any] = {"limit": 50}
+		if rng.random() < 0.5:
+			params["status"] = rng.choice(STATUSES)
+		return "GET", "/leads/", {"params": params}
+	body = {"activity_type": "call", "text": "bench call", "created_by": "bench"}
+	return "POST", f"/leads/{rng.choice(ids['lead_ids'])}/activity", {"json": body}
+
+
+class _Recorder:
+	def __init__(self) -> None:
+		self.latencies: Dict[str, List[float]] = {}
+		self.queries: Dict[str, List[int]] = {}
+		self.errors: Dict[str, int] = {}
+
+	def record(self, op: str, seconds: float, ok: bool, queries: Optional[int]) -> None:
+		self.latencies.setdefault(op, []).append(seconds)
+		self.errors[op] = self.errors.get(op, 0) + (0 if ok else 1)
+		if queries is not None:
+			self.queries.setdefault(op, []).append(queries)
+
+	def summary(self, seconds: float) -> Dict[str, Any]:
+		endpoints = {}
+		for op, samples in sorted(self.latencies.items()):
+			counts = self.queries.get(op)
+			endpoints[op] = {
+				"count": len(samples),
+				"errors": self.errors[op],
+				"per_sec": round(len(samples) / seconds, 1),
+				"p50_ms": round(_percentile(samples, 0.50), 2),
+				"p95_ms": round(_percentile(samples, 0.95), 2),
+				"p99_ms": round(_percentile(samples, 0.99), 2),
+				"queries_per_request": round(sum(counts) / len(counts), 2) if counts else None,
+			}
+		total = sum(len(samples) for op, samples in self.latencies.items() if op != "time_wait_scan")
+		return {"requests_per_sec": round(total / seconds, 1), "endpoints": endpoints}
+
+
+async def _drive(
+	client: httpx.AsyncClient,
+	ids: Dict[str, List[str]],
+	scan: Callable[[], None],
+	concurrency: int,
+	seconds: float,
+	scan_interval: float,
+	count_queries: bool,
+) -> Dict[str, Any]:
+	recorder = _Recorder()
+	deadline = time.monotonic() + seconds
+	ops, weights = zip(*WORKLOAD)
+
+	async def timed(op: str, call: Callable[[], Any]) -> None:
+		counter = [0] if count_queries else None
+		_query_counter.set(counter)
+		start = time.perf_counter()
+		try:
+			ok = await call()
+		except Exception:
+			ok = False
+		recorder.record(op, time.perf_counter() - start, ok, counter[0] if counter else None)
+
+	async def worker(seed_value: int) -> None:
+		rng = random.Random(seed_value)
+		while time.monotonic() < deadline:
+			op = rng.choices(ops, weights)[0]
+			method, path, kwargs = _request(op, ids, rng)
+
+			async def call(method=method, path=path, kwargs=kwargs) -> bool:
+				return (await client.request(method, path, **kwargs)).status_code < 400
+
+			await timed(op, call)
+
+	async def scanner() -> None:
+		while time.monotonic() < deadline:
+			async def call() -> bool:
+				await asyncio.to_thread(scan)
+				return True
+
+			await timed("time_wait_scan", call)
+			await asyncio.sleep(scan_interval)
+
+	await asyncio.gather(scanner(), *(worker(i) for i in range(concurrency)))
+	return recorder.summary(seconds)
+
+
+def _count_queries(conn, cursor, statement, parameters, context, executemany) -> None:
+	counter = _query_counter.get()
+	if counter is not None:
+		counter[0] += 1
+
+
+def _inprocess(url: str, ids: Dict[str, List[str]], args: Dict[str, Any], results) -> None:
+	# Runs in a spawned process so the app module binds to the seeded database; the benchmark drives time_wait ticks itself
+	os.environ.update(DATABASE_URL=url, DB_MODE=args["db_mode"], SCHEDULER_MODE="off")
+	from app import database
+	from app.automation_engine import _run_time_wait_rules
+	from app.main import app
+
+	engines = {database.engine, database.read_engine}
+	if database.AsyncSessionLocal is not None:
+		engines |= {database.async_engine.sync_engine, database.async_read_engine.sync_engine}
+	for engine in engines:
+		event.listen(engine, "before_cursor_execute", _count_queries)
+
+	async def run() -> Dict[str, Any]:
+		transport = httpx.ASGITransport(app=app)
+		async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=HEADERS, timeout=60) as client:
+			return await _drive(
+				client, ids, lambda: _run_time_wait_rules(database.SessionLocal),
+				args["concurrency"], args["seconds"], args["scan_interval"], count_queries=True,
+			)
+
+	results.put(asyncio.run(run()))
+
+
+def _uvicorn(url: str, ids: Dict[str, List[str]], args: Dict[str, Any]) -> Dict[str, Any]:
+	from app.automation_engine import _run_time_wait_rules
+	from app.database import RoutingSession, create_engines
+
+	write_engine, read_engine = create_engines(url)
+
+	class ScanSession(RoutingSession):
+		write_bind = write_engine
+		read_bind = read_engine
+
+	port = _free_port()
+	# The benchmark drives time_wait ticks itself, so the server must not fire them too
+	os.environ["SCHEDULER_MODE"] = "off"
+	proc = _start_server(args["db_mode"], port, url)
+	try:
+		async def run() -> Dict[str, Any]:
+			limits = httpx.Limits(max_connections=args["concurrency"])
+			async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", headers=HEADERS, limits=limits, timeout=60) as client:
+				return await _drive(
+					client, ids, lambda: _run_time_wait_rules(ScanSession),
+					args["concurrency"], args["seconds"], args["scan_interval"], count_queries=False,
+				)
+
+		return asyncio.run(run())
+	finally:
+		proc.terminate()
+		proc.wait()
+		write_engine.dispose()
+		read_engine.dispose()
+
+
+def _git_commit() -> Optional[str]:
+	try:
+		return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+	except (OSError, subprocess.CalledProcessError):
+		return None
+
+
+def run(args: Dict[str, Any]) -> Dict[str, Any]:
+	report: Dict[str, Any] = {
+		"commit": _git_commit(),
+		"started_at": datetime.utcnow().isoformat(),
+		"config": args,
+		"targets": {},
+	}
+	for target in args["targets"]:
+		# A freshly seeded database per target keeps runs independent
+		url = f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+		ids = seed(url, args["contacts"], args["leads"], args["activities"], args["rules"])
+		if target == "inprocess":
+			ctx = multiprocessing.get_context("spawn")
+			results = ctx.Queue()
+			proc = ctx.Process(target=_inprocess, args=(url, ids, args, results))
+			proc.start()
+			report["targets"][target] = results.get()
+			proc.join()
+		else:
+			report["targets"][target] = _uvicorn(url, ids, args)
+	return report
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any]) -> None:
+	"""Print per-endpoint throughput and p99 changes against a previous report."""
+	for target, result in report["targets"].items():
+		base = baseline.get("targets", {}).get(target)
+		if not base:
+			continue
+		for op, stats in result["endpoints"].items():
+			before = base["endpoints"].get(op)
+			if not before:
+				continue
+			print(
+				f"{target:10} {op:15} per_sec {before['per_sec']:>8} -> {stats['per_sec']:<8} "
+				f"p99_ms {before['p99_ms']:>9} -> {stats['p99_ms']}"
+			)
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument("--contacts", type=int, default=2000)
+	parser.add_argument("--leads", type=int, default=20000)
+	parser.add_argument("--activities", type=int, default=50000)
+	parser.add_argument("--rules", type=int, default=5, help="on_create rules plus one time_wait rule")
+	parser.add_argument("--concurrency", type=int, default=32)
+	parser.add_argument("--seconds", type=float, default=15.0)
+	parser.add_argument("--scan-interval", type=float, default=2.0)
+	parser.add_argument("--targets", nargs="+", choices=["inprocess", "uvicorn"], default=["inprocess", "uvicorn"])
+	parser.add_argument("--db-mode", choices=["sync", "async"], default=os.getenv("DB_MODE", "sync"))
+	parser.add_argument("--output", default="bench.json")
+	parser.add_argument("--baseline", help="previous report to compare against")
+	args = vars(parser.parse_args())
+	output, baseline = args.pop("output"), args.pop("baseline")
+
+	report = run(args)
+	with open(output, "w") as fh:
+		json.dump(report, fh, indent=2)
+	print(json.dumps(report["targets"], indent=2))
+	if baseline:
+		with open(baseline) as fh:
+			compare(report, json.load(fh))
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,117 @@
+"""Rows/sec and peak memory of list-page serialization paths.
+
+Pages through every lead with keyset pagination, building the JSON body of
+each page the way `GET /leads/` does:
+
+- response_model: ORM objects validated through `Page[LeadOut]` with from_attributes
+- core_typeadapter: Core column rows through a pydantic TypeAdapter (used without orjson)
+- core_orjson: Core column rows dumped by orjson (used when it is installed)
+
+	python -m benchmarks.serialization --leads 20000 --limit 500
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app import fast_json, models, schemas
+from app.database import create_engines
+from app.fast_json import page_json, row_select
+from app.migrations import run_migrations
+from app.pagination import PageParams, paginate, paginate_rows
+
+PageBuilder = Callable[[Session, PageParams], dict]
+
+
+def seed(engine, leads: int) -> None:
+	now = datetime.utcnow()
+	with Session(engine) as db:
+		contact_id = models.generate_uuid_str()
+		db.execute(insert(models.Contact).values(id=contact_id, name="bench", phone="0", created_at=now, updated_at=now))
+		for start in range(0, leads, 5000):
+			db.execute(insert(models.Lead), [
+				{
+					"id": models.generate_uuid_str(),
+					"contact_id": contact_id,
+					"source": models.LeadSource.organic,
+					"status": models.LeadStatus.new,
+					"assigned_to": "bench",
+					"created_at": now - timedelta(seconds=i),
+					"last_touch_at": now - timedelta(seconds=i) if i % 2 else None,
+					"updated_at": now,
+				}
+				for i in range(start, min(start + 5000, leads))
+			])
+		db.commit()
+
+
+def response_model_page(db: Session, page: PageParams) -> dict:
+	result = paginate(db.query(models.Lead), models.Lead, page)
+	body = schemas.Page[schemas.LeadOut].model_validate(result, from_attributes=True).model_dump_json().encode()
+	return {"body": body, "rows": len(result["items"]), "next_cursor": result["next_cursor"]}
+
+
+def core_page(db: Session, page: PageParams) -> dict:
+	result = paginate_rows(db, row_select(models.Lead, schemas.LeadOut), models.Lead, page)
+	return {"body": page_json(schemas.LeadOut, result), "rows": len(result["items"]), "next_cursor": result["next_cursor"]}
+
+
+def _walk(engine, build: PageBuilder, limit: int) -> int:
+	"""Page through the whole table; return the number of rows serialized."""
+	rows, after = 0, None
+	with Session(engine) as db:
+		while True:
+			page = build(db, PageParams(limit=limit, after=after))
+			rows += page["rows"]
+			after = page["next_cursor"]
+			if after is None:
+				return rows
+
+
+def measure(engine, name: str, build: PageBuilder, limit: int, seconds: float, use_orjson: Optional[object]) -> dict:
+	saved = fast_json.orjson
+	fast_json.orjson = use_orjson
+	try:
+		_walk(engine, build, limit)  # warm up
+		rows, start = 0, time.perf_counter()
+		while time.perf_counter() - start < seconds:
+			rows += _walk(engine, build, limit)
+		elapsed = time.perf_counter() - start
+		# Peak memory of building one page, measured separately since tracing slows everything down
+		with Session(engine) as db:
+			tracemalloc.start()
+			build(db, PageParams(limit=limit, after=None))
+			_, peak = tracemalloc.get_traced_memory()
+			tracemalloc.stop()
+	finally:
+		fast_json.orjson = saved
+	return {"path": name, "limit": limit, "rows_per_sec": round(rows / elapsed), "peak_page_kib": round(peak / 1024, 1)}
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument("--leads", type=int, default=20000)
+	parser.add_argument("--limit", type=int, default=500, help="page size")
+	parser.add_argument("--seconds", type=float, default=5.0, help="per path")
+	args = parser.parse_args()
+
+	engine, _ = create_engines(f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}")
+	run_migrations(engine)
+	seed(engine, args.leads)
+
+	paths = [("response_model", response_model_page, None), ("core_typeadapter", core_page, None)]
+	if fast_json.orjson is not None:
+		paths.append(("core_orjson", core_page, fast_json.orjson))
+	for name, build, use_orjson in paths:
+		print(json.dumps(measure(engine, name, build, args.limit, args.seconds, use_orjson)))
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,100 @@
+"""Concurrent read/write throughput of the SQLite profiles.
+
+Each process mimics a uvicorn worker: writer threads insert contacts one
+transaction at a time while reader threads page through the newest contacts.
+
+	python -m benchmarks.sqlite_profile --processes 4 --seconds 10
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import insert, select
+
+from app.database import create_engines
+from app.migrations import run_migrations
+from app.models import Contact, generate_uuid_str
+
+
+def _worker(url: str, profile: str, writers: int, readers: int, seconds: float, results) -> None:
+	write_engine, read_engine = create_engines(url, profile)
+	counts = {"writes": 0, "reads": 0, "errors": 0}
+	lock = threading.Lock()
+	deadline = time.monotonic() + seconds
+
+	def write_loop():
+		while time.monotonic() < deadline:
+			now = datetime.utcnow()
+			try:
+				with write_engine.begin() as conn:
+					conn.execute(insert(Contact).values(id=generate_uuid_str(), name="bench", phone="0", created_at=now, updated_at=now))
+				key = "writes"
+			except Exception:
+				key = "errors"
+			with lock:
+				counts[key] += 1
+
+	def read_loop():
+		stmt = select(Contact).order_by(Contact.created_at.desc()).limit(50)
+		while time.monotonic() < deadline:
+			try:
+				with read_engine.connect() as conn:
+					conn.execute(stmt).all()
+				key = "reads"
+			except Exception:
+				key = "errors"
+			with lock:
+				counts[key] += 1
+
+	threads = [threading.Thread(target=write_loop) for _ in range(writers)]
+	threads += [threading.Thread(target=read_loop) for _ in range(readers)]
+	for thread in threads:
+		thread.start()
+	for thread in threads:
+		thread.join()
+	results.put(counts)
+
+
+def run(profile: str, processes: int, writers: int, readers: int, seconds: float) -> dict:
+	path = os.path.join(tempfile.mkdtemp(), "bench.db")
+	url = f"sqlite:///{path}"
+	write_engine, _ = create_engines(url, profile)
+	run_migrations(write_engine)
+	write_engine.dispose()
+
+	results = multiprocessing.Queue()
+	procs = [multiprocessing.Process(target=_worker, args=(url, profile, writers, readers, seconds, results)) for _ in range(processes)]
+	for proc in procs:
+		proc.start()
+	totals = {"writes": 0, "reads": 0, "errors": 0}
+	for _ in procs:
+		for key, value in results.get().items():
+			totals[key] += value
+	for proc in procs:
+		proc.join()
+	return {
+		"profile": profile,
+		"writes_per_sec": round(totals["writes"] / seconds, 1),
+		"reads_per_sec": round(totals["reads"] / seconds, 1),
+		"errors": totals["errors"],
+	}
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument("--processes", type=int, default=4)
+	parser.add_argument("--writers", type=int, default=4, help="writer threads per process")
+	parser.add_argument("--readers", type=int, default=4, help="reader threads per process")
+	parser.add_argument("--seconds", type=float, default=10.0)
+	args = parser.parse_args()
+	for profile in ("default", "production"):
+		print(json.dumps(run(profile, args.processes, args.writers, args.readers, args.seconds)))
+
+
+if __name__ == "__main__":
+	main()
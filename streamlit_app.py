@@ -74,6 +74,23 @@ with st.form("create_lead"):
 		else:
 			st.error(resp.text)
 
+st.header("Dashboard")
+try:
+	resp = requests.get(f"{api_base}/stats", headers=headers)
+	if resp.status_code == 200:
+		stats = resp.json()
+		cols = st.columns(4)
+		cols[0].metric("Leads", stats["leads"]["total"])
+		for col, status in zip(cols[1:], ["new", "contacted", "qualified"]):
+			col.metric(status.title(), stats["leads"]["by_status"].get(status, 0))
+		st.write({"by_source": stats["leads"]["by_source"], "by_assignee": stats["leads"]["by_assignee"]})
+		st.subheader("Pipeline")
+		st.table(stats["deals"])
+	else:
+		st.warning(resp.text)
+except Exception as e:
+	st.warning(str(e))
+
 st.header("Leads")
 status_filter = st.selectbox("Filter by status", options=["", "new", "contacted", "qualified", "unqualified"], index=0)
 params = {}
@@ -82,7 +99,7 @@ if status_filter:
 try:
 	resp = requests.get(f"{api_base}/leads/", params=params, headers=headers)
 	if resp.status_code == 200:
-		leads = resp.json()
+		leads = resp.json()["items"]
 		st.write(leads)
 	else:
 		st.warning(resp.text)
@@ -0,0 +1,63 @@
+import os
+import tempfile
+
+# The app binds its engines at import time, so point it at a scratch database first
+_tmp = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp}/app.db"
+os.environ["SCHEDULER_MODE"] = "off"
+os.environ["AUTOMATION_WORKERS"] = "0"
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app import models
+from app.database import RoutingSession, create_engines
+from app.migrations import run_migrations
+
+HEADERS = {"Authorization": "Bearer demo-token"}
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+	"""Sessions on a fresh, migrated database with the production writer/reader split."""
+	write_engine, read_engine = create_engines(f"sqlite:///{tmp_path}/test.db")
+	run_migrations(write_engine)
+
+	class TestSession(RoutingSession):
+		write_bind = write_engine
+		read_bind = read_engine
+
+	yield sessionmaker(class_=TestSession, autocommit=False, autoflush=False)
+	write_engine.dispose()
+	read_engine.dispose()
+
+
+@pytest.fixture
+def db(session_factory):
+	with session_factory() as session:
+		yield session
+
+
+@pytest.fixture(scope="session")
+def client():
+	from fastapi.testclient import TestClient
+
+	from app.main import app
+
+	with TestClient(app, headers=HEADERS) as test_client:
+		yield test_client
+
+
+def make_contact(db) -> models.Contact:
+	contact = models.Contact(name="Test", phone="5550000")
+	db.add(contact)
+	db.flush()
+	return contact
+
+
+def make_lead(db, contact=None, **fields) -> models.Lead:
+	contact = contact or make_contact(db)
+	lead = models.Lead(contact_id=contact.id, source=models.LeadSource.ad, assigned_to="rep", **fields)
+	db.add(lead)
+	db.flush()
+	return lead
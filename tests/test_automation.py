@@ -0,0 +1,33 @@
+from sqlalchemy import func, select
+
+from app import automation_engine, models
+from app.database import SessionLocal
+
+
+def _rule(client) -> int:
+	response = client.post(
+		"/automation/rules",
+		json={"name": "manual", "trigger_type": "on_create", "trigger_payload": {"entity": "lead"}, "action_type": "create_activity", "action_payload": {"text": "manual run"}},
+	)
+	assert response.status_code == 201
+	return response.json()["id"]
+
+
+def test_execute_reports_failed_action(client, monkeypatch):
+	def crash(db, rule, payload):
+		db.add(models.WebhookLog(automation_rule_id=rule.id, response_status=200))
+		db.flush()
+		raise RuntimeError("lead is gone")
+
+	rule_id = _rule(client)
+	monkeypatch.setattr(automation_engine, "_dispatch_action", crash)
+	response = client.post(f"/automation/execute/{rule_id}")
+	assert response.status_code == 500
+	assert response.json()["detail"] == "Action failed: RuntimeError: lead is gone"
+	with SessionLocal() as db:
+		# The action's savepoint was rolled back
+		assert db.execute(select(func.count()).select_from(models.WebhookLog).where(models.WebhookLog.automation_rule_id == rule_id)).scalar() == 0
+
+
+def test_execute_unknown_rule(client):
+	assert client.post("/automation/execute/999999").status_code == 404
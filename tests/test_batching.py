@@ -0,0 +1,58 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import func, select
+
+from app import models
+from app.automation_engine import _deliver_due_batches, warn_if_unscheduled
+
+from .conftest import make_lead
+
+
+@pytest.mark.parametrize("change", [{"active": False}, {"batch_window_seconds": None}])
+def test_pending_batch_is_delivered_when_rule_stops_batching(session_factory, db, change):
+	rule = models.AutomationRule(
+		name="batched notes",
+		trigger_type=models.TriggerType.on_create,
+		trigger_payload={"entity": "lead"},
+		action_type=models.ActionType.create_activity,
+		action_payload={"text": "welcome"},
+		batch_window_seconds=3600,
+	)
+	leads = [make_lead(db), make_lead(db)]
+	db.add(rule)
+	db.flush()
+	now = datetime.utcnow()
+	db.add(models.AutomationBatch(rule_id=rule.id, size=len(leads), due_at=now + timedelta(hours=1)))
+	db.add_all(models.AutomationBatchItem(rule_id=rule.id, event="create", entity="lead", payload={"lead_id": lead.id}) for lead in leads)
+	db.commit()
+
+	assert _deliver_due_batches(session_factory) is not None
+	for field, value in change.items():
+		setattr(rule, field, value)
+	db.commit()
+
+	assert _deliver_due_batches(session_factory) is None
+	notes = db.execute(select(models.ActivityLog.lead_id).where(models.ActivityLog.text == "welcome")).scalars().all()
+	assert sorted(notes) == sorted(lead.id for lead in leads)
+	assert db.execute(select(func.count()).select_from(models.AutomationBatchItem)).scalar() == 0
+
+
+def test_warns_when_batches_have_no_scheduler(session_factory, db, caplog):
+	assert not warn_if_unscheduled(session_factory)
+	db.add(models.AutomationRule(
+		name="batched hook",
+		trigger_type=models.TriggerType.on_create,
+		trigger_payload={"entity": "lead"},
+		action_type=models.ActionType.webhook,
+		action_payload={"url": "https://hooks.example.com/lead"},
+		batch_max_size=100,
+	))
+	db.commit()
+	assert warn_if_unscheduled(session_factory)
+	assert "python -m app.scheduler" in caplog.text
+
+	# A standalone scheduler holding the lease will deliver them
+	db.add(models.SchedulerLease(name="time_wait_scan", holder="scheduler", expires_at=datetime.utcnow() + timedelta(minutes=1)))
+	db.commit()
+	assert not warn_if_unscheduled(session_factory)
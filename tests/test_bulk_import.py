@@ -0,0 +1,34 @@
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from app.routers import leads as lead_routes
+
+
+def test_committed_rows_are_reported_created_when_automations_fail(client, monkeypatch):
+	def crash(*args, **kwargs):
+		raise RuntimeError("webhook exploded")
+
+	contact_id = client.post("/contacts/", json={"name": "Bulk", "phone": "5550400"}).json()["id"]
+	monkeypatch.setattr(lead_routes, "run_inline_events", crash)
+	rows = [{"contact_id": contact_id, "source": "ad", "assigned_to": "rep"} for _ in range(3)]
+	response = client.post("/leads/bulk", json=rows)
+	assert response.status_code == 200
+	assert (response.json()["created"], response.json()["failed"]) == (3, 0)
+
+
+
+def test_rows_of_a_chunk_that_fails_to_commit_are_rejected(client):
+	contact_id = client.post("/contacts/", json={"name": "Bulk", "phone": "5550401"}).json()["id"]
+
+	def busy(session):
+		raise OperationalError("COMMIT", {}, Exception("database is locked"))
+
+	event.listen(Session, "before_commit", busy)
+	try:
+		response = client.post("/leads/bulk", json=[{"contact_id": contact_id, "source": "ad", "assigned_to": "rep"}] * 2)
+	finally:
+		event.remove(Session, "before_commit", busy)
+	body = response.json()
+	assert (body["created"], body["failed"]) == (0, 2)
+	assert all(error["error"].startswith("Chunk rejected") for error in body["errors"])
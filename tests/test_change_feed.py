@@ -0,0 +1,66 @@
+import asyncio
+
+import pytest
+
+from app.change_feed import change_log_bounds, get_change_feed, read_changes
+from app.routers import leads as lead_routes
+from app.routers.events import stream_events
+
+
+def _new_changes(after_id):
+	return [(change["event"], change["payload"].get("lead_id")) for change in read_changes(after_id)]
+
+
+def _contact(client) -> str:
+	response = client.post("/contacts/", json={"name": "Feed", "phone": "5550100"})
+	assert response.status_code == 201
+	return response.json()["id"]
+
+
+def test_bulk_import_without_dispatch_logs_changes(client):
+	contact_id = _contact(client)
+	start = change_log_bounds()[1] or 0
+	rows = [
+		{"contact_id": contact_id, "source": "ad", "assigned_to": "rep", "notes": "first call"},
+		{"contact_id": contact_id, "source": "ad", "assigned_to": "rep"},
+	]
+	response = client.post("/leads/bulk?dispatch=false", json=rows)
+	assert response.json()["created"] == 2
+	changes = _new_changes(start)
+	assert [event for event, _ in changes] == ["create", "create", "activity"]
+	assert changes[2][1] == changes[0][1]
+
+
+def test_change_is_committed_with_the_lead_when_automations_fail(client, monkeypatch):
+	def crash(*args, **kwargs):
+		raise RuntimeError("worker died")
+
+	contact_id = _contact(client)
+	start = change_log_bounds()[1] or 0
+	monkeypatch.setattr(lead_routes, "run_inline_events", crash)
+	with pytest.raises(RuntimeError):
+		client.post("/leads/", json={"contact_id": contact_id, "source": "ad", "assigned_to": "rep", "notes": "hello"})
+	changes = _new_changes(start)
+	assert [event for event, _ in changes] == ["create", "activity"]
+	lead_id = changes[0][1]
+	assert client.get(f"/leads/{lead_id}").status_code == 200
+
+	with pytest.raises(RuntimeError):
+		client.patch(f"/leads/{lead_id}", json={"status": "contacted"})
+	assert _new_changes(start)[-1] == ("status_change", lead_id)
+
+
+def test_stream_subscribes_only_while_streaming():
+	feed = get_change_feed()
+
+	async def run():
+		response = await stream_events(entity=["lead"], event=[], last_event_id=None, last_event_id_header=None)
+		# A response that is never streamed (e.g. the client went away first) holds no subscription
+		assert not feed._subscribers
+		body = response.body_iterator
+		assert await body.__anext__() == "retry: 3000\n\n"
+		assert len(feed._subscribers) == 1
+		await body.aclose()
+		assert not feed._subscribers
+
+	asyncio.run(run())
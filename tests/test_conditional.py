@@ -0,0 +1,58 @@
+import os
+import sqlite3
+from contextlib import closing
+from datetime import datetime
+
+from app import cache
+
+
+def test_activity_list_of_missing_lead_is_404_not_304(client):
+	response = client.get("/leads/no-such-lead/activity", headers={"If-None-Match": "*"})
+	assert response.status_code == 404
+
+
+def test_activity_list_revalidates_for_existing_lead(client):
+	contact_id = client.post("/contacts/", json={"name": "Etag", "phone": "5550200"}).json()["id"]
+	lead_id = client.post("/leads/", json={"contact_id": contact_id, "source": "ad", "assigned_to": "rep"}).json()["id"]
+	etag = client.get(f"/leads/{lead_id}/activity").headers["ETag"]
+
+	assert client.get(f"/leads/{lead_id}/activity", headers={"If-None-Match": etag}).status_code == 304
+
+
+def _listed_status(client, lead_id):
+	items = client.get("/leads/", params={"limit": 500}).json()["items"]
+	return next(item["status"] for item in items if item["id"] == lead_id)
+
+
+def test_cached_body_follows_writes_from_another_process(client, monkeypatch):
+	monkeypatch.setattr(cache, "_backend", cache.MemoryBackend(100))
+	contact_id = client.post("/contacts/", json={"name": "Cache", "phone": "5550500"}).json()["id"]
+	lead_id = client.post("/leads/", json={"contact_id": contact_id, "source": "ad", "assigned_to": "rep"}).json()["id"]
+	first = client.get(f"/leads/{lead_id}")
+	assert client.get(f"/leads/{lead_id}").json()["status"] == "new"
+	assert _listed_status(client, lead_id) == "new"
+
+	# A plain sqlite3 connection, like another worker, never reaches this process's invalidation hooks
+	with closing(sqlite3.connect(os.environ["DATABASE_URL"].removeprefix("sqlite:///"))) as other:
+		other.execute("UPDATE leads SET status = 'contacted', updated_at = ? WHERE id = ?", (datetime.utcnow().isoformat(" "), lead_id))
+		other.commit()
+
+	fresh = client.get(f"/leads/{lead_id}")
+	assert fresh.json()["status"] == "contacted"
+	assert fresh.headers["ETag"] != first.headers["ETag"]
+	assert client.get(f"/leads/{lead_id}", headers={"If-None-Match": first.headers["ETag"]}).status_code == 200
+	assert _listed_status(client, lead_id) == "contacted"
+
+
+def test_lists_do_not_answer_if_modified_since(client):
+	response = client.get("/leads/")
+	assert "Last-Modified" not in response.headers
+	assert client.get("/leads/", headers={"If-Modified-Since": "Fri, 01 Jan 2100 00:00:00 GMT"}).status_code == 200
+	assert client.get("/leads/", headers={"If-None-Match": response.headers["ETag"]}).status_code == 304
+
+
+def test_lead_embedding_deals_has_no_last_modified(client):
+	contact_id = client.post("/contacts/", json={"name": "Expand", "phone": "5550600"}).json()["id"]
+	lead_id = client.post("/leads/", json={"contact_id": contact_id, "source": "ad", "assigned_to": "rep"}).json()["id"]
+	assert "Last-Modified" in client.get(f"/leads/{lead_id}", params={"expand": "contact"}).headers
+	assert "Last-Modified" not in client.get(f"/leads/{lead_id}", params={"expand": "deals"}).headers
@@ -0,0 +1,47 @@
+from sqlalchemy import column, insert, select, text, union
+
+from app import models
+from app.database import WRITER_SESSIONS, is_read
+
+from .conftest import make_contact
+
+
+def test_text_select_uses_reader(db):
+	assert db.get_bind(clause=text("SELECT 1")) is db.read_bind
+	db.execute(text("SELECT count(*) FROM leads")).scalar()
+	assert "writer" not in db.info
+
+
+def test_read_constructs_are_reads():
+	assert is_read(select(models.Lead.id))
+	assert is_read(union(select(models.Lead.id), select(models.Deal.lead_id)))
+	assert is_read(text("SELECT id FROM leads").columns(column("id")))
+	assert is_read(text("  with hits AS (SELECT 1) SELECT * FROM hits"))
+
+
+def test_writes_use_writer():
+	assert not is_read(insert(models.ChangeEvent))
+	assert not is_read(text("DELETE FROM leads"))
+	assert not is_read(text("WITH old AS (SELECT 1) DELETE FROM leads"))
+	assert not is_read(text("PRAGMA wal_checkpoint"))
+
+
+def test_flush_pins_transaction_to_writer(db):
+	assert db.get_bind(clause=select(models.Lead.id)) is db.read_bind
+	make_contact(db)
+	assert db.info.get("writer")
+	# Reads in the same transaction see its own writes
+	assert db.get_bind(clause=select(models.Contact.id)) is db.write_bind
+	db.commit()
+	assert "writer" not in db.info
+
+
+def test_writer_sessions_gauge_counts_open_write_transactions(db):
+	before = WRITER_SESSIONS.value
+	db.execute(select(models.Lead.id)).all()
+	assert WRITER_SESSIONS.value == before
+	make_contact(db)
+	make_contact(db)
+	assert WRITER_SESSIONS.value == before + 1
+	db.rollback()
+	assert WRITER_SESSIONS.value == before
@@ -0,0 +1,19 @@
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from app.instrumentation import collect, instrument_engine
+
+
+def test_failed_statement_does_not_skew_later_timings():
+	engine = create_engine("sqlite://")
+	instrument_engine(engine)
+	with engine.connect() as conn:
+		with pytest.raises(OperationalError):
+			conn.execute(text("SELECT * FROM missing_table"))
+		assert conn.info["query_started"] == []
+
+		with collect() as stats:
+			conn.execute(text("SELECT 1"))
+		assert stats.queries == 1
+		assert conn.info["query_started"] == []
@@ -0,0 +1,28 @@
+from sqlalchemy import Column, Integer, MetaData, Table, create_engine, inspect
+
+from app.database import Base
+from app.migrations import _add_missing_columns
+
+
+def test_added_columns_keep_their_declared_nullability(monkeypatch):
+	engine = create_engine("sqlite://")
+	with engine.begin() as conn:
+		Table("widgets", MetaData(), Column("id", Integer, primary_key=True)).create(conn)
+	target = MetaData()
+	Table(
+		"widgets",
+		target,
+		Column("id", Integer, primary_key=True),
+		Column("retries", Integer, server_default="0", nullable=False),
+		Column("priority", Integer, server_default="5", nullable=True),
+		Column("note_id", Integer, nullable=True),
+	)
+	monkeypatch.setattr(Base, "metadata", target)
+
+	with engine.begin() as conn:
+		_add_missing_columns(conn)
+		columns = {col["name"]: col for col in inspect(conn).get_columns("widgets")}
+	assert columns["retries"]["nullable"] is False
+	assert columns["priority"]["nullable"] is True
+	assert columns["note_id"]["nullable"] is True
+	assert columns["priority"]["default"] == "'5'"
@@ -0,0 +1,83 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event, func, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from app import models, outbox
+from app.database import SessionLocal
+from app.outbox import OutboxWorkerPool, prune_outbox
+
+
+def _event(status, processed_hours_ago=None):
+	processed_at = None if processed_hours_ago is None else datetime.utcnow() - timedelta(hours=processed_hours_ago)
+	return models.AutomationEvent(event="create", entity="lead", payload={}, status=status, processed_at=processed_at)
+
+
+def test_prune_outbox_deletes_only_old_done_events(db):
+	old_done = _event(models.EventStatus.done, 48)
+	recent_done = _event(models.EventStatus.done, 1)
+	old_failed = _event(models.EventStatus.failed, 48)
+	pending = _event(models.EventStatus.pending)
+	db.add_all([old_done, recent_done, old_failed, pending])
+	db.commit()
+
+	assert prune_outbox(db) == 1
+	remaining = db.execute(select(models.AutomationEvent.id)).scalars().all()
+	assert sorted(remaining) == sorted([recent_done.id, old_failed.id, pending.id])
+
+
+def test_workers_prune_in_chunks(session_factory, db, monkeypatch):
+	monkeypatch.setattr(outbox, "PRUNE_BATCH_SIZE", 2)
+	db.add_all([_event(models.EventStatus.done, 48) for _ in range(5)])
+	db.commit()
+
+	pool = OutboxWorkerPool(session_factory, handler=lambda *args: None)
+	pool._prune_if_due()
+	assert db.execute(select(models.AutomationEvent.id)).first() is not None
+	pool._next_prune = 0
+	pool._prune_if_due()
+	assert db.execute(select(models.AutomationEvent.id)).first() is None
+
+
+
+def _count(db, model):
+	return db.execute(select(func.count()).select_from(model)).scalar()
+
+
+def test_event_commits_with_the_lead(client, monkeypatch):
+	pool = OutboxWorkerPool(SessionLocal, handler=lambda *args: None)
+	monkeypatch.setattr(outbox, "_pool", pool)
+	contact_id = client.post("/contacts/", json={"name": "Outbox", "phone": "5550300"}).json()["id"]
+
+	lead_id = client.post("/leads/", json={"contact_id": contact_id, "source": "ad", "assigned_to": "rep"}).json()["id"]
+	with SessionLocal() as db:
+		payloads = db.execute(select(models.AutomationEvent.payload)).scalars().all()
+	assert [payload["lead_id"] for payload in payloads if payload.get("lead_id") == lead_id] == [lead_id]
+	# Workers are woken only once the row is committed
+	assert pool._pending_signals == 1
+
+
+def test_failed_commit_stores_neither_lead_nor_event(client, monkeypatch):
+	pool = OutboxWorkerPool(SessionLocal, handler=lambda *args: None)
+	monkeypatch.setattr(outbox, "_pool", pool)
+	contact_id = client.post("/contacts/", json={"name": "Busy", "phone": "5550301"}).json()["id"]
+	with SessionLocal() as db:
+		events_before = _count(db, models.AutomationEvent)
+
+	def busy(session):
+		# Fail whichever commit would store the automation event
+		if session.info.get("outbox_enqueued") or any(isinstance(obj, models.AutomationEvent) for obj in session.new):
+			raise OperationalError("COMMIT", {}, Exception("database is locked"))
+
+	event.listen(Session, "before_commit", busy)
+	try:
+		with pytest.raises(OperationalError):
+			client.post("/leads/", json={"contact_id": contact_id, "source": "ad", "assigned_to": "rep"})
+	finally:
+		event.remove(Session, "before_commit", busy)
+	with SessionLocal() as db:
+		assert db.execute(select(models.Lead.id).where(models.Lead.contact_id == contact_id)).first() is None
+		assert _count(db, models.AutomationEvent) == events_before
+	assert pool._pending_signals == 0
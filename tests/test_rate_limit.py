@@ -0,0 +1,19 @@
+from app import rate_limit
+
+from .conftest import make_contact
+
+
+def test_writes_are_shed_while_the_write_lock_queue_is_full(client, db, monkeypatch):
+	monkeypatch.setattr(rate_limit, "LOAD_SHED_MAX_WRITES", 1)
+	body = {"name": "Shed", "phone": "5550101"}
+	# Requests that are not yet writing do not count towards the queue
+	assert client.post("/contacts/", json=body).status_code == 201
+
+	make_contact(db)
+	response = client.post("/contacts/", json=body)
+	assert response.status_code == 503
+	assert response.headers["Retry-After"] == "1"
+	assert client.get("/contacts/").status_code == 200
+
+	db.commit()
+	assert client.post("/contacts/", json=body).status_code == 201
@@ -0,0 +1,19 @@
+from app import models
+from app.pagination import PageParams
+from app.search import search_contacts, search_leads
+
+from .conftest import make_lead
+
+
+def test_search_reads_from_reader(db):
+	lead = make_lead(db)
+	db.add(models.ActivityLog(lead_id=lead.id, activity_type=models.ActivityType.note, text="quarterly renewal", created_by="rep"))
+	db.commit()
+
+	contacts = search_contacts(db, "5550000", PageParams(limit=10, after=None))
+	leads = search_leads(db, "renewal", None, PageParams(limit=10, after=None))
+
+	assert [contact.id for contact in contacts["items"]] == [lead.contact_id]
+	assert [item.id for item in leads["items"]] == [lead.id]
+	# Search never takes SQLite's write lock
+	assert "writer" not in db.info
@@ -0,0 +1,75 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select
+
+from app import models
+from app.automation_engine import _run_time_wait_rules
+
+from .conftest import make_lead
+
+
+def _rule(db, action_type, action_payload, **trigger):
+	rule = models.AutomationRule(
+		name=f"{action_type}-{len(trigger)}",
+		trigger_type=models.TriggerType.time_wait,
+		trigger_payload={"entity": "lead", "hours_without_touch": 24, **trigger},
+		action_type=action_type,
+		action_payload=action_payload,
+	)
+	db.add(rule)
+	db.flush()
+	return rule
+
+
+def _firings(db, rule):
+	return db.execute(select(models.TimeWaitFiring.fired_at).where(models.TimeWaitFiring.rule_id == rule.id)).scalars().all()
+
+
+def test_update_status_rule_fires_once_per_touch(session_factory, db):
+	stale = datetime.utcnow() - timedelta(hours=48)
+	lead = make_lead(db, last_touch_at=stale)
+	rule = _rule(db, models.ActionType.update_status, {"status": "contacted"})
+	db.commit()
+
+	_run_time_wait_rules(session_factory)
+	first = _firings(db, rule)
+	assert len(first) == 1
+	# The status update must not requeue the lead for the touch it already fired on
+	due = db.execute(select(func.count()).select_from(models.TimeWaitDue).where(models.TimeWaitDue.due_at <= datetime.utcnow())).scalar()
+	assert due == 0
+
+	_run_time_wait_rules(session_factory)
+	db.expire_all()
+	assert _firings(db, rule) == first
+	assert db.get(models.Lead, lead.id).status == models.LeadStatus.contacted
+
+
+def test_create_activity_rule_rearms_on_its_own_touch(session_factory, db):
+	lead = make_lead(db, last_touch_at=datetime.utcnow() - timedelta(hours=48))
+	rule = _rule(db, models.ActionType.create_activity, {"text": "ping"})
+	db.commit()
+
+	next_due = _run_time_wait_rules(session_factory)
+	_run_time_wait_rules(session_factory)
+
+	assert db.query(models.ActivityLog).filter(models.ActivityLog.lead_id == lead.id).count() == 1
+	assert len(_firings(db, rule)) == 1
+	# Re-armed for the touch the activity made, a full period later
+	assert next_due > datetime.utcnow() + timedelta(hours=23)
+
+
+def test_stale_lead_fires_when_it_moves_into_the_rule_status(session_factory, db):
+	long_ago = datetime.utcnow() - timedelta(hours=48)
+	lead = make_lead(db, last_touch_at=long_ago)
+	rule = _rule(db, models.ActionType.create_activity, {"text": "ping"}, status="contacted")
+	db.commit()
+
+	_run_time_wait_rules(session_factory)
+	assert _firings(db, rule) == []
+
+	lead.status = models.LeadStatus.contacted
+	db.commit()
+	_run_time_wait_rules(session_factory)
+	db.expire_all()
+	assert len(_firings(db, rule)) == 1
+	assert db.query(models.ActivityLog).filter(models.ActivityLog.lead_id == lead.id).count() == 1
@@ -0,0 +1,95 @@
+import json
+import time
+
+import httpx
+from sqlalchemy import func, select
+
+from app import models
+from app.webhooks import WebhookDeliverer, WebhookLogWriter
+
+URL = "https://hooks.example.com/lead"
+
+
+def _deliverer(*responses, max_retries=2):
+	"""A deliverer whose transport replays `responses` (status codes or exceptions) in order, recording each request."""
+	requests = []
+	replies = iter(responses)
+
+	def handle(request):
+		requests.append(request)
+		reply = next(replies)
+		if isinstance(reply, Exception):
+			raise reply
+		return httpx.Response(reply, text=f"status {reply}")
+
+	return WebhookDeliverer(max_retries=max_retries, backoff_seconds=0, transport=httpx.MockTransport(handle)), requests
+
+
+def test_delivers_on_first_success():
+	deliverer, requests = _deliverer(200)
+	result = deliverer.deliver("POST", URL, {"lead_id": "l1"})
+	assert (result.status_code, result.attempts, result.delivery_status) == (200, 1, models.WebhookDeliveryStatus.delivered)
+	assert json.loads(requests[0].read()) == {"lead_id": "l1"}
+
+
+def test_retries_server_errors_and_timeouts():
+	deliverer, requests = _deliverer(503, httpx.ReadTimeout("slow"), 200)
+	result = deliverer.deliver("POST", URL, {})
+	assert (result.status_code, result.attempts, result.delivery_status) == (200, 3, models.WebhookDeliveryStatus.delivered)
+	assert len(requests) == 3
+
+
+def test_gives_up_after_max_retries():
+	deliverer, requests = _deliverer(500, 502, 504, 200, max_retries=2)
+	result = deliverer.deliver("POST", URL, {})
+	assert (result.status_code, result.attempts, result.delivery_status) == (504, 3, models.WebhookDeliveryStatus.dead_letter)
+	assert len(requests) == 3
+
+
+def test_client_errors_are_not_retried():
+	deliverer, requests = _deliverer(404, 200)
+	result = deliverer.deliver("POST", URL, {})
+	assert (result.status_code, result.attempts, result.delivery_status) == (404, 1, models.WebhookDeliveryStatus.failed)
+	assert len(requests) == 1
+
+
+def test_log_writer_inserts_in_batches(session_factory, db):
+	rule = models.AutomationRule(
+		name="hook",
+		trigger_type=models.TriggerType.on_create,
+		trigger_payload={"entity": "lead"},
+		action_type=models.ActionType.webhook,
+		action_payload={"url": URL},
+	)
+	db.add(rule)
+	db.commit()
+	sessions = []
+
+	def open_session():
+		sessions.append(None)
+		return session_factory()
+
+	def logged():
+		db.expire_all()
+		return db.execute(select(func.count()).select_from(models.WebhookLog)).scalar()
+
+	writer = WebhookLogWriter(open_session, batch_size=3, flush_seconds=60)
+	writer.start()
+	for _ in range(2):
+		writer.add(automation_rule_id=rule.id, response_status=200, delivery_status=models.WebhookDeliveryStatus.delivered)
+	time.sleep(0.1)
+	assert logged() == 0
+
+	# The batch filling up wakes the writer long before the flush interval
+	writer.add(automation_rule_id=rule.id, response_status=200, delivery_status=models.WebhookDeliveryStatus.delivered)
+	deadline = time.monotonic() + 5
+	while logged() < 3 and time.monotonic() < deadline:
+		time.sleep(0.01)
+	assert logged() == 3
+	assert len(sessions) == 1
+
+	# Stopping flushes the partial batch
+	writer.add(automation_rule_id=rule.id, response_status=500, delivery_status=models.WebhookDeliveryStatus.dead_letter)
+	writer.stop()
+	assert logged() == 4
+	assert len(sessions) == 2